@@ -0,0 +1,301 @@
+"""Сборка ipset из локальных баз ASN: подсети выбранных автономных систем и организаций.
+
+Поддерживаемые базы (читаются построчно, .gz распознаётся по сигнатуре):
+
+  iptoasn  — ip2asn-v4.tsv / ip2asn-combined.tsv: "начало<TAB>конец<TAB>ASN<TAB>страна<TAB>организация";
+  geolite  — GeoLite2-ASN-Blocks-IPv4.csv / -IPv6.csv: "network,autonomous_system_number,...";
+  mmdb     — GeoLite2-ASN.mmdb и совместимые, если установлен пакет maxminddb.
+
+Подсети выбранных ASN сливаются и сводятся к минимальному набору CIDR
+(ipset_compiler) в lists/ipset-asn.txt. Этот файл добавляется вторым --ipset ко всем
+профилям с ipset-all.txt (ipset_modes), сам ipset-all.txt не меняется.
+
+Настройки сборки и размер/mtime каждой базы запоминаются в lists/.cache/asn-ipset.json:
+повторный запуск без аргументов (и фоновая проверка списков) перечитывает только
+изменившиеся базы.
+
+    python asn_ipset.py --db ip2asn-combined.tsv.gz --group cloudflare --group discord
+    python asn_ipset.py --db GeoLite2-ASN.mmdb --asn 32590 --org "riot games"
+    python asn_ipset.py          # пересобрать, если базы изменились
+"""
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+from atomic_write import atomic_write
+from ip_index import parse_address
+from ipset_compiler import Interval, format_ipset, from_intervals, merge_intervals, prefix_interval
+from list_importer import open_source
+
+MANIFEST_FORMAT = 1
+OUTPUT_NAME = "ipset-asn.txt"
+MANIFEST_NAME = "asn-ipset.json"
+
+IPTOASN = "iptoasn"
+GEOLITE = "geolite"
+MMDB = "mmdb"
+
+# Группы для --group: номера AS и подстроки названий организаций (без учёта регистра)
+GROUPS: Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]] = {
+    "cloudflare": ((13335, 209242), ("cloudflare",)),
+    "discord": ((), ("discord",)),
+    "valve": ((32590,), ("valve corp",)),
+    "riot": ((6507,), ("riot games",)),
+    "blizzard": ((57976,), ("blizzard",)),
+}
+
+
+class Selection(NamedTuple):
+    asns: Tuple[int, ...]
+    orgs: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, asns: Iterable[int] = (), orgs: Iterable[str] = (), groups: Iterable[str] = ()) -> "Selection":
+        asns, orgs = set(asns), {org.lower() for org in orgs}
+        for group in groups:
+            group_asns, group_orgs = GROUPS[group]
+            asns.update(group_asns)
+            orgs.update(group_orgs)
+        return cls(tuple(sorted(asns)), tuple(sorted(orgs)))
+
+    def matches(self, asn: int, org: str) -> bool:
+        if asn in self.asns:
+            return True
+        if self.orgs and org:
+            org = org.lower()
+            return any(part in org for part in self.orgs)
+        return False
+
+    def __str__(self):
+        return ", ".join([f"AS{asn}" for asn in self.asns] + [f"«{org}»" for org in self.orgs])
+
+
+class DatabaseState(NamedTuple):
+    size: int
+    mtime: int
+    selection: List
+    v4: List[Interval]
+    v6: List[Interval]
+
+
+def database_format(path: Path) -> str:
+    if path.suffix.lower() == ".mmdb":
+        return MMDB
+    with open_source(path) as f:
+        first = f.readline()
+    return IPTOASN if "\t" in first else GEOLITE
+
+
+def _rows(path: Path, fmt: str) -> Iterator[Tuple[int, str, str, Optional[str]]]:
+    """(ASN, организация, начало или CIDR, конец или None) — адреса разбираются только для выбранных строк."""
+    if fmt == MMDB:
+        if maxminddb is None:
+            raise ValueError("для баз .mmdb нужен пакет maxminddb (pip install maxminddb)")
+        with maxminddb.open_database(str(path)) as reader:
+            for network, record in reader:
+                if isinstance(record, dict):
+                    yield (record.get("autonomous_system_number") or 0,
+                           record.get("autonomous_system_organization") or "", str(network), None)
+        return
+    with open_source(path) as f:
+        if fmt == IPTOASN:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 3 and fields[2].isdigit():
+                    yield int(fields[2]), fields[4] if len(fields) > 4 else "", fields[0], fields[1]
+            return
+        for fields in csv.reader(f):
+            if len(fields) >= 2 and fields[1].isdigit():
+                yield int(fields[1]), fields[2] if len(fields) > 2 else "", fields[0], None
+
+
+def select_intervals(path: Path, selection: Selection) -> Dict[int, List[Interval]]:
+    """Слитые интервалы адресов выбранных ASN из одной базы, по версиям IP."""
+    spans: Dict[int, List[Interval]] = {4: [], 6: []}
+    for asn, org, first, last in _rows(path, database_format(path)):
+        if not selection.matches(asn, org):
+            continue
+        try:
+            if last is None:
+                version, lo, hi = prefix_interval(first)
+            else:
+                version, lo = parse_address(first)
+                _version, hi = parse_address(last)
+        except ValueError:
+            continue
+        spans[version].append((lo, hi))
+    return {version: merge_intervals(items) for version, items in spans.items()}
+
+
+def output_path(lists_dir: Path) -> Path:
+    return Path(lists_dir) / OUTPUT_NAME
+
+
+def generated_ipset(lists_dir: Path) -> Optional[Path]:
+    """Собранный ipset, если он есть; пустым файл не бывает — пустой ipset совпал бы с любым IP."""
+    path = output_path(lists_dir)
+    return path if path.exists() else None
+
+
+class AsnIpsetBuilder:
+    def __init__(self, lists_dir: Path):
+        self.lists_dir = Path(lists_dir)
+        self.manifest_path = self.lists_dir / ".cache" / MANIFEST_NAME
+        self.databases: List[str] = []
+        self.selection = Selection((), ())
+        self.states: Dict[str, DatabaseState] = {}
+        # Базы из настройки, которых не оказалось на диске при последней сборке
+        self.missing: List[str] = []
+        self.load()
+
+    def load(self):
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("format") != MANIFEST_FORMAT:
+            return
+        try:
+            self.databases = list(data["databases"])
+            self.selection = Selection(*map(tuple, data["selection"]))
+            self.states = {path: DatabaseState(*state) for path, state in data.get("states", {}).items()}
+        except (KeyError, TypeError, ValueError):
+            self.databases, self.selection, self.states = [], Selection((), ()), {}
+
+    def save(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "databases": self.databases,
+            "selection": [list(self.selection.asns), list(self.selection.orgs)],
+            "states": {path: list(state) for path, state in self.states.items()},
+        }
+        atomic_write(self.manifest_path, json.dumps(data, ensure_ascii=False))
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.databases) and bool(self.selection.asns or self.selection.orgs)
+
+    def configure(self, databases: Iterable[Path], selection: Selection):
+        self.databases = [str(Path(path).resolve()) for path in databases]
+        self.selection = selection
+
+    def _same_selection(self, state: Optional[DatabaseState]) -> bool:
+        return state is not None and [list(part) for part in state.selection] == [list(self.selection.asns),
+                                                                                  list(self.selection.orgs)]
+
+    def _fresh(self, path: str) -> bool:
+        state = self.states.get(path)
+        if not self._same_selection(state):
+            return False
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            # База пропала: остаются подсети, собранные из неё раньше
+            self.missing.append(path)
+            return True
+        return stat.st_size == state.size and stat.st_mtime_ns == state.mtime
+
+    def update(self, force: bool = False) -> Optional[int]:
+        """Пересобирает ipset, если изменились базы или настройки. Число подсетей или None, если
+        пересобирать нечего."""
+        if not self.configured:
+            return None
+        self.missing = []
+        stale = [path for path in self.databases if force or not self._fresh(path)]
+        self.states = {path: state for path, state in self.states.items() if path in self.databases}
+        if not stale and output_path(self.lists_dir).exists() == self._has_networks():
+            return None
+        for path in stale:
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                # База пропала: её подсети остаются, пока подходят к выбору, иначе выбрасываются
+                self.missing.append(path)
+                if not self._same_selection(self.states.get(path)):
+                    self.states.pop(path, None)
+                continue
+            intervals = select_intervals(Path(path), self.selection)
+            self.states[path] = DatabaseState(stat.st_size, stat.st_mtime_ns,
+                                              [list(self.selection.asns), list(self.selection.orgs)],
+                                              intervals[4], intervals[6])
+        count = self._write()
+        self.save()
+        return count
+
+    def _has_networks(self) -> bool:
+        return any(state.v4 or state.v6 for state in self.states.values())
+
+    def _write(self) -> int:
+        networks = []
+        for version, field in ((4, "v4"), (6, "v6")):
+            spans = (tuple(span) for state in self.states.values() for span in getattr(state, field))
+            networks.extend(from_intervals(merge_intervals(spans), version))
+        path = output_path(self.lists_dir)
+        if not networks:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return 0
+        header = f"# Собрано asn_ipset.py ({self.selection}), правки вручную будут перезаписаны\n"
+        atomic_write(path, header + format_ipset(networks))
+        return len(networks)
+
+
+def update_asn_ipset(lists_dir: Path) -> Optional[int]:
+    return AsnIpsetBuilder(lists_dir).update()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ipset из локальных баз ASN")
+    parser.add_argument("--db", action="append", type=Path, default=[],
+                        help="база iptoasn (.tsv), GeoLite2-ASN-Blocks (.csv) или .mmdb; можно несколько")
+    parser.add_argument("--asn", action="append", type=lambda v: int(v.upper().removeprefix("AS")), default=[],
+                        help="номер AS, например 13335 или AS13335")
+    parser.add_argument("--org", action="append", default=[], help="подстрока названия организации")
+    parser.add_argument("--group", action="append", choices=sorted(GROUPS), default=[])
+    parser.add_argument("--lists-dir", type=Path, default=Path(__file__).parent / "lists")
+    parser.add_argument("--force", action="store_true", help="перечитать базы, даже если они не менялись")
+    args = parser.parse_args(argv)
+
+    builder = AsnIpsetBuilder(args.lists_dir)
+    if args.db or args.asn or args.org or args.group:
+        databases = args.db or [Path(path) for path in builder.databases]
+        selection = Selection.build(args.asn, args.org, args.group)
+        if not selection.asns and not selection.orgs:
+            selection = builder.selection
+        missing = [path for path in databases if not Path(path).exists()]
+        if missing:
+            print(f"База не найдена: {missing[0]}", file=sys.stderr)
+            return 2
+        builder.configure(databases, selection)
+    if not builder.configured:
+        print("Укажите базы (--db) и что из них выбрать (--asn, --org или --group)", file=sys.stderr)
+        return 2
+    try:
+        count = builder.update(force=args.force)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось собрать ipset: {e}", file=sys.stderr)
+        return 1
+    for path in builder.missing:
+        print(f"База не найдена: {path}", file=sys.stderr)
+    if count is None:
+        print(f"{OUTPUT_NAME}: базы не менялись, пересборка не нужна")
+    elif count:
+        print(f"{OUTPUT_NAME}: {count} подсетей ({builder.selection})")
+    else:
+        print(f"Ничего не найдено для {builder.selection}; {OUTPUT_NAME} удалён", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Атомарная запись файлов.
+
+Новое содержимое пишется во временный файл рядом с целевым, сбрасывается на диск
+(fsync) и только потом заменяет целевой через os.replace — при сбое на диске
+остаётся либо старая, либо новая версия, но не пустой файл.
+
+Transaction сохраняет несколько файлов вместе: сначала все временные файлы,
+затем журнал со списком замен, затем сами замены. Если процесс упал посреди замен,
+recover() по журналу доводит их до конца при следующем запуске.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+Content = Union[str, bytes, Iterable[str]]
+
+TEMP_SUFFIX = ".tmp-write"
+JOURNAL_NAME = ".write-journal.json"
+
+
+def _fsync_dir(directory: Path):
+    # На Windows каталог открыть нельзя, там os.replace и так надёжен
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp(path: Path, content: Content, encoding: str = "utf-8") -> Path:
+    """Пишет содержимое во временный файл рядом с path и возвращает его путь."""
+    path = Path(path)
+    tmp = path.with_name(path.name + TEMP_SUFFIX)
+    try:
+        if isinstance(content, bytes):
+            with open(tmp, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with open(tmp, "w", encoding=encoding, newline="") as f:
+                if isinstance(content, str):
+                    f.write(content)
+                else:
+                    for chunk in content:
+                        f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return tmp
+
+
+def replace(tmp: Path, path: Path):
+    os.replace(tmp, path)
+    _fsync_dir(Path(path).parent)
+
+
+def atomic_write(path: Path, content: Content, encoding: str = "utf-8"):
+    path = Path(path)
+    replace(write_temp(path, content, encoding), path)
+
+
+class Transaction:
+    """Групповая запись: все файлы заменяются вместе или (до журнала) не заменяется ни один.
+
+        with Transaction(lists_dir) as tx:
+            tx.write(lists_dir / "custom_strategy.txt", text)
+            tx.write(lists_dir / "list-general.txt", domains)
+    """
+
+    def __init__(self, journal_dir: Path):
+        self.journal = Path(journal_dir) / JOURNAL_NAME
+        self._writes: Dict[Path, Tuple[Content, str]] = {}
+
+    def write(self, path: Path, content: Content, encoding: str = "utf-8"):
+        self._writes[Path(path)] = (content, encoding)
+
+    def commit(self):
+        staged: List[Tuple[Path, Path]] = []
+        try:
+            for path, (content, encoding) in self._writes.items():
+                staged.append((write_temp(path, content, encoding), path))
+        except BaseException:
+            for tmp, _path in staged:
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+            raise
+
+        if len(staged) > 1:
+            atomic_write(self.journal, json.dumps([[str(tmp), str(path)] for tmp, path in staged]))
+        for tmp, path in staged:
+            replace(tmp, path)
+        if len(staged) > 1:
+            self.journal.unlink()
+        self._writes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._writes.clear()
+        return False
+
+
+def recover(journal_dir: Path) -> int:
+    """Доводит прерванную транзакцию до конца; возвращает число выполненных замен."""
+    journal = Path(journal_dir) / JOURNAL_NAME
+    done = 0
+    if journal.exists():
+        try:
+            entries = json.loads(journal.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entries = []
+        for tmp, path in entries:
+            if Path(tmp).exists():
+                replace(Path(tmp), Path(path))
+                done += 1
+        journal.unlink()
+    # Временные файлы без журнала — запись не дошла до замены, старые версии целы
+    for stray in Path(journal_dir).glob(f"*{TEMP_SUFFIX}"):
+        try:
+            stray.unlink()
+        except OSError:
+            pass
+    return done
+
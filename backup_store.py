@@ -0,0 +1,217 @@
+"""Резервные копии списков с адресацией по содержимому.
+
+Копия хранится один раз на каждое уникальное содержимое (objects/<sha256>.gz),
+а index.json помнит, какие версии были у каждого файла и когда. Сохранение без
+изменений новую копию не создаёт. Старые версии удаляются по политике хранения:
+не больше keep версий на файл, и не старше max_age_days (если задано).
+Последняя версия не удаляется никогда.
+
+    python backup_store.py list list-general.txt
+    python backup_store.py diff list-general.txt 2
+    python backup_store.py restore list-general.txt 2
+
+Версии нумеруются от новой: 1 — последняя сохранённая копия.
+"""
+import argparse
+import difflib
+import gzip
+import hashlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from atomic_write import atomic_write
+
+BACKUP_DIR = ".backups"
+INDEX_FORMAT = 1
+DEFAULT_KEEP = 20
+
+# Старые копии вида list-general.txt.bak.20240101-120000 переносятся в хранилище
+_LEGACY_RE = re.compile(r"^(?P<name>.+)\.bak\.(?P<ts>\d{8}-\d{6})$")
+
+
+class Snapshot(NamedTuple):
+    sha256: str
+    created: float
+    size: int
+
+    @property
+    def label(self) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+
+
+class BackupStore:
+    def __init__(self, root: Path, keep: int = DEFAULT_KEEP, max_age_days: Optional[float] = None):
+        self.root = Path(root)
+        self.keep = max(1, keep)
+        self.max_age_days = max_age_days
+        self._index: Optional[Dict[str, List[Snapshot]]] = None
+
+    @classmethod
+    def for_lists(cls, lists_dir: Path, **kwargs) -> "BackupStore":
+        return cls(Path(lists_dir) / BACKUP_DIR, **kwargs)
+
+    # --- индекс ---
+
+    @property
+    def index(self) -> Dict[str, List[Snapshot]]:
+        if self._index is None:
+            self._index = {}
+            try:
+                data = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+                if data.get("format") == INDEX_FORMAT:
+                    self._index = {name: [Snapshot(*item) for item in items]
+                                   for name, items in data.get("files", {}).items()}
+            except (OSError, ValueError, TypeError):
+                pass
+        return self._index
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {"format": INDEX_FORMAT,
+                "files": {name: [list(s) for s in items] for name, items in self.index.items()}}
+        atomic_write(self.root / "index.json", json.dumps(data, ensure_ascii=False, indent=1))
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.gz"
+
+    # --- копии ---
+
+    def snapshots(self, name: str) -> List[Snapshot]:
+        """Версии файла от старой к новой."""
+        return list(self.index.get(name, []))
+
+    def _store(self, name: str, data: bytes, created: float) -> Optional[Snapshot]:
+        digest = hashlib.sha256(data).hexdigest()
+        history = self.index.setdefault(name, [])
+        if history and history[-1].sha256 == digest:
+            return None
+        obj = self._object_path(digest)
+        if not obj.exists():
+            # Объект пишется так же атомарно, как индекс: индекс не сошлётся на оборванный файл
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(obj, gzip.compress(data, compresslevel=6))
+        snapshot = Snapshot(digest, created, len(data))
+        history.append(snapshot)
+        history.sort(key=lambda s: s.created)
+        return snapshot
+
+    def backup(self, path: Path) -> Optional[Snapshot]:
+        """Сохраняет текущее содержимое файла; None, если файла нет или оно уже сохранено."""
+        path = Path(path)
+        self._migrate_legacy(path)
+        if not path.exists():
+            return None
+        snapshot = self._store(path.name, path.read_bytes(), time.time())
+        if snapshot is not None:
+            self._apply_retention(path.name)
+            self._save_index()
+        return snapshot
+
+    def read(self, snapshot: Snapshot) -> bytes:
+        with gzip.open(self._object_path(snapshot.sha256), "rb") as f:
+            return f.read()
+
+    def restore(self, path: Path, snapshot: Snapshot):
+        """Возвращает файл к версии snapshot; текущее содержимое перед этим тоже сохраняется."""
+        path = Path(path)
+        data = self.read(snapshot)
+        self.backup(path)
+        atomic_write(path, data)
+
+    def diff(self, path: Path, snapshot: Snapshot, context: int = 2) -> str:
+        """Unified diff от версии snapshot к текущему файлу."""
+        path = Path(path)
+        old = self.read(snapshot).decode("utf-8", errors="replace").splitlines()
+        new = path.read_text(encoding="utf-8", errors="replace").splitlines() if path.exists() else []
+        return "\n".join(difflib.unified_diff(old, new, f"{path.name} ({snapshot.label})", path.name,
+                                              n=context, lineterm=""))
+
+    # --- хранение ---
+
+    def _apply_retention(self, name: str):
+        history = self.index.get(name, [])
+        keep = history[-self.keep:]
+        if self.max_age_days is not None:
+            limit = time.time() - self.max_age_days * 86400
+            keep = [s for s in keep[:-1] if s.created >= limit] + keep[-1:]
+        self.index[name] = keep
+        if len(keep) != len(history):
+            self._collect_garbage()
+
+    def _collect_garbage(self):
+        used = {s.sha256 for items in self.index.values() for s in items}
+        objects = self.root / "objects"
+        if not objects.exists():
+            return
+        for obj in objects.glob("*/*.gz"):
+            if obj.name[:-len(".gz")] not in used:
+                try:
+                    obj.unlink()
+                except OSError:
+                    pass
+
+    def _migrate_legacy(self, path: Path):
+        migrated = False
+        for legacy in path.parent.glob(f"{path.name}.bak.*"):
+            match = _LEGACY_RE.match(legacy.name)
+            if not match or match.group("name") != path.name:
+                continue
+            try:
+                created = time.mktime(time.strptime(match.group("ts"), "%Y%m%d-%H%M%S"))
+                self._store(path.name, legacy.read_bytes(), created)
+                legacy.unlink()
+                migrated = True
+            except (OSError, ValueError):
+                continue
+        if migrated:
+            self._apply_retention(path.name)
+            self._save_index()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Резервные копии списков")
+    parser.add_argument("--lists-dir", type=Path, default=Path(__file__).parent / "lists")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="версии файла").add_argument("file")
+    for command, text in (("diff", "отличия версии от текущего файла"), ("restore", "вернуть файл к версии")):
+        sub = commands.add_parser(command, help=text)
+        sub.add_argument("file")
+        sub.add_argument("number", type=int, help="номер версии из list, 1 — последняя")
+    args = parser.parse_args(argv)
+
+    path = Path(args.file)
+    if not path.is_absolute() and not path.exists():
+        path = args.lists_dir / path
+    store = BackupStore.for_lists(path.parent)
+    # Старые копии .bak.<время> тоже попадают в список
+    store._migrate_legacy(path)
+    history = store.snapshots(path.name)[::-1]
+    if not history:
+        print(f"{path.name}: резервных копий нет", file=sys.stderr)
+        return 1
+
+    if args.command == "list":
+        for number, snapshot in enumerate(history, 1):
+            print(f"{number:3}  {snapshot.label}  {snapshot.size} Б  {snapshot.sha256[:12]}")
+        return 0
+    if not 1 <= args.number <= len(history):
+        parser.error(f"номер версии от 1 до {len(history)}")
+    snapshot = history[args.number - 1]
+    try:
+        if args.command == "diff":
+            print(store.diff(path, snapshot) or "Версия совпадает с текущим файлом")
+        else:
+            store.restore(path, snapshot)
+            print(f"{path.name}: восстановлена версия от {snapshot.label}")
+    except OSError as e:
+        print(f"{path.name}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Замеры нормализации hostlist-файлов на больших синтетических списках.
+
+    python benchmarks/bench_normalizer.py --lines 1000000
+    python benchmarks/bench_normalizer.py --output norm.json
+    python benchmarks/bench_normalizer.py --compare norm.json
+
+Формат результатов и сравнение — как в bench_strategies.py.
+"""
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_strategies import compare, measure  # noqa: E402
+from domain_normalizer import normalize_lines  # noqa: E402
+
+FORMAT = 1
+DEFAULT_LINES = 1_000_000
+TLDS = ["com", "net", "org", "ru", "io", "xn--p1ai", "рф", "de"]
+IDN_LABELS = ["пример", "почта", "münchen", "bücher", "日本", "тест"]
+
+
+def _label(rnd: random.Random) -> str:
+    return "".join(rnd.choices(string.ascii_lowercase + string.digits, k=rnd.randint(3, 12)))
+
+
+def _domain(rnd: random.Random) -> str:
+    return ".".join(_label(rnd) for _ in range(rnd.randint(1, 3))) + "." + rnd.choice(TLDS[:6])
+
+
+def synthetic_hostlist(lines: int, messy: float = 0.3, seed: int = 1) -> List[str]:
+    """Список, похожий на вставленный из разных источников: доля messy строк требует исправлений."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        domain = _domain(rnd)
+        if rnd.random() >= messy:
+            out.append(domain)
+            continue
+        kind = rnd.randrange(9)
+        if kind == 0:
+            out.append(domain.upper() + ".")
+        elif kind == 1:
+            out.append(f"https://{domain}:{rnd.randint(1, 65535)}/{_label(rnd)}?q={_label(rnd)}")
+        elif kind == 2:
+            out.append(f"*.{domain}")
+        elif kind == 3:
+            out.append(f"{rnd.choice(IDN_LABELS)}.{rnd.choice(TLDS)}")
+        elif kind == 4:
+            out.append(f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.0/24")
+        elif kind == 5:
+            out.append(f"2001:db8:{rnd.randint(0, 0xffff):x}::/48")
+        elif kind == 6:
+            out.append(f"0.0.0.0 {domain}")
+        elif kind == 7:
+            out.append(f"# {_label(rnd)}")
+        else:
+            out.append(f"{_label(rnd)}!{_label(rnd)}")
+    return out
+
+
+def run(lines: int, repeat: int) -> Dict:
+    results = {}
+    for messy in (0.0, 0.3):
+        data = synthetic_hostlist(lines, messy)
+        name = f"normalize/{lines}/messy={messy:.0%}"
+        results[name] = measure(lambda: normalize_lines(data, keep_invalid=True), repeat, warmup=1)
+        rate = lines / (results[name]["median_ms"] / 1000)
+        results[name]["lines_per_s"] = rate
+        print(f"{name:<40} {results[name]['median_ms']:10.1f} ms {rate:12,.0f} строк/с "
+              f"{results[name]['peak_kib'] / 1024:8.1f} MiB")
+    return {
+        "format": FORMAT,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры нормализации hostlist-файлов")
+    parser.add_argument("--lines", type=int, default=DEFAULT_LINES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="куда сохранить результаты в JSON")
+    parser.add_argument("--compare", type=Path, help="JSON с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимый рост, доля (по умолчанию 0.25)")
+    args = parser.parse_args(argv)
+
+    current = run(args.lines, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold, min_delta_ms=5.0)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ {line}")
+        if regressions:
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Замеры сборки стратегий: пресеты, конструктор и большие Custom-файлы.
+
+    python benchmarks/bench_strategies.py --output bench.json
+    python benchmarks/bench_strategies.py --compare bench.json --threshold 0.25
+
+В режиме --compare код возврата 1 означает регрессию времени или памяти.
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import script_parameters  # noqa: E402
+import strategies_db  # noqa: E402
+from strategy_model import Strategy  # noqa: E402
+from strategy_optimizer import optimize  # noqa: E402
+from strategy_registry import load_registry  # noqa: E402
+from strategy_tokenizer import tokenize  # noqa: E402
+
+FORMAT = 1
+CUSTOM_SIZES = (100, 1000, 5000)
+
+Case = Callable[[], object]
+
+
+def synthetic_custom(profiles: int, seed: int = 1) -> str:
+    """Custom-стратегия из случайных, но воспроизводимых профилей: часть из них перекрывается и сливается."""
+    rnd = random.Random(seed)
+    lists = ["list-general.txt", "list-google.txt", "list-discord.txt", "list-extra.txt"]
+    modes = ["multisplit", "fake,multidisorder", "fake", "fakedsplit", "hostfakesplit"]
+    lines = ["# synthetic", "--wf-tcp=80,443,1024-65535", "--wf-udp=443,1024-65535", ""]
+    for i in range(profiles):
+        if i:
+            lines.append("--new")
+        if rnd.random() < 0.7:
+            lines.append(f"--filter-tcp={rnd.choice(['80', '443', '80,443', '2053,2083,2087'])}")
+        else:
+            lines.append(f"--filter-udp={rnd.choice(['443', '19294-19344', '50000-50100'])}")
+        if rnd.random() < 0.6:
+            lines.append(f'--hostlist="{{lists_dir}}/{rnd.choice(lists)}"')
+        else:
+            lines.append(f"--ipset={{lists_dir}}/ipset-all.txt")
+        lines.append(f"--dpi-desync={rnd.choice(modes)}")
+        lines.append(f"--dpi-desync-repeats={rnd.randint(1, 11)}")
+        lines.append(f"--dpi-desync-split-pos={rnd.choice(['1', '2,sniext+1', 'midsld', 'sld+1'])}")
+        if rnd.random() < 0.3:
+            lines.append("--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin  # комментарий")
+    return "\n".join(lines) + "\n"
+
+
+def measure(func: Case, repeat: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+
+    # Память меряем отдельным прогоном: tracemalloc заметно замедляет выполнение
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": times[0] * 1000,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def _cold_compile(game: bool, lists_dir: str, bin_dir: str, mode: str) -> Case:
+    def run():
+        script_parameters._compile.cache_clear()
+        return script_parameters.compile_script_parameters(game, lists_dir, bin_dir, mode)
+    return run
+
+
+def _assemble_all() -> Case:
+    registry = load_registry()
+    combos = [(yt, gen, discord)
+              for yt in registry.block_names("youtube")
+              for gen in registry.block_names("general")
+              for discord in (False, True)]
+
+    def run():
+        # Как StrategyConstructorDialog.save_strategy, но без записи на диск
+        for yt, gen, discord in combos:
+            optimize(strategies_db.assemble_strategy(yt, gen, discord)).strategy.to_text()
+    return run
+
+
+def _parse_custom(text: str) -> Case:
+    def run():
+        return optimize(Strategy.from_argv([token.value for token in tokenize(text)]))
+    return run
+
+
+def build_cases(workdir: Path) -> List[Tuple[str, Case]]:
+    lists_dir = str(ROOT / "lists")
+    bin_dir = str(ROOT / "bin")
+    cases = []
+    for mode in script_parameters.preset_names():
+        for game in (False, True):
+            cases.append((f"compile/{mode}/game={int(game)}", _cold_compile(game, lists_dir, bin_dir, mode)))
+    cases.append(("compile/cached", lambda: script_parameters.compile_script_parameters(
+        True, lists_dir, bin_dir, script_parameters.preset_names()[0])))
+    cases.append(("assemble/all-combinations", _assemble_all()))
+
+    for size in CUSTOM_SIZES:
+        text = synthetic_custom(size)
+        cases.append((f"custom/parse/{size}", _parse_custom(text)))
+        # Полный путь Custom: чтение файла, подстановка, оптимизация и --wf-raw из ipset-exclude
+        custom_dir = workdir / f"custom-{size}"
+        custom_dir.mkdir()
+        exclude = script_parameters.exclude_list_path(lists_dir)
+        if exclude.exists():
+            shutil.copy(exclude, script_parameters.exclude_list_path(str(custom_dir)))
+        script_parameters.custom_strategy_path(str(custom_dir)).write_text(text, encoding="utf-8")
+        cases.append((f"custom/compile/{size}", _cold_compile(True, str(custom_dir), bin_dir, "Custom")))
+    return cases
+
+
+def run(pattern: Optional[str], repeat: int) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, case in build_cases(Path(tmp)):
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(case, repeat)
+            print(f"{name:<40} {results[name]['median_ms']:9.3f} ms {results[name]['peak_kib']:10.1f} KiB")
+    return {
+        "format": FORMAT,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Список регрессий; слишком мелкие по абсолютной величине изменения времени считаем шумом."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        slower = now["median_ms"] - before["median_ms"]
+        if slower > min_delta_ms and now["median_ms"] > before["median_ms"] * (1 + threshold):
+            regressions.append(f"{name}: время {before['median_ms']:.3f} -> {now['median_ms']:.3f} ms")
+        if now["peak_kib"] > before["peak_kib"] * (1 + threshold) and now["peak_kib"] - before["peak_kib"] > 16:
+            regressions.append(f"{name}: память {before['peak_kib']:.1f} -> {now['peak_kib']:.1f} KiB")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры сборки стратегий Zapret UI")
+    parser.add_argument("--output", type=Path, help="куда сохранить результаты в JSON")
+    parser.add_argument("--compare", type=Path, help="JSON с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимый рост, доля (по умолчанию 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="меньшее замедление считается шумом")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--filter", help="запускать только замеры, содержащие подстроку")
+    args = parser.parse_args(argv)
+
+    current = run(args.filter, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ {line}")
+        if regressions:
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
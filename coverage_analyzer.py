@@ -0,0 +1,349 @@
+"""Покрытие профилей стратегии с учётом исключений.
+
+Для каждого профиля скомпилированной стратегии считается, что остаётся от
+--hostlist/--ipset после --hostlist-exclude/--ipset-exclude, и какие записи
+включений бесполезны:
+
+  домены  — дерево меток (hostlist_trie): записи, покрытые исключением, и повторы;
+            отдельно — исключения, вырезающие поддомены из включённых доменов;
+  подсети — интервалы адресов (ipset_compiler): подсети, целиком попавшие в
+            исключения, в том числе в ipset-exclude.txt, который через --wf-raw
+            отсекается ещё в драйвере для всех профилей.
+
+    python coverage_analyzer.py --preset "General" --ipset-mode full -v
+"""
+import argparse
+import ipaddress
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from hostlist_trie import Finding, HostlistTrie, normalize
+from ipset_compiler import Interval, subtract, to_intervals
+from strategy_model import Profile, Strategy
+from wf_filter import Network
+
+# Доля исключённых записей, начиная с которой профиль помечается предупреждением
+WIPE_OUT_RATIO = 0.5
+
+_EXCLUDED_KINDS = frozenset({"shadowed", "conflict"})
+# Списки одного профиля объединяются, поэтому пересечение файлов — тоже лишние записи
+_REDUNDANT_KINDS = frozenset({"duplicate", "redundant", "overlap"})
+
+
+class DomainCoverage(NamedTuple):
+    entries: int
+    excluded: List[Finding]
+    redundant: List[Finding]
+    # Исключения внутри включённых доменов: сужают покрытие, но не делают записи лишними
+    carved: int
+
+    @property
+    def effective(self) -> int:
+        return self.entries - len(self.excluded) - len(self.redundant)
+
+
+class DeadPrefix(NamedTuple):
+    file: str
+    lineno: int
+    network: str
+    cause: str
+
+    def __str__(self):
+        return f"{self.file}:{self.lineno} {self.network} (исключена: {self.cause})"
+
+
+class IpCoverage(NamedTuple):
+    prefixes: int
+    # Пустой ipset winws считает совпадающим с любым адресом
+    any_address: bool
+    v4_addresses: int
+    v4_effective: int
+    v6_prefixes: int
+    dead: List[DeadPrefix]
+    partial: int
+
+
+class ProfileCoverage(NamedTuple):
+    index: int
+    title: str
+    hostlists: Optional[DomainCoverage]
+    ipsets: Optional[IpCoverage]
+
+    @property
+    def warnings(self) -> List[str]:
+        warnings = []
+        hosts = self.hostlists
+        if hosts is not None and hosts.entries and len(hosts.excluded) >= hosts.entries * WIPE_OUT_RATIO:
+            warnings.append(f"исключения перекрывают {len(hosts.excluded)} из {hosts.entries} доменов")
+        ips = self.ipsets
+        if ips is not None and ips.prefixes and len(ips.dead) >= ips.prefixes * WIPE_OUT_RATIO:
+            warnings.append(f"исключения перекрывают {len(ips.dead)} из {ips.prefixes} подсетей")
+        if ips is not None and ips.v4_addresses and not ips.v4_effective:
+            warnings.append("после исключений не осталось ни одного IPv4-адреса")
+        return warnings
+
+
+class _Exclusions:
+    """Объединение исключённых подсетей с источниками, для проверки вхождения бинпоиском."""
+
+    def __init__(self, sources: List[Tuple[str, List[Network]]]):
+        self.sources = sources
+        self.intervals: Dict[int, List[Interval]] = {}
+        self.starts: Dict[int, List[int]] = {}
+        for version in (4, 6):
+            intervals = to_intervals([n for _name, networks in sources for n in networks], version)
+            self.intervals[version] = intervals
+            self.starts[version] = [lo for lo, _hi in intervals]
+
+    def contains(self, network: Network) -> bool:
+        lo, hi = int(network.network_address), int(network.broadcast_address)
+        i = bisect_right(self.starts[network.version], lo) - 1
+        return i >= 0 and hi <= self.intervals[network.version][i][1]
+
+    def overlaps(self, network: Network) -> bool:
+        lo, hi = int(network.network_address), int(network.broadcast_address)
+        i = bisect_right(self.starts[network.version], hi) - 1
+        return i >= 0 and self.intervals[network.version][i][1] >= lo
+
+    def cause(self, network: Network) -> str:
+        for name, networks in self.sources:
+            if any(network.subnet_of(ex) for ex in networks if ex.version == network.version):
+                return name
+        return "несколько исключений"
+
+
+class CoverageAnalyzer:
+    def __init__(self, global_excludes: Iterable[Path] = ()):
+        self.global_excludes = [Path(path) for path in global_excludes]
+        self._lines: Dict[str, List[str]] = {}
+        self._networks: Dict[str, List[Tuple[int, Network]]] = {}
+        self._tries: Dict[Tuple, Tuple[HostlistTrie, List[Finding]]] = {}
+        self._ip_results: Dict[Tuple, IpCoverage] = {}
+
+    def _read(self, path: str) -> List[str]:
+        lines = self._lines.get(path)
+        if lines is None:
+            try:
+                lines = Path(path).read_text(encoding="utf-8", errors="replace").splitlines()
+            except OSError:
+                lines = []
+            self._lines[path] = lines
+        return lines
+
+    def _parse_ipset(self, path: str) -> List[Tuple[int, Network]]:
+        networks = self._networks.get(path)
+        if networks is None:
+            networks = []
+            for lineno, raw in enumerate(self._read(path), 1):
+                line = raw.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                try:
+                    networks.append((lineno, ipaddress.ip_network(line, strict=False)))
+                except ValueError:
+                    continue
+            self._networks[path] = networks
+        return networks
+
+    # --- домены ---
+
+    def _trie(self, includes: Tuple, excludes: Tuple) -> Tuple[HostlistTrie, List[Finding]]:
+        # Одинаковые наборы списков встречаются во многих профилях: дерево строится один раз
+        key = (includes, excludes)
+        cached = self._tries.get(key)
+        if cached is None:
+            trie = HostlistTrie()
+            for items, exclude in ((includes, False), (excludes, True)):
+                for kind, value in items:
+                    if kind == "file":
+                        trie.add_list(Path(value).name, self._read(value), exclude=exclude)
+                    else:
+                        name = "--hostlist-exclude-domains" if exclude else "--hostlist-domains"
+                        trie.add_list(name, value, exclude=exclude)
+            cached = self._tries[key] = (trie, trie.analyze())
+        return cached
+
+    def domain_coverage(self, profile: Profile) -> Optional[DomainCoverage]:
+        includes = tuple(("file", path) for path in profile.hostlists)
+        if profile.hostlist_domains:
+            includes += (("inline", tuple(profile.hostlist_domains)),)
+        if not includes:
+            return None
+        excludes = tuple(("file", path) for path in profile.hostlist_excludes)
+        if profile.hostlist_exclude_domains:
+            excludes += (("inline", tuple(profile.hostlist_exclude_domains)),)
+        trie, findings = self._trie(includes, excludes)
+
+        entries = 0
+        included = set()
+        for _kind, value in includes:
+            name = Path(value).name if _kind == "file" else "--hostlist-domains"
+            for line in trie.lines.get(name, []):
+                entry = normalize(line)
+                if entry is not None:
+                    entries += 1
+                    if not entry[1]:
+                        included.add(entry[0])
+
+        carved = 0
+        for _kind, value in excludes:
+            name = Path(value).name if _kind == "file" else "--hostlist-exclude-domains"
+            for line in trie.lines.get(name, []):
+                entry = normalize(line)
+                if entry is not None and _has_parent(entry[0], included):
+                    carved += 1
+
+        excluded = [f for f in findings if f.kind in _EXCLUDED_KINDS and not f.entry.exclude]
+        redundant = [f for f in findings if f.kind in _REDUNDANT_KINDS and not f.entry.exclude]
+        return DomainCoverage(entries, excluded, redundant, carved)
+
+    # --- подсети ---
+
+    def ip_coverage(self, profile: Profile) -> Optional[IpCoverage]:
+        if not profile.ipsets and not profile.ipset_ips:
+            return None
+        key = (tuple(profile.ipsets), tuple(profile.ipset_ips),
+               tuple(profile.ipset_excludes), tuple(profile.ipset_exclude_ips))
+        cached = self._ip_results.get(key)
+        if cached is None:
+            cached = self._ip_results[key] = self._ip_coverage(profile)
+        return cached
+
+    def _ip_coverage(self, profile: Profile) -> IpCoverage:
+        entries: List[Tuple[str, int, Network]] = []
+        empty_file = False
+        for path in profile.ipsets:
+            networks = self._parse_ipset(path)
+            empty_file = empty_file or not networks
+            name = Path(path).name
+            entries.extend((name, lineno, network) for lineno, network in networks)
+        for value in profile.ipset_ips:
+            try:
+                entries.append(("--ipset-ip", 0, ipaddress.ip_network(value, strict=False)))
+            except ValueError:
+                continue
+
+        sources = [(Path(path).name, [n for _l, n in self._parse_ipset(path)]) for path in profile.ipset_excludes]
+        excluded_ips = []
+        for value in profile.ipset_exclude_ips:
+            try:
+                excluded_ips.append(ipaddress.ip_network(value, strict=False))
+            except ValueError:
+                continue
+        if excluded_ips:
+            sources.append(("--ipset-exclude-ip", excluded_ips))
+        for path in self.global_excludes:
+            sources.append((f"{path.name} (--wf-raw)", [n for _l, n in self._parse_ipset(str(path))]))
+        exclusions = _Exclusions(sources)
+
+        dead = []
+        partial = 0
+        for name, lineno, network in entries:
+            if exclusions.contains(network):
+                dead.append(DeadPrefix(name, lineno, str(network), exclusions.cause(network)))
+            elif exclusions.overlaps(network):
+                partial += 1
+
+        networks = [network for _name, _lineno, network in entries]
+        v4 = to_intervals(networks, 4)
+        v4_effective = subtract(v4, exclusions.intervals[4])
+        return IpCoverage(
+            prefixes=len(entries),
+            any_address=empty_file and not entries,
+            v4_addresses=sum(hi - lo + 1 for lo, hi in v4),
+            v4_effective=sum(hi - lo + 1 for lo, hi in v4_effective),
+            v6_prefixes=sum(network.version == 6 for network in networks),
+            dead=dead,
+            partial=partial,
+        )
+
+    def analyze(self, strategy: Strategy) -> List[ProfileCoverage]:
+        result = []
+        for index, profile in enumerate(strategy.profiles, 1):
+            hosts = self.domain_coverage(profile)
+            ips = self.ip_coverage(profile)
+            if hosts is None and ips is None:
+                continue
+            result.append(ProfileCoverage(index, _title(profile), hosts, ips))
+        return result
+
+
+def _has_parent(domain: str, included) -> bool:
+    dot = domain.find(".")
+    while dot >= 0:
+        domain = domain[dot + 1:]
+        if domain in included:
+            return True
+        dot = domain.find(".")
+    return False
+
+
+def _title(profile: Profile) -> str:
+    parts = []
+    if profile.filter_tcp:
+        parts.append(f"tcp={profile.filter_tcp}")
+    if profile.filter_udp:
+        parts.append(f"udp={profile.filter_udp}")
+    if profile.filter_l7:
+        parts.append("l7=" + ",".join(profile.filter_l7))
+    return " ".join(parts) or "все порты"
+
+
+def analyze_args(args: Iterable[str], lists_dir: str) -> List[ProfileCoverage]:
+    from script_parameters import exclude_list_path
+
+    args = list(args)
+    # ipset-exclude.txt, собранный в --wf-raw, отсекает адреса для всех профилей сразу
+    global_excludes = [exclude_list_path(lists_dir)] if any(arg.startswith("--wf-raw=") for arg in args) else []
+    return CoverageAnalyzer(global_excludes).analyze(Strategy.from_argv(args))
+
+
+def describe(coverage: List[ProfileCoverage], verbose: bool = False, limit: int = 20) -> str:
+    lines = []
+    for item in coverage:
+        lines.append(f"Профиль {item.index} ({item.title}):")
+        hosts = item.hostlists
+        if hosts is not None:
+            lines.append(f"  домены: {hosts.effective} из {hosts.entries} действуют, исключены {len(hosts.excluded)}, "
+                         f"лишние {len(hosts.redundant)}, исключений внутри включённых доменов {hosts.carved}")
+            if verbose:
+                lines.extend(f"    {finding}" for finding in (hosts.excluded + hosts.redundant)[:limit])
+        ips = item.ipsets
+        if ips is not None:
+            if ips.any_address:
+                lines.append("  подсети: ipset пуст — профиль срабатывает для любого адреса")
+            else:
+                percent = ips.v4_effective * 100 / ips.v4_addresses if ips.v4_addresses else 0
+                lines.append(f"  подсети: {ips.prefixes}, бесполезны {len(ips.dead)}, частично исключены {ips.partial}; "
+                             f"IPv4-адресов {ips.v4_effective} из {ips.v4_addresses} ({percent:.1f}%), "
+                             f"IPv6-подсетей {ips.v6_prefixes}")
+            if verbose:
+                lines.extend(f"    {dead}" for dead in ips.dead[:limit])
+        lines.extend(f"  ⚠ {warning}" for warning in item.warnings)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from ipset_modes import DEFAULT_IPSET_MODE, IPSET_MODES, apply_ipset_mode
+    from script_parameters import compile_script_parameters, preset_names
+
+    root = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Покрытие профилей стратегии с учётом исключений")
+    parser.add_argument("--preset", help="пресет или Custom (по умолчанию первый пресет)")
+    parser.add_argument("--game", action="store_true", help="игровой режим")
+    parser.add_argument("--ipset-mode", choices=IPSET_MODES, default=DEFAULT_IPSET_MODE)
+    parser.add_argument("--lists-dir", default=str(root / "lists"))
+    parser.add_argument("-v", "--verbose", action="store_true", help="перечислить бесполезные записи")
+    args = parser.parse_args(argv)
+
+    mode = args.preset or preset_names()[0]
+    params = compile_script_parameters(args.game, args.lists_dir, str(root / "bin"), mode)
+    params = apply_ipset_mode(params, args.lists_dir, args.ipset_mode)
+    print(describe(analyze_args(params, args.lists_dir), args.verbose))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Приведение строк hostlist-файлов к виду, который понимает winws.
+
+За один проход по списку:
+
+  - регистр понижается, точки по краям убираются ("Example.COM." -> "example.com");
+  - из ссылок остаётся только имя хоста ("https://user@a.com:8443/path?q" -> "a.com");
+  - маски "*.example.com" и ".example.com" сводятся к "example.com" — winws и так
+    применяет запись ко всем поддоменам;
+  - национальные домены переводятся в punycode ("пример.рф" -> "xn--e1afmkfd.xn--p1ai");
+  - IP-адреса и подсети выносятся из hostlist в соответствующий ipset.
+
+Префикс "^" (только сам домен, без поддоменов) сохраняется, строки-комментарии остаются
+на месте; комментарий в конце строки с доменом отбрасывается.
+
+    python domain_normalizer.py                      # отчёт по всем list-*.txt
+    python domain_normalizer.py list-general.txt --write
+"""
+import argparse
+import ipaddress
+import re
+import socket
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import idna
+except ImportError:
+    idna = None
+
+from atomic_write import Transaction
+from backup_store import BackupStore
+
+DOMAIN = "domain"
+NETWORK = "network"
+INVALID = "invalid"
+
+DEFAULT_IPSET = "ipset-all.txt"
+# Для остальных hostlist-файлов адреса уходят в DEFAULT_IPSET
+MATCHING_IPSET = {
+    "list-exclude.txt": "ipset-exclude.txt",
+}
+
+# Уже нормализованный домен: так выглядит подавляющее большинство строк, для них разбор не нужен
+_CLEAN_RE = re.compile(r"[a-z0-9_](?:[a-z0-9_-]*[a-z0-9_])?"
+                       r"(?:\.[a-z0-9_](?:[a-z0-9_-]*[a-z0-9_])?)*"
+                       r"\.[a-z][a-z0-9-]*[a-z0-9]")
+_LABEL_RE = re.compile(r"[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?")
+_IPV4_RE = re.compile(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?:/\d{1,2})?")
+_SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*://")
+_HOSTS_SINKS = frozenset({"0.0.0.0", "127.0.0.1", "::", "::1"})
+
+
+class NormalizeResult(NamedTuple):
+    lines: List[str]
+    networks: List[str]
+    invalid: List[Tuple[int, str]]
+    duplicates: int
+    changed: int
+
+    def report(self) -> str:
+        return (f"строк в списке: {len(self.lines)}, исправлено: {self.changed}, дублей: {self.duplicates}, "
+                f"адресов и подсетей для ipset: {len(self.networks)}, некорректных: {len(self.invalid)}")
+
+
+def matching_ipset(hostlist: str) -> str:
+    return MATCHING_IPSET.get(hostlist, DEFAULT_IPSET)
+
+
+@lru_cache(maxsize=4096)
+def to_ascii(host: str) -> Optional[str]:
+    """Punycode для национального домена или None, если имя не кодируется."""
+    try:
+        if idna is not None:
+            # IDNA 2008 с сопоставлением UTS #46 — как в браузерах
+            return idna.encode(host, uts46=True).decode("ascii")
+        return host.encode("idna").decode("ascii")
+    except (UnicodeError, ValueError):
+        return None
+
+
+def parse_network(text: str) -> Optional[str]:
+    if not text or not (text[0].isdigit() or ":" in text):
+        return None
+    if ":" not in text:
+        # IPv4 разбирается без ipaddress: на больших списках это заметно быстрее
+        if not _IPV4_RE.fullmatch(text):
+            return None
+        address, _, prefix = text.partition("/")
+        try:
+            value = int.from_bytes(socket.inet_aton(address), "big")
+        except OSError:
+            return None
+        length = int(prefix) if prefix else 32
+        # Ведущие нули ipaddress тоже не принимает: 010 можно прочитать как восьмеричное
+        if length > 32 or any(len(octet) > 1 and octet[0] == "0" for octet in address.split(".")):
+            return None
+        value &= (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+        return f"{socket.inet_ntoa(value.to_bytes(4, 'big'))}/{length}"
+    try:
+        return str(ipaddress.ip_network(text, strict=False))
+    except ValueError:
+        return None
+
+
+def _valid(host: str) -> bool:
+    if len(host) > 253 or "." not in host:
+        return False
+    labels = host.split(".")
+    # Последняя метка из цифр — это IP-адрес или его обрывок, а не домен
+    if labels[-1].isdigit():
+        return False
+    return all(_LABEL_RE.fullmatch(label) for label in labels)
+
+
+def normalize_host(text: str) -> Tuple[str, str]:
+    """(DOMAIN|NETWORK|INVALID, значение) для одного имени, ссылки, адреса или подсети."""
+    if _CLEAN_RE.fullmatch(text) and len(text) <= 63:
+        return DOMAIN, text
+
+    host = text.strip().lower()
+    network = parse_network(host)
+    if network is not None:
+        return NETWORK, network
+
+    match = _SCHEME_RE.match(host)
+    if match:
+        host = host[match.end():]
+    for sep in "/?#":
+        host = host.split(sep, 1)[0]
+    host = host.rsplit("@", 1)[-1]
+    if host.startswith("["):
+        # [2001:db8::1]:443
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host, _port = host.split(":")
+    network = parse_network(host)
+    if network is not None:
+        return NETWORK, network
+
+    # Синтаксис adblock и маски поддоменов
+    if host.startswith("||"):
+        host = host[2:]
+    host = host.rstrip("^").strip(".")
+    while host.startswith("*."):
+        host = host[2:]
+    host = host.lstrip(".")
+
+    if not host.isascii():
+        host = to_ascii(host)
+        if host is None:
+            return INVALID, text
+    if _valid(host):
+        return DOMAIN, host
+    return INVALID, text
+
+
+def normalize_entry(line: str) -> Optional[Tuple[str, str]]:
+    """Разбор строки hostlist: None для пустой строки и комментария, иначе как normalize_host.
+
+    Для доменов с префиксом "^" он сохраняется в значении."""
+    line = line.strip()
+    if not line or line[0] == "#":
+        return None
+    if _CLEAN_RE.fullmatch(line) and len(line) <= 63:
+        return DOMAIN, line
+    tokens = line.split()
+    # Строка из hosts-файла: "0.0.0.0 example.com"
+    if len(tokens) >= 2 and tokens[0] in _HOSTS_SINKS:
+        token = tokens[1]
+    else:
+        token = tokens[0]
+    exact = token.startswith("^")
+    kind, value = normalize_host(token[1:] if exact else token)
+    if kind == DOMAIN and exact:
+        return DOMAIN, "^" + value
+    if kind == INVALID:
+        return INVALID, line
+    return kind, value
+
+
+def normalize_lines(lines: Iterable[str], keep_invalid: bool = False) -> NormalizeResult:
+    """Нормализует список целиком: дубли (и после исправления тоже) убираются, пустые строки
+    пропадают, комментарии остаются. keep_invalid оставляет некорректные строки в списке."""
+    out: List[str] = []
+    networks: Dict[str, None] = {}
+    seen = set()
+    invalid: List[Tuple[int, str]] = []
+    duplicates = changed = 0
+    for lineno, raw in enumerate(lines, 1):
+        parsed = normalize_entry(raw)
+        if parsed is None:
+            stripped = raw.strip()
+            if stripped:
+                out.append(stripped)
+            continue
+        kind, value = parsed
+        if kind == INVALID:
+            invalid.append((lineno, value))
+            if keep_invalid:
+                out.append(value)
+            continue
+        if value != raw.strip():
+            changed += 1
+        if kind == NETWORK:
+            if value in networks:
+                duplicates += 1
+            networks[value] = None
+            continue
+        if value in seen:
+            duplicates += 1
+            continue
+        seen.add(value)
+        out.append(value)
+    return NormalizeResult(out, list(networks), invalid, duplicates, changed)
+
+
+def _read_lines(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    return path.read_text(encoding="utf-8", errors="replace").splitlines()
+
+
+def merged_ipset(path: Path, networks: Iterable[str]) -> Tuple[str, int]:
+    """Содержимое ipset-файла с добавленными подсетями и число действительно новых."""
+    lines = _read_lines(path)
+    known = {parse_network(line.split("#", 1)[0].strip()) for line in lines}
+    added = [network for network in networks if network not in known]
+    text = "".join(line + "\n" for line in lines + added)
+    return text, len(added)
+
+
+def write_normalized(lists_dir: Path, hostlist: str, result: NormalizeResult) -> int:
+    """Записывает нормализованный hostlist и переносит адреса в ipset одной транзакцией.
+
+    Возвращает число подсетей, добавленных в ipset."""
+    lists_dir = Path(lists_dir)
+    hostlist_path = lists_dir / hostlist
+    ipset_path = lists_dir / matching_ipset(hostlist)
+    store = BackupStore.for_lists(lists_dir)
+    store.backup(hostlist_path)
+    added = 0
+    with Transaction(lists_dir) as tx:
+        tx.write(hostlist_path, "".join(line + "\n" for line in result.lines))
+        if result.networks:
+            ipset_text, added = merged_ipset(ipset_path, result.networks)
+            if added:
+                store.backup(ipset_path)
+                tx.write(ipset_path, ipset_text)
+    return added
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Нормализация hostlist-файлов")
+    parser.add_argument("lists", nargs="*", help="имена файлов в папке списков (по умолчанию все list-*.txt)")
+    parser.add_argument("--lists-dir", type=Path, default=Path(__file__).parent / "lists")
+    parser.add_argument("--write", action="store_true", help="записать результат (с резервной копией)")
+    args = parser.parse_args(argv)
+
+    names = args.lists or sorted(p.name for p in args.lists_dir.glob("list-*.txt"))
+    for name in names:
+        path = args.lists_dir / name
+        try:
+            result = normalize_lines(_read_lines(path), keep_invalid=True)
+        except OSError as e:
+            print(f"{name}: не удалось прочитать: {e}", file=sys.stderr)
+            return 2
+        for lineno, text in result.invalid[:20]:
+            print(f"{name}:{lineno}: некорректная строка: {text}", file=sys.stderr)
+        print(f"{name}: {result.report()}")
+        if args.write and (result.changed or result.duplicates or result.networks):
+            added = write_normalized(args.lists_dir, name, result)
+            if result.networks:
+                print(f"  в {matching_ipset(name)} добавлено подсетей: {added}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from list_health import Issue, check_lists
+from script_parameters import compile_script_parameters
+
+
+class ListHealthThread(QThread):
+    result = Signal(list)
+
+    def __init__(self, lists_dir, bin_dir, mode, game_mode_checked):
+        super().__init__()
+        self.lists_dir = str(lists_dir)
+        self.bin_dir = str(bin_dir)
+        self.mode = mode
+        self.game_mode_checked = game_mode_checked
+
+    def run(self):
+        try:
+            try:
+                args = compile_script_parameters(self.game_mode_checked, self.lists_dir, self.bin_dir, self.mode)
+            except Exception:
+                # Ошибки самой стратегии показываются при подключении, списки проверяем всё равно
+                args = ()
+            issues = check_lists(Path(self.lists_dir), args)
+        except Exception as e:
+            issues = [Issue("lists", 0, "error", f"Не удалось проверить списки: {e}")]
+        self.result.emit(issues)
@@ -0,0 +1,248 @@
+"""Поиск лишних записей в hostlist-файлах.
+
+winws сопоставляет домен из списка со всеми его поддоменами, поэтому записи хранятся
+в дереве по меткам справа налево (com -> example -> sub). Один обход дерева находит:
+
+  duplicate  — повтор записи в том же файле;
+  redundant  — запись покрыта родительским доменом из того же файла;
+  overlap    — запись покрыта доменом из другого списка включения (только отчёт:
+               списки могут использоваться разными профилями);
+  shadowed   — запись покрыта доменом из списка исключений и не сработает там, где
+               исключение подключено;
+  conflict   — один и тот же домен и во включениях, и в исключениях.
+
+shadowed и conflict удаляются из списка только тогда, когда исключение стоит рядом с
+ним во всех профилях пресетов, блоков конструктора и Custom стратегии (shared_excludes):
+иначе запись работает в профилях без исключения.
+
+Запись с префиксом "^" совпадает только с самим доменом, без поддоменов.
+
+    python hostlist_trie.py            # отчёт по list-general, list-google и list-exclude
+    python hostlist_trie.py --write    # записать очищенные списки
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from atomic_write import atomic_write
+from backup_store import BackupStore
+from domain_normalizer import DOMAIN, normalize_entry
+
+INCLUDE_LISTS = ("list-general.txt", "list-google.txt")
+EXCLUDE_LISTS = ("list-exclude.txt",)
+
+# Виды находок, которые удаляются из очищенного списка всегда
+PRUNED_KINDS = frozenset({"duplicate", "redundant"})
+# Удаляются, только если исключение подключено везде, где подключён список
+EXCLUDED_KINDS = frozenset({"shadowed", "conflict"})
+
+
+class Entry(NamedTuple):
+    list_name: str
+    lineno: int
+    domain: str
+    exact: bool
+    exclude: bool
+
+    def __str__(self):
+        return f"{self.list_name}:{self.lineno} {'^' if self.exact else ''}{self.domain}"
+
+
+class Finding(NamedTuple):
+    kind: str
+    entry: Entry
+    cause: Optional[Entry]
+
+    def __str__(self):
+        return f"{self.kind}: {self.entry}" + (f" (из-за {self.cause})" if self.cause else "")
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: List[Entry] = []
+
+
+def normalize(line: str) -> Optional[Tuple[str, bool]]:
+    """(домен, только точное совпадение) или None для пустой строки, комментария,
+    адреса и некорректной записи — разбор тот же, что у normalize_entry."""
+    parsed = normalize_entry(line)
+    if parsed is None or parsed[0] != DOMAIN:
+        return None
+    return _split_exact(parsed[1])
+
+
+def _split_exact(value: str) -> Tuple[str, bool]:
+    return (value[1:], True) if value.startswith("^") else (value, False)
+
+
+class HostlistTrie:
+    def __init__(self):
+        self.root = _Node()
+        self.lines: Dict[str, List[str]] = {}
+        self.invalid: List[Entry] = []
+
+    def add_list(self, name: str, lines: Iterable[str], exclude: bool = False):
+        self.lines[name] = list(lines)
+        for lineno, line in enumerate(self.lines[name], 1):
+            parsed = normalize_entry(line)
+            if parsed is None:
+                continue
+            kind, value = parsed
+            domain, exact = _split_exact(value) if kind == DOMAIN else (line.strip(), False)
+            entry = Entry(name, lineno, domain, exact, exclude)
+            # Адрес в hostlist тоже ошибка: winws сравнивает с ним только имена
+            if kind != DOMAIN:
+                self.invalid.append(entry)
+                continue
+            node = self.root
+            for label in reversed(domain.split(".")):
+                child = node.children.get(label)
+                if child is None:
+                    child = node.children[label] = _Node()
+                node = child
+            node.entries.append(entry)
+
+    def analyze(self) -> List[Finding]:
+        findings: List[Finding] = []
+        # Ближайшие предки: включающая запись по каждому файлу и исключающая запись
+        stack: List[Tuple[_Node, Dict[str, Entry], Optional[Entry]]] = [(self.root, {}, None)]
+        while stack:
+            node, includes, exclude = stack.pop()
+            if node.entries:
+                includes, exclude = self._visit(node.entries, includes, exclude, findings)
+            for child in node.children.values():
+                stack.append((child, includes, exclude))
+        findings.sort(key=lambda f: (f.entry.list_name, f.entry.lineno))
+        return findings
+
+    @staticmethod
+    def _visit(entries: List[Entry], includes: Dict[str, Entry], exclude: Optional[Entry],
+               findings: List[Finding]) -> Tuple[Dict[str, Entry], Optional[Entry]]:
+        here_exclude = None
+        seen: Dict[Tuple[str, bool], Entry] = {}
+        for entry in sorted(entries, key=lambda e: (e.exact, e.lineno)):
+            key = (entry.list_name, entry.exact)
+            if key in seen:
+                findings.append(Finding("duplicate", entry, seen[key]))
+                continue
+            seen[key] = entry
+            if entry.exclude and here_exclude is None:
+                here_exclude = entry
+
+        child_includes = includes
+        for entry in seen.values():
+            if entry.exclude:
+                continue
+            # Точная запись "^a.b" покрыта обычной "a.b" из того же файла
+            same = seen.get((entry.list_name, False))
+            if here_exclude is not None and (not here_exclude.exact or entry.exact):
+                findings.append(Finding("conflict", entry, here_exclude))
+            elif exclude is not None:
+                findings.append(Finding("shadowed", entry, exclude))
+            elif entry.list_name in includes:
+                findings.append(Finding("redundant", entry, includes[entry.list_name]))
+            elif entry.exact and same is not None:
+                findings.append(Finding("redundant", entry, same))
+            elif includes:
+                findings.append(Finding("overlap", entry, next(iter(includes.values()))))
+            if not entry.exact and entry.list_name not in child_includes:
+                if child_includes is includes:
+                    child_includes = dict(includes)
+                child_includes[entry.list_name] = entry
+
+        if exclude is None and here_exclude is not None and not here_exclude.exact:
+            exclude = here_exclude
+        return child_includes, exclude
+
+    def pruned(self, name: str, findings: Optional[List[Finding]] = None,
+               excludes: Iterable[str] = ()) -> List[str]:
+        """Строки файла без лишних записей; комментарии и порядок сохраняются.
+
+        excludes — списки исключений, которые применяются везде, где применяется name."""
+        if findings is None:
+            findings = self.analyze()
+        excludes = set(excludes)
+        drop: Set[int] = {f.entry.lineno for f in findings
+                          if f.entry.list_name == name and not f.entry.exclude
+                          and (f.kind in PRUNED_KINDS
+                               or f.kind in EXCLUDED_KINDS and f.cause.list_name in excludes)}
+        return [line for lineno, line in enumerate(self.lines[name], 1) if lineno not in drop]
+
+
+def load_lists(lists_dir: Path, includes: Iterable[str] = INCLUDE_LISTS,
+               excludes: Iterable[str] = EXCLUDE_LISTS) -> HostlistTrie:
+    trie = HostlistTrie()
+    for names, exclude in ((includes, False), (excludes, True)):
+        for name in names:
+            path = lists_dir / name
+            if path.exists():
+                trie.add_list(name, path.read_text(encoding="utf-8").splitlines(), exclude=exclude)
+    return trie
+
+
+def shared_excludes(lists_dir: Path, bin_dir: Path) -> Dict[str, Set[str]]:
+    """Для каждого hostlist — списки исключений, которые есть во всех профилях с ним."""
+    from script_parameters import compile_script_parameters, custom_strategy_path
+    from strategy_model import Strategy
+    from strategy_registry import load_registry
+
+    registry = load_registry()
+    variables = registry.resolve_variables({
+        "bin_dir": str(bin_dir), "lists_dir": str(lists_dir), "game_filter": "1024-65535",
+    })
+    sources = [registry.preset_args(name, variables) for name in registry.preset_names()]
+    sources += [registry.render_profiles(profiles, variables)
+                for items in registry.blocks.values() for profiles in items.values()]
+    if custom_strategy_path(str(lists_dir)).exists():
+        try:
+            sources.append(list(compile_script_parameters(False, str(lists_dir), str(bin_dir), "Custom")))
+        except Exception:
+            # Custom стратегию не разобрать: считаем, что исключений в ней нет
+            return {}
+
+    shared: Dict[str, Set[str]] = {}
+    for args in sources:
+        for profile in Strategy.from_argv(list(args)).profiles:
+            excludes = {Path(path).name for path in profile.hostlist_excludes}
+            for path in profile.hostlists:
+                name = Path(path).name
+                shared[name] = shared[name] & excludes if name in shared else excludes
+    return shared
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Поиск лишних записей в hostlist-файлах")
+    parser.add_argument("--lists-dir", type=Path, default=Path(__file__).parent / "lists")
+    parser.add_argument("--include", nargs="+", default=list(INCLUDE_LISTS), help="списки включения")
+    parser.add_argument("--exclude", nargs="*", default=list(EXCLUDE_LISTS), help="списки исключений")
+    parser.add_argument("--write", action="store_true", help="перезаписать списки включения без лишних записей")
+    args = parser.parse_args(argv)
+
+    trie = load_lists(args.lists_dir, args.include, args.exclude)
+    findings = trie.analyze()
+    for entry in trie.invalid:
+        print(f"invalid: {entry}")
+    for finding in findings:
+        print(finding)
+
+    shared = shared_excludes(args.lists_dir, Path(__file__).parent / "bin")
+    store = BackupStore.for_lists(args.lists_dir)
+    for name in args.include:
+        if name not in trie.lines:
+            continue
+        lines = trie.pruned(name, findings, shared.get(name, ()))
+        removed = len(trie.lines[name]) - len(lines)
+        print(f"{name}: можно удалить {removed} строк")
+        if args.write and removed:
+            path = args.lists_dir / name
+            store.backup(path)
+            atomic_write(path, "".join(line + "\n" for line in lines))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+from PySide6.QtCore import QThread, Signal
+
+from list_importer import import_sources
+
+
+class ListImportThread(QThread):
+    result = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, sources, lists_dir, hostlist, ipset):
+        super().__init__()
+        self.sources = list(sources)
+        self.lists_dir = lists_dir
+        self.hostlist = hostlist
+        self.ipset = ipset
+
+    def run(self):
+        try:
+            self.result.emit(import_sources(self.sources, self.lists_dir, self.hostlist, self.ipset))
+        except Exception as e:
+            self.failed.emit(str(e))
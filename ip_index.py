@@ -0,0 +1,280 @@
+"""Быстрая проверка принадлежности адресов ipset-файлу.
+
+Подсети хранятся отсортированными интервалами [start, end]. IPv4 — массивы uint32,
+IPv6 — списки чисел (их в списках мало). Рядом с ipset-файлом сохраняется
+бинарный индекс <файл>.idx: при следующем запуске он отображается в память через mmap
+без разбора текста. Если установлен NumPy, пакетные запросы идут через searchsorted.
+
+    python ip_index.py lists/ipset-all.txt.backup 1.1.1.1 8.8.8.8
+    python ip_index.py --preset General --input connections.log
+"""
+import argparse
+import ipaddress
+import mmap
+import re
+import socket
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from ipset_compiler import Interval, parse_prefixes, to_intervals
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b"ZIPX"
+FORMAT = 1
+# magic, формат, размер и mtime исходного файла, число интервалов IPv4 и IPv6
+_HEADER = struct.Struct("<4sIqqII")
+_V6 = struct.Struct(">QQ")
+
+_IP_RE = re.compile(r"(?<![\w.:])(?:\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F]*:[0-9a-fA-F:]+(?:\.\d{1,3}(?:\.\d{1,3}){3})?)(?![\w.:])")
+
+
+def parse_address(address) -> Tuple[int, int]:
+    """(версия, число) для строки или объекта адреса; inet_pton заметно быстрее ipaddress на миллионах строк."""
+    if isinstance(address, str):
+        try:
+            if ":" in address:
+                return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, address), "big")
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+        except OSError:
+            pass
+    address = ipaddress.ip_address(address)
+    return address.version, int(address)
+
+
+def _uint32_array(values: Iterable[int]) -> array:
+    result = array("I", values)
+    if result.itemsize != 4:
+        result = array("L", result)
+    return result
+
+
+class IpIndex:
+    __slots__ = ("starts4", "ends4", "starts6", "ends6", "_mmap")
+
+    def __init__(self, v4: Sequence[Interval] = (), v6: Sequence[Interval] = ()):
+        self.starts4: Sequence[int] = _uint32_array(lo for lo, _hi in v4)
+        self.ends4: Sequence[int] = _uint32_array(hi for _lo, hi in v4)
+        self.starts6: List[int] = [lo for lo, _hi in v6]
+        self.ends6: List[int] = [hi for _lo, hi in v6]
+        self._mmap: Optional[mmap.mmap] = None
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "IpIndex":
+        networks, _invalid = parse_prefixes(lines)
+        return cls(to_intervals(networks, 4), to_intervals(networks, 6))
+
+    @classmethod
+    def from_file(cls, path: Path) -> "IpIndex":
+        return cls.from_lines(Path(path).read_text(encoding="utf-8").splitlines())
+
+    def __len__(self) -> int:
+        return len(self.starts4) + len(self.starts6)
+
+    def close(self):
+        if self._mmap is not None:
+            self.starts4 = self.ends4 = _uint32_array(())
+            self._mmap.close()
+            self._mmap = None
+
+    # --- запросы ---
+
+    def find(self, address) -> Optional[Interval]:
+        """Интервал, покрывающий адрес, или None."""
+        version, value = parse_address(address)
+        starts, ends = (self.starts4, self.ends4) if version == 4 else (self.starts6, self.ends6)
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return starts[i], ends[i]
+        return None
+
+    def __contains__(self, address) -> bool:
+        return self.find(address) is not None
+
+    def find_many(self, addresses: Iterable) -> List[Optional[Interval]]:
+        """Пакетный поиск: с NumPy — один searchsorted на весь IPv4-пакет, без него — bisect по каждому адресу."""
+        parsed = [parse_address(a) for a in addresses]
+        result: List[Optional[Interval]] = [None] * len(parsed)
+        for version, starts, ends in ((4, self.starts4, self.ends4), (6, self.starts6, self.ends6)):
+            positions = [i for i, (v, _value) in enumerate(parsed) if v == version]
+            if not positions or not len(starts):
+                continue
+            values = [parsed[i][1] for i in positions]
+            for pos, hit in zip(positions, self._batch(version, starts, ends, values)):
+                if hit >= 0:
+                    result[pos] = (int(starts[hit]), int(ends[hit]))
+        return result
+
+    @staticmethod
+    def _batch(version: int, starts, ends, values: List[int]) -> List[int]:
+        if numpy is not None and version == 4:
+            keys = numpy.asarray(values, dtype=numpy.uint32)
+            np_starts = numpy.frombuffer(starts, dtype=numpy.uint32)
+            np_ends = numpy.frombuffer(ends, dtype=numpy.uint32)
+            idx = numpy.searchsorted(np_starts, keys, side="right") - 1
+            safe = numpy.maximum(idx, 0)
+            hit = (idx >= 0) & (keys <= np_ends[safe])
+            return numpy.where(hit, idx, -1).tolist()
+
+        hits = []
+        for value in values:
+            i = bisect_right(starts, value) - 1
+            hits.append(i if i >= 0 and value <= ends[i] else -1)
+        return hits
+
+    def network_of(self, interval: Interval, address) -> str:
+        """Подсеть из исходных интервалов, в которую попал адрес (для отчёта)."""
+        address = ipaddress.ip_address(address)
+        lo, hi = interval
+        cls = type(address)
+        for network in ipaddress.summarize_address_range(cls(lo), cls(hi)):
+            if address in network:
+                return str(network)
+        return f"{cls(lo)}-{cls(hi)}"
+
+    # --- бинарный индекс ---
+
+    def save(self, path: Path, source_size: int, source_mtime: int):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT, source_size, source_mtime, len(self.starts4), len(self.starts6)))
+            starts4, ends4 = _uint32_array(self.starts4), _uint32_array(self.ends4)
+            if sys.byteorder != "little":
+                starts4.byteswap()
+                ends4.byteswap()
+            f.write(starts4.tobytes())
+            f.write(ends4.tobytes())
+            for lo, hi in zip(self.starts6, self.ends6):
+                f.write(_V6.pack(lo >> 64, lo & (2 ** 64 - 1)))
+                f.write(_V6.pack(hi >> 64, hi & (2 ** 64 - 1)))
+
+    @classmethod
+    def open_sidecar(cls, path: Path, source_size: int, source_mtime: int) -> Optional["IpIndex"]:
+        """Отображает индекс в память; None, если файла нет или он устарел."""
+        try:
+            with open(path, "rb") as f:
+                if Path(path).stat().st_size < _HEADER.size:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        magic, fmt, size, mtime, count4, count6 = _HEADER.unpack_from(mapped)
+        expected = _HEADER.size + 8 * count4 + 32 * count6
+        if (magic, fmt, size, mtime) != (MAGIC, FORMAT, source_size, source_mtime) or len(mapped) != expected \
+                or sys.byteorder != "little":
+            mapped.close()
+            return None
+
+        index = cls()
+        view = memoryview(mapped)
+        offset = _HEADER.size
+        # Массивы IPv4 не копируются: bisect работает прямо по памяти файла
+        index.starts4 = view[offset:offset + 4 * count4].cast("I")
+        index.ends4 = view[offset + 4 * count4:offset + 8 * count4].cast("I")
+        offset += 8 * count4
+        for i in range(count6):
+            hi_lo = _V6.unpack_from(mapped, offset + 32 * i)
+            hi_hi = _V6.unpack_from(mapped, offset + 32 * i + 16)
+            index.starts6.append((hi_lo[0] << 64) | hi_lo[1])
+            index.ends6.append((hi_hi[0] << 64) | hi_hi[1])
+        index._mmap = mapped
+        return index
+
+
+def sidecar_path(path: Path) -> Path:
+    return Path(str(path) + ".idx")
+
+
+def load_index(path: Path) -> IpIndex:
+    """Индекс ipset-файла: из свежего .idx через mmap, иначе разбор текста и пересборка .idx."""
+    path = Path(path)
+    stat = path.stat()
+    index = IpIndex.open_sidecar(sidecar_path(path), stat.st_size, stat.st_mtime_ns)
+    if index is not None:
+        return index
+    index = IpIndex.from_file(path)
+    try:
+        index.save(sidecar_path(path), stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        pass
+    return index
+
+
+def extract_addresses(lines: Iterable[str]) -> List[str]:
+    """Адреса из строк лога соединений или списка адресов, по одному на каждое вхождение."""
+    found = []
+    for line in lines:
+        for match in _IP_RE.findall(line):
+            try:
+                found.append(str(ipaddress.ip_address(match)))
+            except ValueError:
+                continue
+    return found
+
+
+def preset_ipsets(mode: str, lists_dir: str, bin_dir: str) -> List[Path]:
+    from script_parameters import compile_script_parameters
+    from strategy_model import Strategy
+
+    strategy = Strategy.from_argv(list(compile_script_parameters(True, lists_dir, bin_dir, mode)))
+    paths: List[Path] = []
+    for profile in strategy.profiles:
+        for item in profile.ipsets + profile.ipset_excludes:
+            if Path(item) not in paths:
+                paths.append(Path(item))
+    return paths
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    root = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Поиск адресов в ipset-файлах")
+    parser.add_argument("items", nargs="*", help="ipset-файлы (если не задан --preset), затем адреса")
+    parser.add_argument("--preset", help="взять ipset-файлы из пресета или Custom")
+    parser.add_argument("--input", type=Path, help="файл с адресами или лог соединений")
+    parser.add_argument("--lists-dir", default=str(root / "lists"))
+    args = parser.parse_args(argv)
+
+    if args.preset:
+        sources = preset_ipsets(args.preset, args.lists_dir, str(root / "bin"))
+        addresses = list(args.items)
+    else:
+        sources = [Path(item) for item in args.items if Path(item).is_file()]
+        addresses = [item for item in args.items if not Path(item).is_file()]
+    if args.input:
+        try:
+            addresses.extend(extract_addresses(args.input.read_text(encoding="utf-8", errors="replace").splitlines()))
+        except OSError as e:
+            parser.error(f"не удалось прочитать {args.input}: {e}")
+    for item in args.items if args.preset else addresses:
+        try:
+            parse_address(item)
+        except ValueError:
+            # Опечатка в пути к файлу иначе выглядит как некорректный адрес
+            parser.error(f"{item}: не файл и не IP-адрес")
+    if not sources:
+        parser.error("не указаны ipset-файлы")
+
+    for source in sources:
+        try:
+            index = load_index(source)
+        except OSError as e:
+            print(f"{source}: {e}", file=sys.stderr)
+            continue
+        hits = index.find_many(addresses)
+        matched = sum(hit is not None for hit in hits)
+        print(f"{source}: {len(index)} интервалов, совпало {matched} из {len(addresses)}")
+        if len(addresses) <= 100:
+            for address, hit in zip(addresses, hits):
+                print(f"  {address}: {index.network_of(hit, address) if hit else '-'}")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
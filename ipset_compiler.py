@@ -0,0 +1,181 @@
+"""Сжатие ipset-файлов: дубли убираются, соседние и вложенные подсети схлопываются,
+подсети из ipset-exclude.txt вычитаются.
+
+    python ipset_compiler.py lists/ipset-all.txt.backup --exclude lists/ipset-exclude.txt -o lists/ipset-all.txt
+"""
+import argparse
+import ipaddress
+import socket
+import sys
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from wf_filter import Network
+
+Interval = Tuple[int, int]
+
+_ADDRESS = {4: ipaddress.IPv4Address, 6: ipaddress.IPv6Address}
+
+
+class CompileStats(NamedTuple):
+    lines: int
+    invalid: int
+    duplicates: int
+    prefixes_in: int
+    prefixes_out: int
+    # Только IPv4: в IPv6 числа адресов астрономические и ничего не говорят
+    addresses_in: int
+    addresses_out: int
+
+    def report(self) -> str:
+        saved = self.prefixes_in - self.prefixes_out
+        percent = saved * 100 / self.prefixes_in if self.prefixes_in else 0
+        return (f"Подсетей: {self.prefixes_in} -> {self.prefixes_out} (-{saved}, {percent:.1f}%), "
+                f"дублей: {self.duplicates}, некорректных строк: {self.invalid}, "
+                f"IPv4-адресов: {self.addresses_in} -> {self.addresses_out}")
+
+
+class CompileResult(NamedTuple):
+    networks: List[Network]
+    stats: CompileStats
+    invalid_lines: List[Tuple[int, str]]
+
+
+def parse_prefixes(lines: Iterable[str]) -> Tuple[List[Network], List[Tuple[int, str]]]:
+    """Подсети из строк ipset-файла и список некорректных строк (номер, текст)."""
+    networks = []
+    invalid = []
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(line, strict=False))
+        except ValueError:
+            invalid.append((lineno, raw.rstrip("\n")))
+    return networks, invalid
+
+
+def to_intervals(networks: Iterable[Network], version: int) -> List[Interval]:
+    """Отсортированные непересекающиеся интервалы адресов одного семейства; соседние склеены."""
+    return merge_intervals((int(n.network_address), int(n.broadcast_address))
+                           for n in networks if n.version == version)
+
+
+def prefix_interval(text: str) -> Tuple[int, int, int]:
+    """(версия, первый, последний адрес) подсети "адрес[/длина]" без объектов ipaddress —
+    на миллионах строк это заметно быстрее. ValueError для некорректной записи."""
+    address, _, length = text.partition("/")
+    family, version, bits = (socket.AF_INET6, 6, 128) if ":" in address else (socket.AF_INET, 4, 32)
+    try:
+        value = int.from_bytes(socket.inet_pton(family, address), "big")
+    except OSError:
+        raise ValueError(f"некорректный адрес: {address}") from None
+    length = int(length) if length else bits
+    if not 0 <= length <= bits:
+        raise ValueError(f"некорректная длина префикса: {text}")
+    size = 1 << (bits - length)
+    lo = value & ~(size - 1)
+    return version, lo, lo + size - 1
+
+
+def merge_intervals(spans: Iterable[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for lo, hi in sorted(spans):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def subtract(intervals: List[Interval], excludes: List[Interval]) -> List[Interval]:
+    # Оба списка отсортированы и не пересекаются внутри себя — хватает одного прохода
+    result = []
+    j = 0
+    for lo, hi in intervals:
+        while j < len(excludes) and excludes[j][1] < lo:
+            j += 1
+        k = j
+        while lo <= hi and k < len(excludes) and excludes[k][0] <= hi:
+            ex_lo, ex_hi = excludes[k]
+            if ex_lo > lo:
+                result.append((lo, ex_lo - 1))
+            lo = max(lo, ex_hi + 1)
+            k += 1
+        if lo <= hi:
+            result.append((lo, hi))
+    return result
+
+
+def from_intervals(intervals: Iterable[Interval], version: int) -> List[Network]:
+    address = _ADDRESS[version]
+    networks = []
+    for lo, hi in intervals:
+        networks.extend(ipaddress.summarize_address_range(address(lo), address(hi)))
+    return networks
+
+
+def compile_ipset(lines: Iterable[str], excludes: Iterable[Network] = ()) -> CompileResult:
+    lines = list(lines)
+    networks, invalid = parse_prefixes(lines)
+    excludes = list(excludes)
+    duplicates = len(networks) - len(set(networks))
+
+    output: List[Network] = []
+    addresses_in = addresses_out = 0
+    for version in (4, 6):
+        intervals = to_intervals(networks, version)
+        if version == 4:
+            addresses_in = sum(hi - lo + 1 for lo, hi in intervals)
+        intervals = subtract(intervals, to_intervals(excludes, version))
+        if version == 4:
+            addresses_out = sum(hi - lo + 1 for lo, hi in intervals)
+        output.extend(from_intervals(intervals, version))
+
+    stats = CompileStats(
+        lines=len(lines),
+        invalid=len(invalid),
+        duplicates=duplicates,
+        prefixes_in=len(networks),
+        prefixes_out=len(output),
+        addresses_in=addresses_in,
+        addresses_out=addresses_out,
+    )
+    return CompileResult(output, stats, invalid)
+
+
+def format_ipset(networks: Iterable[Network]) -> str:
+    return "".join(f"{network}\n" for network in networks)
+
+
+def compile_file(source: Path, exclude: Optional[Path] = None) -> CompileResult:
+    excludes: List[Network] = []
+    if exclude is not None and exclude.exists():
+        excludes, _invalid = parse_prefixes(exclude.read_text(encoding="utf-8").splitlines())
+    return compile_ipset(source.read_text(encoding="utf-8").splitlines(), excludes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Сжатие ipset-файла для winws")
+    parser.add_argument("source", type=Path, help="исходный ipset-файл")
+    parser.add_argument("--exclude", type=Path, help="подсети, которые нужно вычесть (ipset-exclude.txt)")
+    parser.add_argument("-o", "--output", type=Path, help="куда записать результат; без него только отчёт")
+    args = parser.parse_args(argv)
+
+    try:
+        result = compile_file(args.source, args.exclude)
+    except OSError as e:
+        print(f"Не удалось прочитать файл: {e}", file=sys.stderr)
+        return 2
+    for lineno, text in result.invalid_lines[:20]:
+        print(f"{args.source}:{lineno}: некорректная подсеть: {text}", file=sys.stderr)
+    if args.output:
+        args.output.write_text(format_ipset(result.networks), encoding="utf-8")
+    print(result.stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
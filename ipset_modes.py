@@ -0,0 +1,89 @@
+"""Режимы ipset для пресетов, которые ссылаются на ipset-all.txt.
+
+  none — ipset-all.txt как есть: по умолчанию в нём одна адрес-заглушка, то есть
+         профили с --ipset не срабатывают ни для каких адресов (плюс добавленные вручную);
+  full — вдобавок полный набор подсетей из ipset-all.txt.backup;
+  any  — пустой ipset: winws считает, что под него подходит любой адрес.
+
+В режимах none и full к ipset-all.txt добавляется ipset-asn.txt, если он собран
+из баз ASN (asn_ipset).
+
+Файлы не переписываются и не переименовываются: меняется только путь в аргументах
+winws. Полный набор собирается в фоне заранее (list_artifacts), так что переключение
+режима ничего не пересчитывает.
+"""
+from pathlib import Path
+from typing import Iterable, List
+
+from asn_ipset import generated_ipset
+from atomic_write import atomic_write
+from strategy_model import split_option
+
+IPSET_NONE = "none"
+IPSET_FULL = "full"
+IPSET_ANY = "any"
+IPSET_MODES = (IPSET_NONE, IPSET_FULL, IPSET_ANY)
+DEFAULT_IPSET_MODE = IPSET_NONE
+
+MODE_LABELS = {
+    IPSET_NONE: "выкл",
+    IPSET_FULL: "полный",
+    IPSET_ANY: "любой IP",
+}
+
+MODE_DESCRIPTIONS = {
+    IPSET_NONE: "ipset-all.txt как есть (по умолчанию — только заглушка, профили по IP не срабатывают)",
+    IPSET_FULL: "ipset-all.txt и полный набор подсетей из ipset-all.txt.backup",
+    IPSET_ANY: "пустой ipset: профили с --ipset срабатывают для любого IP",
+}
+
+IPSET_FILE = "ipset-all.txt"
+FULL_SOURCE = "ipset-all.txt.backup"
+ANY_FILE = "ipset-any.txt"
+
+
+def normalize_mode(mode) -> str:
+    return mode if mode in IPSET_MODES else DEFAULT_IPSET_MODE
+
+
+def next_mode(mode: str) -> str:
+    return IPSET_MODES[(IPSET_MODES.index(normalize_mode(mode)) + 1) % len(IPSET_MODES)]
+
+
+def full_source(lists_dir: Path) -> Path:
+    return Path(lists_dir) / FULL_SOURCE
+
+
+def any_path(lists_dir: Path) -> Path:
+    path = Path(lists_dir) / ".cache" / ANY_FILE
+    if not path.exists() or path.stat().st_size:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, "")
+    return path
+
+
+def variant_sources(lists_dir: Path) -> List[Path]:
+    """Файлы, которые нужно держать скомпилированными для быстрого переключения."""
+    source = full_source(lists_dir)
+    return [source] if source.exists() else []
+
+
+def apply_ipset_mode(args: Iterable[str], lists_dir: str, mode: str) -> List[str]:
+    mode = normalize_mode(mode)
+    target = Path(lists_dir) / IPSET_FILE
+    generated = generated_ipset(Path(lists_dir))
+    out = []
+    for arg in args:
+        name, value = split_option(arg)
+        if name != "--ipset" or not value or Path(value) != target:
+            out.append(arg)
+        elif mode == IPSET_ANY:
+            out.append(f"--ipset={any_path(Path(lists_dir))}")
+        else:
+            # Несколько --ipset в одном профиле объединяются
+            out.append(arg)
+            if mode == IPSET_FULL and full_source(lists_dir).exists():
+                out.append(f"--ipset={full_source(lists_dir)}")
+            if generated is not None:
+                out.append(f"--ipset={generated}")
+    return out
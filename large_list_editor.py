@@ -0,0 +1,265 @@
+from pathlib import Path
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListView,
+    QPushButton, QMessageBox, QSizePolicy, QAbstractItemView
+)
+from PySide6.QtGui import QFont, QColor, QPalette
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from effects import apply_mica_effect, apply_mica_visual, apply_mica_to_dialog
+from list_editor import BUTTON_STYLE_DARK, DIALOG_STYLE, ListEditorDialog, is_network, line_error
+from mapped_lines import MappedLineFile
+from backup_store import BackupStore
+
+# Файлы больше этого размера открываются в построчном редакторе, а не в QTextEdit
+LARGE_FILE_BYTES = 256 * 1024
+
+
+class LineListModel(QAbstractListModel):
+    """Модель поверх MappedLineFile: представление запрашивает только видимые строки."""
+
+    def __init__(self, lines: MappedLineFile, validator=None, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+        self.validator = validator
+        self.invalid_brush = QColor(220, 38, 38, 80)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.lines[index.row()]
+        if role == Qt.BackgroundRole and self.validator is not None:
+            line = self.lines[index.row()].strip()
+            if line and not self.validator(line):
+                return self.invalid_brush
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        self.lines.set_line(index.row(), str(value))
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole, Qt.BackgroundRole])
+        return True
+
+    def insert_line(self, row: int, text: str = ""):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.lines.insert_lines(row, [text])
+        self.endInsertRows()
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row + count > len(self.lines):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        self.lines.remove_lines(row, count)
+        self.endRemoveRows()
+        return True
+
+    def reload(self):
+        self.beginResetModel()
+        self.lines.open()
+        self.endResetModel()
+
+    def save(self):
+        self.beginResetModel()
+        try:
+            self.lines.save()
+        finally:
+            self.endResetModel()
+
+    def next_invalid(self, start: int) -> int:
+        if self.validator is None:
+            return -1
+        total = len(self.lines)
+        for offset in range(1, total + 1):
+            row = (start + offset) % total
+            line = self.lines[row].strip()
+            if line and not self.validator(line):
+                return row
+        return -1
+
+
+class LargeListEditorDialog(QDialog):
+    """Редактор больших списков: файл не читается целиком, правки хранятся поверх него до сохранения."""
+
+    def __init__(self, lists_dir: str, filename: str, validator=None, parent=None,
+                 documents=None, embedded: bool = False):
+        super().__init__(parent)
+        self.lists_dir = Path(lists_dir)
+        self.filename = filename
+        self.filepath = self.lists_dir / filename
+        self.documents = documents
+        self.embedded = embedded
+        self.setWindowTitle(f"Редактор списков — {filename}")
+        self.setMinimumSize(650, 500)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAutoFillBackground(False)
+
+        pal = self.palette()
+        pal.setColor(QPalette.Window, QColor(0, 0, 0, 0))
+        self.setPalette(pal)
+
+        self.setStyleSheet(DIALOG_STYLE + "QListView { background-color: rgba(30, 35, 55, 0.85); color: #F3F4F6; }")
+        if embedded:
+            self.setWindowFlags(Qt.Widget)
+        else:
+            self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
+        self.font_default = QFont("Segoe UI", 11)
+
+        layout = QVBoxLayout(self)
+        if embedded:
+            layout.setContentsMargins(0, 0, 0, 0)
+        self.info = QLabel()
+        self.info.setFont(self.font_default)
+        layout.addWidget(self.info)
+
+        self.model = LineListModel(MappedLineFile(self.filepath), validator, self)
+        self.view = QListView()
+        self.view.setFont(self.font_default)
+        # Одинаковая высота строк: представлению не нужно измерять каждую строку
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.add_btn = QPushButton("Добавить")
+        self.remove_btn = QPushButton("Удалить")
+        self.next_error_btn = QPushButton("След. ошибка")
+        self.save_btn = QPushButton("Сохранить")
+        self.reload_btn = QPushButton("Перезагрузить")
+        for b in (self.add_btn, self.remove_btn, self.next_error_btn, self.save_btn, self.reload_btn):
+            b.setStyleSheet(BUTTON_STYLE_DARK)
+            b.setMinimumHeight(38)
+            b.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+            b.setFont(self.font_default)
+            b.setCursor(Qt.PointingHandCursor)
+            btn_layout.addWidget(b)
+            apply_mica_visual(b, alt=True)
+        layout.addLayout(btn_layout)
+
+        self.add_btn.clicked.connect(self.add_line)
+        self.remove_btn.clicked.connect(self.remove_selected)
+        self.next_error_btn.clicked.connect(self.jump_to_next_error)
+        self.save_btn.clicked.connect(self.save_file)
+        self.reload_btn.clicked.connect(self.reload_file)
+        self.model.rowsInserted.connect(self.update_info)
+        self.model.rowsRemoved.connect(self.update_info)
+        self.model.modelReset.connect(self.update_info)
+        self.model.dataChanged.connect(self.update_info)
+        self.update_info()
+
+        if not embedded:
+            apply_mica_effect(self)
+        apply_mica_visual(self.view, alt=True)
+
+    def update_info(self, *_):
+        state = " (есть несохранённые изменения)" if self.model.lines.modified else ""
+        self.info.setText(f"Строк: {len(self.model.lines)}{state}. Двойной щелчок — правка строки.")
+
+    def add_line(self):
+        current = self.view.currentIndex()
+        row = current.row() + 1 if current.isValid() else self.model.rowCount()
+        self.model.insert_line(row)
+        index = self.model.index(row)
+        self.view.setCurrentIndex(index)
+        self.view.edit(index)
+
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.view.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.model.removeRows(row, 1)
+
+    def jump_to_next_error(self):
+        current = self.view.currentIndex()
+        row = self.model.next_invalid(current.row() if current.isValid() else -1)
+        if row < 0:
+            self.show_message("Проверка", "Ошибок не найдено.")
+            return
+        self.go_to_line(row)
+
+    def go_to_line(self, row: int):
+        if not 0 <= row < self.model.rowCount():
+            return
+        index = self.model.index(row)
+        self.view.setCurrentIndex(index)
+        self.view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.view.setFocus()
+
+    def has_unsaved_changes(self) -> bool:
+        return self.model.lines.modified
+
+    def release_file(self):
+        # На время замены файла снаружи (импорт): на Windows отображённый файл не заменить.
+        # Редактор выключен, пока reload_file не откроет файл снова
+        self.setEnabled(False)
+        self.model.beginResetModel()
+        self.model.lines.close()
+        self.model.endResetModel()
+
+    def reload_file(self):
+        self.setEnabled(True)
+        try:
+            self.model.reload()
+        except Exception as e:
+            self.show_message("Ошибка", f"Не удалось загрузить файл:\n{e}", error=True)
+
+    def save_file(self):
+        try:
+            if not self.model.lines.modified:
+                self.show_message("Сохранено", "Изменений нет, файл не перезаписан.")
+                return
+            BackupStore.for_lists(self.lists_dir).backup(self.filepath)
+            self.model.save()
+            if self.documents is not None:
+                self.documents.invalidate(self.filename)
+            self.show_message("Сохранено", "Файл успешно сохранён.")
+        except Exception as e:
+            self.show_message("Ошибка", f"Не удалось сохранить файл:\n{e}", error=True)
+
+    def closeEvent(self, event):
+        self.model.lines.close()
+        super().closeEvent(event)
+
+    def done(self, result):
+        self.model.lines.close()
+        super().done(result)
+
+    def show_message(self, title: str, text: str, error=False):
+        box = QMessageBox(self)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setIcon(QMessageBox.Critical if error else QMessageBox.Information)
+        apply_mica_to_dialog(box, alt=None if error else False)
+        box.exec()
+
+
+LARGE_VALIDATORS = {
+    "domains": lambda line: line_error(line, "domains") is None,
+    "ipset": is_network,
+}
+
+
+def create_list_editor(lists_dir: str, filename: str = "list-general.txt", editor_type: str = "domains",
+                       parent=None, **kwargs) -> QDialog:
+    """Большие списки открываются в построчном редакторе, остальное — в обычном."""
+    path = Path(lists_dir) / filename
+    try:
+        large = editor_type in LARGE_VALIDATORS and path.stat().st_size > LARGE_FILE_BYTES
+    except OSError:
+        large = False
+    if large:
+        return LargeListEditorDialog(lists_dir, filename, validator=LARGE_VALIDATORS[editor_type],
+                                     parent=parent, **kwargs)
+    return ListEditorDialog(lists_dir, filename=filename, editor_type=editor_type, parent=parent, **kwargs)
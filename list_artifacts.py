@@ -0,0 +1,199 @@
+"""Скомпилированные копии списков, которые получает winws.
+
+Исходные lists/*.txt остаются как есть — с комментариями, дублями и мусором, — а
+для winws собираются очищенные копии: домены нормализованы, без дублей и без
+поддоменов, уже покрытых родительским доменом; подсети слиты и отсортированы.
+Сборка идёт в фоне при изменении списков (вместе с проверкой в health_worker),
+а не при подключении.
+
+Копия лежит в lists/.cache/compiled, её имя содержит хэш содержимого исходника,
+поэтому одинаковое содержимое собирается один раз. manifest.json помнит размер и
+mtime исходника на момент сборки: если файл изменился, а пересобрать его ещё не
+успели, winws получает исходный файл.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from atomic_write import atomic_write
+from domain_normalizer import DOMAIN, normalize_entry
+from ipset_compiler import compile_ipset, format_ipset
+from list_health import HOSTLIST, IPSET, list_kind
+from strategy_model import split_option
+
+# Увеличивать при изменении правил сборки: старые копии соберутся заново
+ARTIFACT_FORMAT = 1
+ARTIFACT_DIR = "compiled"
+MANIFEST_NAME = "manifest.json"
+
+# Опции, значение которых — путь к файлу списка, и тип списка
+LIST_FILE_OPTIONS = {
+    "--hostlist": HOSTLIST,
+    "--hostlist-exclude": HOSTLIST,
+    "--ipset": IPSET,
+    "--ipset-exclude": IPSET,
+}
+
+
+class Artifact(NamedTuple):
+    source: str
+    size: int
+    mtime: int
+    sha256: str
+    artifact: str
+    entries: int
+
+
+def _reversed_labels(domain: str):
+    return domain.lstrip("^").split(".")[::-1]
+
+
+def compile_hostlist(lines: Iterable[str]) -> List[str]:
+    """Домены без дублей и без поддоменов, покрытых родителем; родитель идёт перед поддоменами."""
+    domains = set()
+    for line in lines:
+        parsed = normalize_entry(line)
+        if parsed is not None and parsed[0] == DOMAIN:
+            domains.add(parsed[1])
+    covering = set()
+    out = []
+    for domain in sorted(domains, key=_reversed_labels):
+        exact = domain.startswith("^")
+        name = domain[1:] if exact else domain
+        # ^domain совпадает только с самим доменом: покрывает его и обычная запись
+        if exact and name in domains:
+            continue
+        labels = name.split(".")
+        if any(".".join(labels[i:]) in covering for i in range(1, len(labels))):
+            continue
+        if not exact:
+            covering.add(name)
+        out.append(domain)
+    return out
+
+
+def compile_ipset_lines(lines: Iterable[str]) -> List[str]:
+    return format_ipset(compile_ipset(lines).networks).splitlines()
+
+
+def compile_text(kind: str, text: str) -> str:
+    lines = text.splitlines()
+    out = compile_hostlist(lines) if kind == HOSTLIST else compile_ipset_lines(lines)
+    return "".join(line + "\n" for line in out)
+
+
+class ArtifactCache:
+    def __init__(self, lists_dir: Path):
+        self.lists_dir = Path(lists_dir)
+        self.root = self.lists_dir / ".cache" / ARTIFACT_DIR
+        self._manifest: Optional[Dict[str, Artifact]] = None
+        self.built = 0
+
+    @property
+    def manifest(self) -> Dict[str, Artifact]:
+        if self._manifest is None:
+            self._manifest = {}
+            try:
+                data = json.loads((self.root / MANIFEST_NAME).read_text(encoding="utf-8"))
+                if data.get("format") == ARTIFACT_FORMAT:
+                    self._manifest = {key: Artifact(*item) for key, item in data.get("files", {}).items()}
+            except (OSError, ValueError, TypeError):
+                pass
+        return self._manifest
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {"format": ARTIFACT_FORMAT, "files": {key: list(item) for key, item in self.manifest.items()}}
+        atomic_write(self.root / MANIFEST_NAME, json.dumps(data, ensure_ascii=False, indent=1))
+
+    def lookup(self, source: Path) -> Optional[Path]:
+        """Путь к свежей копии или None, если копии нет или исходник с тех пор изменился."""
+        entry = self.manifest.get(str(source))
+        if entry is None:
+            return None
+        try:
+            stat = Path(source).stat()
+        except OSError:
+            return None
+        if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime:
+            return None
+        artifact = self.root / entry.artifact
+        return artifact if artifact.exists() else None
+
+    def build(self, source: Path, kind: Optional[str] = None) -> Optional[Artifact]:
+        source = Path(source)
+        kind = kind or list_kind(source.name)
+        if kind is None or not source.exists():
+            return None
+        if self.lookup(source) is not None:
+            return self.manifest[str(source)]
+
+        stat = source.stat()
+        data = source.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        # В ключ входят тип списка и версия правил: тот же файл как hostlist и как ipset — разные копии
+        key = hashlib.sha256(f"{ARTIFACT_FORMAT}:{kind}:{digest}".encode("ascii")).hexdigest()
+        name = f"{source.stem}-{key[:16]}.txt"
+        artifact = self.root / name
+        if artifact.exists():
+            entries = self._count(artifact)
+        else:
+            text = compile_text(kind, data.decode("utf-8", errors="replace"))
+            self.root.mkdir(parents=True, exist_ok=True)
+            atomic_write(artifact, text)
+            entries = text.count("\n")
+            self.built += 1
+        entry = Artifact(str(source), stat.st_size, stat.st_mtime_ns, digest, name, entries)
+        self.manifest[str(source)] = entry
+        return entry
+
+    @staticmethod
+    def _count(path: Path) -> int:
+        with open(path, "rb") as f:
+            return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+
+    def build_all(self, sources: Iterable[Path], pinned: Iterable[str] = ()) -> List[Artifact]:
+        built = [entry for entry in (self.build(source) for source in sources) if entry is not None]
+        self.prune(pinned)
+        self._save_manifest()
+        return built
+
+    def prune(self, pinned: Iterable[str] = ()):
+        """Убирает копии удалённых исходников и старые версии копий. pinned — имена копий,
+        с которыми запущен winws: они остаются до отключения, даже если устарели."""
+        for key in [key for key in self.manifest if not Path(key).exists()]:
+            del self.manifest[key]
+        if not self.root.exists():
+            return
+        used = {entry.artifact for entry in self.manifest.values()} | {MANIFEST_NAME} | set(pinned)
+        for path in self.root.iterdir():
+            if path.name not in used:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+def used_artifacts(args: Iterable[str], lists_dir: Path) -> Set[str]:
+    """Имена копий из lists/.cache/compiled, на которые ссылаются аргументы winws."""
+    root = Path(lists_dir) / ".cache" / ARTIFACT_DIR
+    names = set()
+    for arg in args:
+        name, value = split_option(arg)
+        if name in LIST_FILE_OPTIONS and value and Path(value).parent == root:
+            names.add(Path(value).name)
+    return names
+
+
+def rewrite_args(args: Iterable[str], cache: ArtifactCache) -> List[str]:
+    """Подменяет пути к спискам на свежие скомпилированные копии; устаревшие остаются исходными."""
+    out = []
+    for arg in args:
+        name, value = split_option(arg)
+        if name in LIST_FILE_OPTIONS and value:
+            artifact = cache.lookup(Path(value))
+            if artifact is not None:
+                arg = f"{name}={artifact}"
+        out.append(arg)
+    return out
@@ -0,0 +1,108 @@
+"""Кэш содержимого файлов из lists/ для окна списков.
+
+Документ читается с диска один раз и живёт в памяти между открытиями окна.
+Перед выдачей сверяются размер и mtime файла, поэтому изменения на диске
+(другой программой, восстановлением из резервной копии) подхватываются сами.
+Поиск по всем спискам идёт по этим же документам, без повторного чтения файлов.
+
+Отдельного индекса для поиска нет: ищется подстрока, а не домен целиком, и индекс
+под это (триграммы) строится дольше, чем идут десятки запросов. Проход по строкам,
+приведённым к нижнему регистру и закэшированным вместе с документом, занимает
+порядка 20 мс на 100 тысяч строк.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from list_health import HOSTLIST, IPSET, is_list_file, list_kind
+
+
+class Match(NamedTuple):
+    file: str
+    row: int
+    text: str
+
+
+class Document:
+    __slots__ = ("name", "size", "mtime", "text", "_folded")
+
+    def __init__(self, name: str, size: int, mtime: int, text: str):
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.text = text
+        self._folded: Optional[List[str]] = None
+
+    @property
+    def folded(self) -> List[str]:
+        # Строки в нижнем регистре строятся при первом поиске и живут вместе с документом
+        if self._folded is None:
+            self._folded = self.text.lower().split("\n")
+        return self._folded
+
+    def find(self, needle: str, limit: int) -> List[Match]:
+        matches = []
+        lines = None
+        for row, line in enumerate(self.folded):
+            if needle in line:
+                if lines is None:
+                    lines = self.text.split("\n")
+                matches.append(Match(self.name, row, lines[row]))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+class DocumentCache:
+    def __init__(self, lists_dir: Path):
+        self.lists_dir = Path(lists_dir)
+        self._docs: Dict[str, Document] = {}
+
+    def names(self) -> List[str]:
+        """Файлы списков: сначала hostlist, потом ipset, внутри — по имени."""
+        if not self.lists_dir.exists():
+            return []
+        order = {HOSTLIST: 0, IPSET: 1}
+        names = [p.name for p in self.lists_dir.iterdir() if is_list_file(p)]
+        return sorted(names, key=lambda name: (order[list_kind(name)], name))
+
+    def get(self, name: str) -> Document:
+        path = self.lists_dir / name
+        stat = path.stat()
+        doc = self._docs.get(name)
+        if doc is not None and doc.size == stat.st_size and doc.mtime == stat.st_mtime_ns:
+            return doc
+        text = path.read_bytes().decode("utf-8", errors="replace").replace("\r\n", "\n")
+        doc = Document(name, stat.st_size, stat.st_mtime_ns, text)
+        self._docs[name] = doc
+        return doc
+
+    def store(self, name: str, text: str):
+        """Запоминает только что сохранённое содержимое, чтобы не перечитывать файл."""
+        stat = (self.lists_dir / name).stat()
+        self._docs[name] = Document(name, stat.st_size, stat.st_mtime_ns, text)
+
+    def invalidate(self, name: Optional[str] = None):
+        if name is None:
+            self._docs.clear()
+        else:
+            self._docs.pop(name, None)
+
+    def find(self, query: str, names: Optional[Iterable[str]] = None, limit: int = 500) -> List[Match]:
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        names = self.names() if names is None else list(names)
+        # Удалённые файлы не держим в памяти
+        for name in list(self._docs):
+            if not (self.lists_dir / name).exists():
+                del self._docs[name]
+        matches: List[Match] = []
+        for name in names:
+            try:
+                doc = self.get(name)
+            except OSError:
+                continue
+            matches.extend(doc.find(needle, limit - len(matches)))
+            if len(matches) >= limit:
+                break
+        return matches
@@ -1,13 +1,16 @@
 from pathlib import Path
-import re
-import time
+import ipaddress
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit,
     QPushButton, QMessageBox, QSizePolicy
 )
-from PySide6.QtGui import QFont, QTextCursor, QTextCharFormat, QColor, QPalette
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont, QTextCursor, QTextCharFormat, QColor, QPalette, QSyntaxHighlighter
+from PySide6.QtCore import Qt, QTimer
 from effects import apply_mica_effect, apply_mica_visual, apply_mica_to_dialog
+from strategy_tokenizer import IncrementalTokenizer, tokenize_line
+from backup_store import BackupStore
+from atomic_write import atomic_write
+from domain_normalizer import INVALID, matching_ipset, normalize_entry, normalize_lines, write_normalized
 
 BUTTON_STYLE_DARK = """
 QPushButton {
@@ -48,21 +51,97 @@ QTextEdit {
 }
 """
 
-DOMAIN_RE = re.compile(
-    r"^(?:[A-Za-z0-9](?:[A-Za-z0-9\-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,}$"
-)
+INVALID_STATE = 1
+
+
+def is_network(line: str) -> bool:
+    try:
+        ipaddress.ip_network(line, strict=False)
+    except ValueError:
+        return False
+    return True
+
+
+def line_error(line: str, editor_type: str):
+    """Текст ошибки для строки или None, если строка в порядке."""
+    stripped = line.strip()
+    if not stripped:
+        return None
+    if editor_type == "domains":
+        # Регистр, ссылки, маски и национальные имена исправляются при сохранении, это не ошибка
+        parsed = normalize_entry(stripped)
+        return "не похоже на домен" if parsed is not None and parsed[0] == INVALID else None
+    if editor_type == "ipset":
+        return None if is_network(stripped) else "не похоже на IP-адрес или подсеть"
+    # Для стратегии: синтаксические ошибки разбора, а также строки, которые не начинаются
+    # с "-" и не являются комментарием (мягкая проверка, аргументы могут быть сложными)
+    _tokens, error = tokenize_line(line)
+    if error is not None:
+        return f"{error[1]}, столбец {error[0]}"
+    if not stripped.startswith(("-", "#", '"', "'")):
+        return "строка без дефиса"
+    return None
+
+
+class LineValidationHighlighter(QSyntaxHighlighter):
+    """Подсвечивает некорректные строки. Qt вызывает highlightBlock только для изменённых блоков,
+    поэтому проверка стоит столько же, сколько правка, а не весь документ."""
+
+    def __init__(self, document, editor_type: str):
+        super().__init__(None)
+        self.editor_type = editor_type
+        self.invalid_count = 0
+        # Признак ошибки по номерам блоков: удалённые блоки уходят без вызова highlightBlock,
+        # и только по этой копии видно, сколько ошибок удалено вместе с ними
+        self.invalid_blocks = [False] * document.blockCount()
+        self.fmt_invalid = QTextCharFormat()
+        self.fmt_invalid.setBackground(QColor(220, 38, 38, 80))
+        # Подключается раньше, чем setDocument подключит перерисовку: номера блоков сдвигаются
+        # до того, как для изменённых блоков вызовется highlightBlock
+        document.contentsChange.connect(self.on_contents_change)
+        self.setDocument(document)
+
+    def on_contents_change(self, position: int, removed: int, added: int):
+        document = self.document()
+        block = document.findBlock(position)
+        first = block.blockNumber()
+        end = min(position + added, document.characterCount() - 1)
+        added_blocks = document.findBlock(end).blockNumber() - first
+        removed_blocks = max(0, len(self.invalid_blocks) - document.blockCount() + added_blocks)
+        # Из блоков first..first+removed_blocks остаётся один, его состояние ещё старое:
+        # счётчик уменьшается на ошибки остальных, без обхода документа
+        span = self.invalid_blocks[first:first + 1 + removed_blocks]
+        survivor = block.userState() == INVALID_STATE
+        self.invalid_count -= sum(span) - survivor
+        self.invalid_blocks[first:first + 1 + removed_blocks] = [survivor] + [False] * added_blocks
+
+    def highlightBlock(self, text):
+        invalid = line_error(text, self.editor_type) is not None
+        was_invalid = self.currentBlockState() == INVALID_STATE
+        self.invalid_count += int(invalid) - int(was_invalid)
+        self.invalid_blocks[self.currentBlock().blockNumber()] = invalid
+        self.setCurrentBlockState(INVALID_STATE if invalid else 0)
+        if invalid:
+            self.setFormat(0, len(text), self.fmt_invalid)
+
 
 class ListEditorDialog(QDialog):
-    # Добавили параметр editor_type: "domains" или "strategy"
-    def __init__(self, lists_dir: str, filename: str = "list-general.txt", editor_type: str = "domains", parent=None):
+    # editor_type: "domains", "ipset" или "strategy"
+    # embedded: редактор встроен во вкладку окна списков, а не открыт отдельным окном
+    def __init__(self, lists_dir: str, filename: str = "list-general.txt", editor_type: str = "domains", parent=None,
+                 documents=None, embedded: bool = False):
         super().__init__(parent)
         self.lists_dir = Path(lists_dir)
         self.filename = filename
         self.filepath = self.lists_dir / self.filename
         self.editor_type = editor_type  # Сохраняем тип редактора
+        self.saved_content = None
+        self.documents = documents
+        self.embedded = embedded
 
         title_map = {
             "domains": f"Редактор списков — {filename}",
+            "ipset": f"Редактор списков — {filename}",
             "strategy": "Редактор Custom стратегии"
         }
         self.setWindowTitle(title_map.get(editor_type, "Редактор"))
@@ -76,11 +155,16 @@ class ListEditorDialog(QDialog):
         self.setPalette(pal)
 
         self.setStyleSheet(DIALOG_STYLE)
-        self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
+        if embedded:
+            self.setWindowFlags(Qt.Widget)
+        else:
+            self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
 
         self.font_default = QFont("Segoe UI", 11)
 
         layout = QVBoxLayout(self)
+        if embedded:
+            layout.setContentsMargins(0, 0, 0, 0)
 
         # Разный текст подсказки в зависимости от режима
         if self.editor_type == "strategy":
@@ -88,6 +172,11 @@ class ListEditorDialog(QDialog):
                 "Введите аргументы стратегии (например: --dpi-desync=fake).\n"
                 "Можно писать всё в одну строку или разбивать по строкам."
             )
+        elif self.editor_type == "ipset":
+            lbl_text = (
+                "Один IP-адрес или подсеть на строку (пример: 203.0.113.0/24)\n"
+                "Перед сохранением создаётся резервная копия файла."
+            )
         else:
             lbl_text = (
                 "Один домен на строку (пример: example.com)\n"
@@ -103,14 +192,36 @@ class ListEditorDialog(QDialog):
         self.text.setAcceptRichText(False)
         layout.addWidget(self.text)
 
+        # Для стратегии проверяем синтаксис по мере ввода: разбор инкрементальный,
+        # перебираются только изменённые строки
+        self.tokenizer = IncrementalTokenizer()
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #9CA3AF;")
+        self.status_label.setVisible(self.editor_type == "strategy")
+        layout.addWidget(self.status_label)
+
+        self.highlighter = LineValidationHighlighter(self.text.document(), self.editor_type)
+        self.text.textChanged.connect(self.update_invalid_label)
+
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(300)
+        self.live_timer.timeout.connect(self.validate_live)
+        if self.editor_type == "strategy":
+            self.text.textChanged.connect(self.live_timer.start)
+
         btn_layout = QHBoxLayout()
+        self.invalid_label = QLabel("")
+        self.invalid_label.setFont(self.font_default)
+        btn_layout.addWidget(self.invalid_label)
         btn_layout.addStretch()
 
+        self.next_error_btn = QPushButton("След. ошибка")
         self.validate_btn = QPushButton("Проверить")
         self.save_btn = QPushButton("Сохранить")
         self.reload_btn = QPushButton("Перезагрузить")
 
-        for b in (self.validate_btn, self.save_btn, self.reload_btn):
+        for b in (self.next_error_btn, self.validate_btn, self.save_btn, self.reload_btn):
             b.setStyleSheet(BUTTON_STYLE_DARK)
             b.setMinimumWidth(120)
             b.setMinimumHeight(38)
@@ -118,17 +229,21 @@ class ListEditorDialog(QDialog):
             b.setFont(self.font_default)
             b.setCursor(Qt.PointingHandCursor)
 
+        self.next_error_btn.clicked.connect(self.jump_to_next_error)
         self.validate_btn.clicked.connect(self.validate_highlight)
         self.save_btn.clicked.connect(self.save_file)
         self.reload_btn.clicked.connect(self.load_file)
 
+        btn_layout.addWidget(self.next_error_btn)
         btn_layout.addWidget(self.validate_btn)
         btn_layout.addWidget(self.save_btn)
         btn_layout.addWidget(self.reload_btn)
         layout.addLayout(btn_layout)
         self.load_file()
-        apply_mica_effect(self)
+        if not embedded:
+            apply_mica_effect(self)
         apply_mica_visual(self.text, alt=True)
+        apply_mica_visual(self.next_error_btn, alt=True)
         apply_mica_visual(self.validate_btn, alt=True)
         apply_mica_visual(self.save_btn, alt=True)
         apply_mica_visual(self.reload_btn, alt=True)
@@ -139,67 +254,88 @@ class ListEditorDialog(QDialog):
                 self.lists_dir.mkdir(parents=True, exist_ok=True)
             if not self.filepath.exists():
                 self.filepath.write_text("", encoding="utf-8")
-            text = self.filepath.read_text(encoding="utf-8").replace("\r\n", "\n")
+            if self.documents is not None:
+                text = self.documents.get(self.filename).text
+            else:
+                text = self.filepath.read_text(encoding="utf-8").replace("\r\n", "\n")
+            self.saved_content = text
             self.text.setPlainText(text)
-            self.clear_highlight()
+            self.update_invalid_label()
+            if self.editor_type == "strategy":
+                self.validate_live()
         except Exception as e:
             self.show_message("Ошибка", f"Не удалось загрузить файл:\n{e}", error=True)
 
-    def validate_highlight(self):
-        content = self.text.toPlainText()
-        lines = content.splitlines()
-        self.clear_highlight()
+    def validate_live(self):
+        self.tokenizer.update(self.text.toPlainText())
+        errors = self.tokenizer.errors()
+        if errors:
+            more = f" (ещё ошибок: {len(errors) - 1})" if len(errors) > 1 else ""
+            self.status_label.setText(f"Ошибка: {errors[0]}{more}")
+            self.status_label.setStyleSheet("color: #F87171;")
+        else:
+            self.status_label.setText(f"Синтаксис в порядке, аргументов: {len(self.tokenizer.tokens())}")
+            self.status_label.setStyleSheet("color: #9CA3AF;")
+
+    def update_invalid_label(self):
+        count = self.highlighter.invalid_count
+        self.invalid_label.setText(f"Ошибок: {count}" if count else "")
+        self.invalid_label.setStyleSheet("color: #F87171;")
+        self.next_error_btn.setEnabled(count > 0)
+
+    def jump_to_next_error(self):
+        document = self.text.document()
+        start = self.text.textCursor().block()
+        block = start.next()
+        # Поиск по кругу от текущей строки
+        for _ in range(document.blockCount()):
+            if not block.isValid():
+                block = document.begin()
+            if block.userState() == INVALID_STATE:
+                cursor = QTextCursor(block)
+                self.text.setTextCursor(cursor)
+                self.text.ensureCursorVisible()
+                return
+            block = block.next()
 
+    def has_unsaved_changes(self) -> bool:
+        return self.saved_content is not None and self.text.toPlainText() != self.saved_content
+
+    def go_to_line(self, row: int):
+        block = self.text.document().findBlockByNumber(row)
+        if block.isValid():
+            cursor = QTextCursor(block)
+            cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            self.text.setTextCursor(cursor)
+            self.text.ensureCursorVisible()
+            self.text.setFocus()
+
+    def validate_highlight(self):
+        # Подсветка уже актуальна: собираем помеченные блоки и показываем причины
         invalid_lines = []
-        cursor = self.text.textCursor()
-        fmt_invalid = QTextCharFormat()
-        fmt_invalid.setBackground(QColor(220, 38, 38, 80))
-
-        pos = 0
-        for i, raw in enumerate(lines):
-            line = raw.strip()
-            line_len = len(raw)
-            
-            is_invalid = False
-            if line:
-                if self.editor_type == "domains":
-                    # Логика для доменов
-                    if not DOMAIN_RE.match(line):
-                        is_invalid = True
-                elif self.editor_type == "strategy":
-                    # Логика для стратегии: просто подсветим, если строка не пустая и не начинается с "-"
-                    # (это мягкая проверка, так как аргументы могут быть сложными)
-                    if not line.startswith("-"):
-                        is_invalid = True
-
-            if is_invalid:
-                invalid_lines.append((i + 1, line))
-                cursor.setPosition(pos)
-                cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(fmt_invalid)
-            
-            pos += line_len + 1
+        block = self.text.document().begin()
+        while block.isValid():
+            if block.userState() == INVALID_STATE:
+                text = block.text()
+                invalid_lines.append((block.blockNumber() + 1,
+                                      f"{text.strip()}  ← {line_error(text, self.editor_type)}"))
+            block = block.next()
 
         if invalid_lines:
             if self.editor_type == "domains":
                 msg = "Найдены некорректные строки (не похожи на домены):\n"
+            elif self.editor_type == "ipset":
+                msg = "Найдены некорректные строки (не похожи на IP-адреса или подсети):\n"
             else:
-                msg = "Найдены строки без дефиса (возможно, это не аргументы):\n"
-                
-            msg += "\n".join(f"{ln}: {val}" for ln, val in invalid_lines)
+                msg = "Найдены ошибки или строки без дефиса (возможно, это не аргументы):\n"
+
+            msg += "\n".join(f"{ln}: {val}" for ln, val in invalid_lines[:50])
+            if len(invalid_lines) > 50:
+                msg += f"\n… и ещё {len(invalid_lines) - 50}"
             self.show_message("Проверка", msg)
         else:
             self.show_message("Проверка", "Ошибок не найдено.")
 
-    def clear_highlight(self):
-        cursor = self.text.textCursor()
-        cursor.select(QTextCursor.Document)
-        fmt = QTextCharFormat()
-        fmt.setBackground(QColor(0, 0, 0, 0))
-        cursor.mergeCharFormat(fmt)
-        cursor.clearSelection()
-        self.text.setTextCursor(cursor)
-
     def save_file(self):
         try:
             raw = self.text.toPlainText()
@@ -207,37 +343,67 @@ class ListEditorDialog(QDialog):
             
             cleaned = []
             seen = set()
+            normalized = None
             
             # Для стратегий порядок важен, и дубликаты могут быть нужны (хотя редко),
             # но для доменов порядок не важен.
-            # Оставим логику очистки только для доменов.
+            # Оставим логику очистки только для списков доменов и подсетей.
             if self.editor_type == "domains":
+                # Домены приводятся к виду winws, адреса и подсети уходят в ipset
+                normalized = normalize_lines(lines, keep_invalid=True)
+                cleaned = normalized.lines
+                if normalized.invalid:
+                    if not self.ask_question(
+                        "Некорректные строки",
+                        "Найдены строки, не похожие на домены. Сохранить?"
+                    ):
+                        return
+            elif self.editor_type == "ipset":
                 for ln in lines:
                     if ln and ln not in seen:
                         seen.add(ln)
                         cleaned.append(ln)
                 
-                bad = [ln for ln in cleaned if not DOMAIN_RE.match(ln)]
+                bad = [ln for ln in cleaned if line_error(ln, self.editor_type)]
                 if bad:
                     if not self.ask_question(
                         "Некорректные строки",
-                        "Найдены строки, не похожие на домены. Сохранить?"
+                        "Найдены строки, не похожие на IP-адреса или подсети. Сохранить?"
                     ):
                         return
             else:
                 # Для стратегии сохраняем как есть, просто убираем пустые строки по краям
                 cleaned = [ln for ln in lines if ln]
 
-            if self.filepath.exists():
-                ts = time.strftime("%Y%m%d-%H%M%S")
-                bak = self.filepath.with_name(self.filepath.name + f".bak.{ts}")
-                self.filepath.replace(bak)
-                
-            self.filepath.write_text(
-                "\n".join(cleaned) + ("\n" if cleaned else ""), encoding="utf-8"
-            )
-            self.show_message("Сохранено", "Файл успешно сохранён.")
-            self.load_file()
+            content = "\n".join(cleaned) + ("\n" if cleaned else "")
+            if content == self.saved_content and self.filepath.exists():
+                self.show_message("Сохранено", "Изменений нет, файл не перезаписан.")
+                return
+
+            moved = 0
+            if normalized is not None and normalized.networks:
+                # Список и ipset меняются одной транзакцией, резервные копии делаются для обоих
+                moved = write_normalized(self.lists_dir, self.filename, normalized)
+                if self.documents is not None:
+                    self.documents.invalidate(matching_ipset(self.filename))
+            else:
+                # Копия текущей версии: одинаковое содержимое хранится один раз, старые версии удаляются
+                BackupStore.for_lists(self.lists_dir).backup(self.filepath)
+                atomic_write(self.filepath, content)
+            self.saved_content = content
+            if self.documents is not None:
+                self.documents.store(self.filename, content)
+            # Файл не перечитываем: документ меняется, только если очистка что-то убрала
+            if content != raw:
+                self.text.setPlainText(content)
+                self.update_invalid_label()
+            if self.editor_type == "strategy":
+                self.validate_live()
+            message = "Файл успешно сохранён."
+            if normalized is not None and normalized.networks:
+                message += (f"\nIP-адреса и подсети убраны из списка, новых добавлено "
+                            f"в {matching_ipset(self.filename)}: {moved}.")
+            self.show_message("Сохранено", message)
             
         except Exception as e:
             self.show_message("Ошибка", f"Не удалось сохранить файл:\n{e}", error=True)
@@ -0,0 +1,215 @@
+"""Проверка файлов из lists/: некорректные строки, записи не того типа, дубли,
+пустые списки, на которые ссылается выбранная стратегия.
+
+Результат проверки файла зависит только от его содержимого, поэтому кэшируется
+по sha256; если размер и mtime не изменились, файл даже не перечитывается.
+"""
+import hashlib
+import ipaddress
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from atomic_write import TEMP_SUFFIX, atomic_write
+from domain_normalizer import DOMAIN, NETWORK, normalize_entry
+
+# Увеличивать при изменении правил проверки: старые отчёты в кэше станут недействительны
+CACHE_FORMAT = 2
+CACHE_NAME = "health.json"
+
+HOSTLIST = "hostlist"
+IPSET = "ipset"
+
+
+class Issue(NamedTuple):
+    file: str
+    line: int
+    kind: str
+    message: str
+
+    def __str__(self):
+        where = f"{self.file}:{self.line}" if self.line else self.file
+        return f"{where}: {self.message}"
+
+
+class FileReport(NamedTuple):
+    sha256: str
+    entries: int
+    issues: List[Issue]
+
+
+def list_kind(name: str) -> Optional[str]:
+    if name.startswith("ipset-"):
+        return IPSET
+    if name.startswith("list-"):
+        return HOSTLIST
+    return None
+
+
+def is_list_file(path: Path) -> bool:
+    name = path.name
+    if ".bak." in name or name.endswith((".idx", ".tmp", TEMP_SUFFIX)):
+        return False
+    return path.is_file() and list_kind(name) is not None
+
+
+def _is_ip(text: str) -> bool:
+    try:
+        ipaddress.ip_network(text, strict=False)
+    except ValueError:
+        return False
+    return True
+
+
+def scan_text(name: str, text: str) -> FileReport:
+    kind = list_kind(name)
+    issues: List[Issue] = []
+    seen: Dict[str, int] = {}
+    entries = 0
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        entries += 1
+        key = line.lower()
+        if key in seen:
+            issues.append(Issue(name, lineno, "duplicate", f"повтор строки {seen[key]}: {line}"))
+            continue
+        seen[key] = lineno
+
+        if kind == IPSET:
+            if not _is_ip(line):
+                # Тот же разбор строки, что в редакторе и при сохранении списков
+                parsed = normalize_entry(line)
+                if parsed is not None and parsed[0] == DOMAIN:
+                    issues.append(Issue(name, lineno, "wrong_type", f"домен в ipset-списке: {line}"))
+                else:
+                    issues.append(Issue(name, lineno, "malformed", f"некорректная подсеть: {line}"))
+        else:
+            parsed = normalize_entry(line)
+            if parsed is not None and parsed[0] == NETWORK:
+                issues.append(Issue(name, lineno, "wrong_type", f"IP-адрес в hostlist-списке: {line}"))
+            elif parsed is None or parsed[0] != DOMAIN:
+                issues.append(Issue(name, lineno, "malformed", f"некорректный домен: {line}"))
+    return FileReport(hashlib.sha256(text.encode("utf-8")).hexdigest(), entries, issues)
+
+
+class HealthCache:
+    """Кэш отчётов: имя файла -> (размер, mtime, sha256), sha256 -> отчёт."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        self.reports: Dict[str, FileReport] = {}
+        self.scanned = 0
+        if path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("format") != CACHE_FORMAT:
+            return
+        self.files = data.get("files", {})
+        for digest, report in data.get("reports", {}).items():
+            issues = [Issue(*issue) for issue in report["issues"]]
+            self.reports[digest] = FileReport(digest, report["entries"], issues)
+
+    def save(self):
+        if self.path is None:
+            return
+        # Храним только отчёты файлов, которые ещё существуют
+        used = {info["sha256"] for info in self.files.values()}
+        data = {
+            "format": CACHE_FORMAT,
+            "files": self.files,
+            "reports": {
+                digest: {"entries": report.entries, "issues": [list(issue) for issue in report.issues]}
+                for digest, report in self.reports.items() if digest in used
+            },
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False))
+        except OSError:
+            pass
+
+    def report(self, path: Path) -> FileReport:
+        stat = path.stat()
+        info = self.files.get(path.name)
+        if info and info["size"] == stat.st_size and info["mtime"] == stat.st_mtime_ns \
+                and info["sha256"] in self.reports:
+            return self._named(self.reports[info["sha256"]], path.name)
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        report = self.reports.get(digest)
+        if report is None:
+            report = scan_text(path.name, data.decode("utf-8", errors="replace"))
+            self.scanned += 1
+            self.reports[digest] = report
+        self.files[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest}
+        return self._named(report, path.name)
+
+    @staticmethod
+    def _named(report: FileReport, name: str) -> FileReport:
+        # Одинаковое содержимое под разными именами делит один отчёт
+        if report.issues and report.issues[0].file != name:
+            return report._replace(issues=[issue._replace(file=name) for issue in report.issues])
+        return report
+
+
+def scan_lists(lists_dir: Path, cache: HealthCache) -> Dict[str, FileReport]:
+    reports = {}
+    for path in sorted(Path(lists_dir).iterdir()):
+        if not is_list_file(path):
+            continue
+        try:
+            reports[path.name] = cache.report(path)
+        except OSError:
+            continue
+    for name in list(cache.files):
+        if name not in reports:
+            del cache.files[name]
+    return reports
+
+
+def referenced_lists(args: Iterable[str]) -> List[Path]:
+    from strategy_model import Strategy
+
+    strategy = Strategy.from_argv(list(args))
+    paths: List[Path] = []
+    for profile in strategy.profiles:
+        for item in profile.hostlists + profile.hostlist_excludes + profile.ipsets + profile.ipset_excludes:
+            if Path(item) not in paths:
+                paths.append(Path(item))
+    return paths
+
+
+def strategy_issues(args: Iterable[str], reports: Dict[str, FileReport]) -> List[Issue]:
+    """Пустые и отсутствующие списки, на которые ссылается стратегия."""
+    issues = []
+    for path in referenced_lists(args):
+        report = reports.get(path.name)
+        if not path.exists():
+            issues.append(Issue(path.name, 0, "missing", "файл списка не найден"))
+        elif report is not None and not report.entries:
+            # Пустой ipset winws считает совпадающим с любым адресом, пустой hostlist — ни с чем
+            if list_kind(path.name) == IPSET:
+                issues.append(Issue(path.name, 0, "empty", "ipset пуст — профиль сработает для любого IP"))
+            else:
+                issues.append(Issue(path.name, 0, "empty", "список пуст — профиль не сработает"))
+    return issues
+
+
+def check_lists(lists_dir: Path, args: Iterable[str] = (), cache: Optional[HealthCache] = None) -> List[Issue]:
+    if cache is None:
+        cache = HealthCache(Path(lists_dir) / ".cache" / CACHE_NAME)
+    reports = scan_lists(lists_dir, cache)
+    cache.save()
+    issues = strategy_issues(args, reports)
+    for report in reports.values():
+        issues.extend(report.issues)
+    return issues
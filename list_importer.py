@@ -0,0 +1,331 @@
+"""Импорт сторонних списков блокировок в hostlist и ipset.
+
+Источник читается построчно (в том числе .gz — определяется по сигнатуре, а не по
+расширению), поэтому размер файла на память не влияет: в памяти только уникальные
+новые записи. Формат определяется по первым строкам:
+
+  hosts    — "0.0.0.0 example.com" и "127.0.0.1 a.com b.com";
+  adblock  — "||example.com^" (правила-исключения, пути и косметика пропускаются);
+  cidr     — по одной подсети или адресу на строку;
+  domains  — по одному домену на строку.
+
+Домены уходят в hostlist, адреса и подсети — в ipset. Запись пропускается, если она
+уже есть в целевом списке или домен покрыт родительским доменом из списка (winws
+применяет запись и ко всем поддоменам). Перед записью списков делается резервная
+копия, оба списка заменяются одной транзакцией.
+
+    python list_importer.py hosts.txt easylist.txt.gz
+    python list_importer.py dump.txt --hostlist list-google.txt --dry-run
+"""
+import argparse
+import gzip
+import io
+import ipaddress
+import sys
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+from atomic_write import Transaction
+from backup_store import BackupStore
+from domain_normalizer import DOMAIN, INVALID, normalize_host, parse_network
+from hostlist_trie import normalize
+from ipset_compiler import Interval, merge_intervals, prefix_interval
+
+HOSTS = "hosts"
+ADBLOCK = "adblock"
+CIDR = "cidr"
+DOMAINS = "domains"
+FORMATS = (HOSTS, ADBLOCK, CIDR, DOMAINS)
+
+DEFAULT_HOSTLIST = "list-general.txt"
+DEFAULT_IPSET = "ipset-all.txt"
+
+SAMPLE_LINES = 200
+
+_HOSTS_SKIP = frozenset({"localhost", "localhost.localdomain", "local", "broadcasthost",
+                         "ip6-localhost", "ip6-loopback", "ip6-localnet", "ip6-mcastprefix",
+                         "ip6-allnodes", "ip6-allrouters", "ip6-allhosts", "0.0.0.0"})
+
+
+class SourceStats(NamedTuple):
+    source: str
+    format: str
+    lines: int
+    domains: int
+    networks: int
+    skipped: int
+
+
+class ImportResult(NamedTuple):
+    sources: List[SourceStats]
+    domains: List[str]
+    networks: List[str]
+    duplicates: int
+
+    def report(self) -> str:
+        lines = [f"{s.source}: формат {s.format}, строк {s.lines}, доменов {s.domains}, "
+                 f"подсетей {s.networks}, пропущено {s.skipped}" for s in self.sources]
+        lines.append(f"Новых доменов: {len(self.domains)}, новых подсетей: {len(self.networks)}, "
+                     f"уже были в списках: {self.duplicates}")
+        return "\n".join(lines)
+
+
+def open_source(path: Path) -> TextIO:
+    """Текстовый поток из файла; gzip распознаётся по первым байтам."""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    raw = gzip.open(path, "rb") if compressed else open(path, "rb")
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline=None)
+
+
+def _meaningful(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(("#", "!", "[")):
+            yield line
+
+
+@lru_cache(maxsize=1024)
+def _looks_like_ip(token: str) -> bool:
+    # В hosts-файлах адрес почти всегда один и тот же (0.0.0.0), разбор кэшируется
+    if not token or not (token[0].isdigit() or ":" in token):
+        return False
+    try:
+        ipaddress.ip_network(token, strict=False)
+    except ValueError:
+        return False
+    return True
+
+
+def detect_format(sample: Iterable[str]) -> str:
+    votes = dict.fromkeys(FORMATS, 0)
+    for line in islice(_meaningful(sample), SAMPLE_LINES):
+        if line.startswith(("||", "@@", "|http")) or "##" in line:
+            votes[ADBLOCK] += 1
+            continue
+        tokens = line.split("#", 1)[0].split()
+        if len(tokens) >= 2 and _looks_like_ip(tokens[0]):
+            votes[HOSTS] += 1
+        elif len(tokens) == 1 and _looks_like_ip(tokens[0]):
+            votes[CIDR] += 1
+        else:
+            votes[DOMAINS] += 1
+    return max(FORMATS, key=lambda name: votes[name])
+
+
+def parse_line(line: str, fmt: str) -> List[Tuple[str, str]]:
+    """Записи строки в виде (DOMAIN|NETWORK, значение); пустой список — строка пропущена."""
+    if fmt == ADBLOCK:
+        if not line.startswith("||"):
+            return []
+        rule = line[2:].split("$", 1)[0]
+        if rule.endswith("^"):
+            rule = rule[:-1]
+        if not rule or "/" in rule or "*" in rule or "^" in rule:
+            return []
+        kind, value = normalize_host(rule)
+        return [] if kind == INVALID else [(kind, value)]
+
+    tokens = (line.split("#", 1)[0] if "#" in line else line).split()
+    if not tokens:
+        return []
+    if fmt == HOSTS:
+        if len(tokens) < 2 or not _looks_like_ip(tokens[0]):
+            return []
+        # Адрес в hosts — это куда направить имя, а не что блокировать; берём только имена
+        entries = []
+        for name in tokens[1:]:
+            if name.lower() in _HOSTS_SKIP:
+                continue
+            kind, value = normalize_host(name)
+            if kind == DOMAIN:
+                entries.append((kind, value))
+        return entries
+
+    # Ссылки, маски, порты и национальные домены приводятся так же, как при правке списков
+    kind, value = normalize_host(tokens[0].lstrip("^"))
+    return [] if kind == INVALID else [(kind, value)]
+
+
+class ListImporter:
+    """Накопитель новых записей с проверкой по уже существующим."""
+
+    def __init__(self, existing_domains: Iterable[str] = (), existing_networks: Iterable[str] = ()):
+        # Покрывают поддомены только обычные записи: "^example.com" совпадает лишь с самим доменом,
+        # а импортируемые записи всегда обычные
+        self.domains: Set[str] = set()
+        for line in existing_domains:
+            parsed = normalize(line)
+            if parsed is not None and not parsed[1]:
+                self.domains.add(parsed[0])
+        self.networks: Set[str] = set()
+        spans: Dict[int, List[Interval]] = {4: [], 6: []}
+        for line in existing_networks:
+            network = parse_network(line.split("#", 1)[0].strip())
+            if network is not None:
+                self.networks.add(network)
+                version, lo, hi = prefix_interval(network)
+                spans[version].append((lo, hi))
+        # Уже имеющиеся подсети слиты в интервалы: вложенность проверяется бинпоиском
+        self.existing = {version: merge_intervals(items) for version, items in spans.items()}
+        self.existing_starts = {version: [lo for lo, _hi in items] for version, items in self.existing.items()}
+        # dict вместо set: сохраняет порядок появления записей в источниках
+        self.new_domains: Dict[str, None] = {}
+        self.new_networks: Dict[str, None] = {}
+        self.duplicates = 0
+        self.sources: List[SourceStats] = []
+
+    def covered(self, domain: str) -> bool:
+        if domain in self.domains:
+            return True
+        # Поднимаемся по родителям: a.b.example.com -> b.example.com -> example.com -> com
+        dot = domain.find(".")
+        while dot >= 0:
+            domain = domain[dot + 1:]
+            if domain in self.domains:
+                return True
+            dot = domain.find(".")
+        return False
+
+    def add_domain(self, domain: str) -> bool:
+        if self.covered(domain):
+            self.duplicates += 1
+            return False
+        self.domains.add(domain)
+        self.new_domains[domain] = None
+        return True
+
+    def network_covered(self, network: str) -> bool:
+        if network in self.networks:
+            return True
+        version, lo, hi = prefix_interval(network)
+        i = bisect_right(self.existing_starts[version], lo) - 1
+        return i >= 0 and hi <= self.existing[version][i][1]
+
+    def add_network(self, network: str) -> bool:
+        if self.network_covered(network):
+            self.duplicates += 1
+            return False
+        self.networks.add(network)
+        self.new_networks[network] = None
+        return True
+
+    def feed(self, lines: Iterable[str], source: str = "-", fmt: Optional[str] = None) -> SourceStats:
+        lines = iter(lines)
+        if fmt is None:
+            head = list(islice(lines, SAMPLE_LINES * 4))
+            fmt = detect_format(head)
+            lines = _chain(head, lines)
+        count = domains = networks = skipped = 0
+        comment = ("!", "[") if fmt == ADBLOCK else ("#",)
+        for line in lines:
+            count += 1
+            line = line.strip()
+            if not line or line.startswith(comment):
+                continue
+            entries = parse_line(line, fmt)
+            if not entries:
+                skipped += 1
+                continue
+            for kind, value in entries:
+                if kind == DOMAIN:
+                    domains += self.add_domain(value)
+                else:
+                    networks += self.add_network(value)
+        stats = SourceStats(source, fmt, count, domains, networks, skipped)
+        self.sources.append(stats)
+        return stats
+
+    def _widest_networks(self) -> List[str]:
+        """Новые подсети без вложенных в другие новые: широкая могла встретиться позже узкой."""
+        spans = sorted((version, lo, -hi, network)
+                       for network in self.new_networks for version, lo, hi in [prefix_interval(network)])
+        nested = set()
+        reach = {4: -1, 6: -1}
+        for version, lo, neg_hi, network in spans:
+            if -neg_hi <= reach[version]:
+                nested.add(network)
+            else:
+                reach[version] = -neg_hi
+        return [network for network in self.new_networks if network not in nested]
+
+    def result(self) -> ImportResult:
+        networks = self._widest_networks()
+        duplicates = self.duplicates + len(self.new_networks) - len(networks)
+        return ImportResult(list(self.sources), list(self.new_domains), networks, duplicates)
+
+
+def _chain(head: List[str], rest: Iterator[str]) -> Iterator[str]:
+    yield from head
+    yield from rest
+
+
+def _read_lines(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    return path.read_text(encoding="utf-8", errors="replace").splitlines()
+
+
+def _appended(path: Path, entries: List[str]) -> Iterator[str]:
+    # Старое содержимое копируется потоком, новые записи дописываются в конец
+    ends_with_newline = True
+    if path.exists():
+        with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            for chunk in iter(lambda: f.read(1 << 16), ""):
+                ends_with_newline = chunk.endswith("\n")
+                yield chunk
+    if not ends_with_newline:
+        yield "\n"
+    for entry in entries:
+        yield entry + "\n"
+
+
+def import_sources(sources: Iterable[Path], lists_dir: Path, hostlist: str = DEFAULT_HOSTLIST,
+                   ipset: str = DEFAULT_IPSET, fmt: Optional[str] = None, dry_run: bool = False) -> ImportResult:
+    lists_dir = Path(lists_dir)
+    hostlist_path = lists_dir / hostlist
+    ipset_path = lists_dir / ipset
+    importer = ListImporter(_read_lines(hostlist_path), _read_lines(ipset_path))
+    for source in sources:
+        with open_source(Path(source)) as stream:
+            importer.feed(stream, Path(source).name, fmt)
+    result = importer.result()
+    if dry_run:
+        return result
+
+    targets = [(hostlist_path, result.domains), (ipset_path, result.networks)]
+    targets = [(path, entries) for path, entries in targets if entries]
+    if targets:
+        store = BackupStore.for_lists(lists_dir)
+        for path, _entries in targets:
+            store.backup(path)
+        with Transaction(lists_dir) as tx:
+            for path, entries in targets:
+                tx.write(path, _appended(path, entries))
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Импорт внешних списков в hostlist и ipset")
+    parser.add_argument("sources", type=Path, nargs="+", help="файлы hosts, adblock, CIDR или доменов (можно .gz)")
+    parser.add_argument("--lists-dir", type=Path, default=Path(__file__).parent / "lists")
+    parser.add_argument("--hostlist", default=DEFAULT_HOSTLIST, help="куда добавлять домены")
+    parser.add_argument("--ipset", default=DEFAULT_IPSET, help="куда добавлять адреса и подсети")
+    parser.add_argument("--format", choices=FORMATS, help="не определять формат автоматически")
+    parser.add_argument("--dry-run", action="store_true", help="только отчёт, списки не меняются")
+    args = parser.parse_args(argv)
+
+    try:
+        result = import_sources(args.sources, args.lists_dir, args.hostlist, args.ipset, args.format, args.dry_run)
+    except OSError as e:
+        print(f"Не удалось импортировать: {e}", file=sys.stderr)
+        return 2
+    print(result.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
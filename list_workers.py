@@ -0,0 +1,124 @@
+"""Фоновые задачи по спискам, у каждой свой повод для запуска:
+
+  ArtifactBuildThread — копии списков для winws, при изменении файлов в lists/;
+  CoverageThread      — покрытие профилей, при смене стратегии, режима ipset или списков;
+  AsnIpsetThread      — ipset из баз ASN, при изменении файлов баз.
+
+Проверка самих списков — ListHealthThread в health_worker.
+"""
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
+
+from asn_ipset import OUTPUT_NAME, AsnIpsetBuilder
+from coverage_analyzer import analyze_args
+from ipset_modes import apply_ipset_mode, variant_sources
+from list_artifacts import ArtifactCache
+from list_health import Issue, is_list_file
+from script_parameters import compile_script_parameters
+
+
+class DebouncedTask(QObject):
+    """Запускает поток через паузу после последнего запроса; запрос во время работы
+    откладывает перезапуск до её окончания."""
+
+    def __init__(self, factory, on_result, parent=None, delay: int = 500):
+        super().__init__(parent)
+        self.factory = factory
+        self.on_result = on_result
+        self.thread = None
+        self.pending = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.run)
+
+    def schedule(self, *_args):
+        self.timer.start()
+
+    def run(self):
+        if self.thread is not None and self.thread.isRunning():
+            self.pending = True
+            return
+        self.thread = self.factory()
+        self.thread.result.connect(self.on_result)
+        self.thread.finished.connect(self.on_finished)
+        self.thread.start()
+
+    def on_finished(self):
+        if self.pending:
+            self.pending = False
+            self.timer.start()
+
+    def wait(self):
+        self.timer.stop()
+        if self.thread is not None:
+            self.thread.wait()
+
+
+class ArtifactBuildThread(QThread):
+    result = Signal(list)
+
+    def __init__(self, lists_dir, pinned=()):
+        super().__init__()
+        self.lists_dir = Path(lists_dir)
+        # Копии, с которыми запущен winws, не удаляются до отключения
+        self.pinned = frozenset(pinned)
+
+    def run(self):
+        try:
+            # Собираются все списки папки, а не только текущей стратегии: смена пресета
+            # или режима ipset тогда ничего не пересобирает
+            sources = [path for path in sorted(self.lists_dir.iterdir()) if is_list_file(path)]
+            sources += [path for path in variant_sources(self.lists_dir) if path not in sources]
+            ArtifactCache(self.lists_dir).build_all(sources, self.pinned)
+            issues = []
+        except Exception as e:
+            issues = [Issue("lists", 0, "error", f"Не удалось подготовить списки для winws: {e}")]
+        self.result.emit(issues)
+
+
+class CoverageThread(QThread):
+    result = Signal(list)
+
+    def __init__(self, lists_dir, bin_dir, mode, game_mode_checked, ipset_mode):
+        super().__init__()
+        self.lists_dir = str(lists_dir)
+        self.bin_dir = str(bin_dir)
+        self.mode = mode
+        self.game_mode_checked = game_mode_checked
+        self.ipset_mode = ipset_mode
+
+    def run(self):
+        issues = []
+        try:
+            try:
+                args = compile_script_parameters(self.game_mode_checked, self.lists_dir, self.bin_dir, self.mode)
+            except Exception:
+                # Ошибки самой стратегии показываются при подключении
+                args = ()
+            # Профили, у которых исключения съедают большую часть включённых списков
+            for item in analyze_args(apply_ipset_mode(args, self.lists_dir, self.ipset_mode), self.lists_dir):
+                issues.extend(Issue(f"профиль {item.index}", 0, "coverage", warning) for warning in item.warnings)
+        except Exception as e:
+            issues.append(Issue("lists", 0, "error", f"Не удалось посчитать покрытие профилей: {e}"))
+        self.result.emit(issues)
+
+
+class AsnIpsetThread(QThread):
+    # Число подсетей, None — пересобирать не понадобилось, и найденные ошибки
+    result = Signal(object, list)
+
+    def __init__(self, lists_dir):
+        super().__init__()
+        self.lists_dir = Path(lists_dir)
+
+    def run(self):
+        try:
+            builder = AsnIpsetBuilder(self.lists_dir)
+            count = builder.update()
+            issues = [Issue(OUTPUT_NAME, 0, "missing", f"База ASN не найдена: {path}") for path in builder.missing]
+        except Exception as e:
+            count = None
+            issues = [Issue(OUTPUT_NAME, 0, "error", f"Не удалось собрать ipset из баз ASN: {e}")]
+        self.result.emit(count, issues)
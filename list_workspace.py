@@ -0,0 +1,259 @@
+from pathlib import Path
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem,
+    QPushButton, QSizePolicy, QTabWidget, QWidget, QFileDialog, QMessageBox
+)
+from PySide6.QtGui import QFont, QColor, QPalette
+from PySide6.QtCore import Qt
+
+from effects import apply_mica_effect, apply_mica_visual, apply_mica_to_dialog
+from import_worker import ListImportThread
+from large_list_editor import LargeListEditorDialog, create_list_editor
+from list_documents import DocumentCache
+from list_editor import BUTTON_STYLE_DARK, DIALOG_STYLE
+from list_health import HOSTLIST, IPSET, list_kind
+from list_importer import DEFAULT_HOSTLIST, DEFAULT_IPSET
+
+WORKSPACE_STYLE = DIALOG_STYLE + """
+QTabWidget::pane {
+    border: none;
+}
+QTabBar::tab {
+    background-color: rgba(40, 45, 60, 0.85);
+    color: #9CA3AF;
+    border: 1px solid rgba(255,255,255,0.07);
+    border-radius: 6px;
+    padding: 5px 10px;
+    margin-right: 3px;
+}
+QTabBar::tab:selected {
+    background-color: #2E364D;
+    color: #F3F4F6;
+}
+QLineEdit, QListWidget {
+    background-color: rgba(30, 35, 55, 0.85);
+    color: #F3F4F6;
+    border: 1px solid rgba(255,255,255,0.08);
+    border-radius: 8px;
+    padding: 4px;
+}
+"""
+
+MAX_MATCHES = 500
+
+
+class ListWorkspaceDialog(QDialog):
+    """Все списки из lists/ во вкладках. Редактор вкладки создаётся при первом открытии,
+    содержимое файлов берётся из общего DocumentCache и переживает закрытие окна."""
+
+    def __init__(self, lists_dir: str, documents: DocumentCache = None, filename: str = "list-general.txt",
+                 parent=None):
+        super().__init__(parent)
+        self.lists_dir = Path(lists_dir)
+        self.documents = documents if documents is not None else DocumentCache(self.lists_dir)
+        self.editors = {}
+        self.import_thread = None
+
+        self.setWindowTitle("Редактор списков")
+        self.setMinimumSize(760, 560)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAutoFillBackground(False)
+
+        pal = self.palette()
+        pal.setColor(QPalette.Window, QColor(0, 0, 0, 0))
+        self.setPalette(pal)
+
+        self.setStyleSheet(WORKSPACE_STYLE)
+        self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
+        self.font_default = QFont("Segoe UI", 11)
+
+        layout = QVBoxLayout(self)
+
+        find_layout = QHBoxLayout()
+        self.find_edit = QLineEdit()
+        self.find_edit.setFont(self.font_default)
+        self.find_edit.setPlaceholderText("Поиск по всем спискам (сохранённые версии)")
+        self.find_btn = QPushButton("Найти")
+        self.import_btn = QPushButton("Импорт…")
+        self.import_btn.setToolTip("Добавить домены и подсети из файлов hosts, adblock, CIDR (можно .gz)")
+        find_layout.addWidget(self.find_edit)
+        for b in (self.find_btn, self.import_btn):
+            b.setStyleSheet(BUTTON_STYLE_DARK)
+            b.setMinimumHeight(34)
+            b.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+            b.setFont(self.font_default)
+            b.setCursor(Qt.PointingHandCursor)
+            find_layout.addWidget(b)
+        layout.addLayout(find_layout)
+
+        self.results_label = QLabel("")
+        self.results_label.setStyleSheet("color: #9CA3AF;")
+        self.results_label.setVisible(False)
+        layout.addWidget(self.results_label)
+
+        self.results = QListWidget()
+        self.results.setFont(self.font_default)
+        self.results.setMaximumHeight(140)
+        self.results.setVisible(False)
+        layout.addWidget(self.results)
+
+        self.tabs = QTabWidget()
+        self.tabs.setFont(self.font_default)
+        self.tabs.setDocumentMode(True)
+        layout.addWidget(self.tabs)
+
+        # Вкладки-заглушки: файл читается и редактор строится только когда вкладку открыли
+        for name in self.documents.names():
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 6, 0, 0)
+            index = self.tabs.addTab(page, name)
+            self.tabs.setTabToolTip(index, str(self.lists_dir / name))
+
+        self.tabs.currentChanged.connect(self.ensure_editor)
+        self.find_btn.clicked.connect(self.find_all)
+        self.find_edit.returnPressed.connect(self.find_all)
+        self.results.itemActivated.connect(self.open_match)
+        self.import_btn.clicked.connect(self.import_lists)
+
+        names = [self.tabs.tabText(i) for i in range(self.tabs.count())]
+        if filename in names:
+            self.tabs.setCurrentIndex(names.index(filename))
+        self.ensure_editor(self.tabs.currentIndex())
+
+        apply_mica_effect(self)
+        apply_mica_visual(self.find_btn, alt=True)
+        apply_mica_visual(self.import_btn, alt=True)
+
+    def ensure_editor(self, index: int):
+        if index < 0:
+            return None
+        name = self.tabs.tabText(index)
+        editor = self.editors.get(name)
+        if editor is None:
+            editor_type = "ipset" if list_kind(name) == IPSET else "domains"
+            editor = create_list_editor(str(self.lists_dir), name, editor_type, parent=self.tabs.widget(index),
+                                        documents=self.documents, embedded=True)
+            self.tabs.widget(index).layout().addWidget(editor)
+            self.editors[name] = editor
+        return editor
+
+    def find_all(self):
+        query = self.find_edit.text()
+        self.results.clear()
+        if not query.strip():
+            self.results.setVisible(False)
+            self.results_label.setVisible(False)
+            return
+        matches = self.documents.find(query, limit=MAX_MATCHES)
+        for match in matches:
+            item = QListWidgetItem(f"{match.file}:{match.row + 1}   {match.text.strip()}")
+            item.setData(Qt.UserRole, (match.file, match.row))
+            self.results.addItem(item)
+
+        if not matches:
+            self.results_label.setText("Ничего не найдено.")
+        elif len(matches) >= MAX_MATCHES:
+            self.results_label.setText(f"Показаны первые {MAX_MATCHES} совпадений.")
+        else:
+            files = len({match.file for match in matches})
+            self.results_label.setText(f"Совпадений: {len(matches)}, файлов: {files}.")
+        self.results_label.setVisible(True)
+        self.results.setVisible(bool(matches))
+
+    def open_match(self, item: QListWidgetItem):
+        name, row = item.data(Qt.UserRole)
+        for index in range(self.tabs.count()):
+            if self.tabs.tabText(index) == name:
+                self.tabs.setCurrentIndex(index)
+                editor = self.ensure_editor(index)
+                editor.go_to_line(row)
+                return
+
+    def import_lists(self):
+        if self.import_thread is not None and self.import_thread.isRunning():
+            return
+        files, _ = QFileDialog.getOpenFileNames(self, "Импорт списков", "",
+                                                "Списки (*.txt *.gz *.list *.hosts);;Все файлы (*)")
+        if not files:
+            return
+        # Домены и подсети попадают в открытый список подходящего типа, иначе — в списки по умолчанию
+        current = self.tabs.tabText(self.tabs.currentIndex()) if self.tabs.count() else ""
+        hostlist = current if list_kind(current) == HOSTLIST else DEFAULT_HOSTLIST
+        ipset = current if list_kind(current) == IPSET else DEFAULT_IPSET
+        # Импорт пишет прямо в файлы: несохранённая правка во вкладке потерялась бы при перечитывании
+        unsaved = self.unsaved_tabs((hostlist, ipset))
+        if unsaved:
+            self.show_message("Импорт", "Есть несохранённые изменения в " + ", ".join(unsaved)
+                              + ".\nСохраните или перезагрузите список перед импортом.", error=True)
+            return
+        # Большой список отображён в память: на Windows файл под ним не заменить, и транзакция
+        # импорта оборвалась бы посередине
+        released = [name for name in (hostlist, ipset) if isinstance(self.editors.get(name), LargeListEditorDialog)]
+        for name in released:
+            self.editors[name].release_file()
+        self.import_btn.setEnabled(False)
+        self.import_btn.setText("Импорт идёт…")
+        self.import_thread = ListImportThread(files, self.lists_dir, hostlist, ipset)
+        self.import_thread.result.connect(lambda result: self.on_imported(result, hostlist, ipset))
+        self.import_thread.failed.connect(lambda error: self.on_import_failed(error, released))
+        self.import_thread.finished.connect(self.on_import_finished)
+        self.import_thread.start()
+
+    def unsaved_tabs(self, names):
+        return [name for name in names
+                if name in self.editors and self.editors[name].has_unsaved_changes()]
+
+    def on_imported(self, result, hostlist, ipset):
+        # Правки, начатые во время импорта, не затираются: такая вкладка не перечитывается
+        kept = self.unsaved_tabs((hostlist, ipset))
+        for name in (hostlist, ipset):
+            self.documents.invalidate(name)
+            editor = self.editors.get(name)
+            if editor is None or name in kept:
+                continue
+            if isinstance(editor, LargeListEditorDialog):
+                editor.reload_file()
+            else:
+                editor.load_file()
+        message = f"{result.report()}\n\nДомены: {hostlist}\nПодсети: {ipset}"
+        if kept:
+            message += ("\n\nВо вкладках " + ", ".join(kept) + " есть несохранённые изменения, они не перечитаны. "
+                        "Сохранение перезапишет импортированные записи, «Перезагрузить» — покажет их.")
+        self.show_message("Импорт", message)
+
+    def on_import_failed(self, error, released):
+        for name in released:
+            self.editors[name].reload_file()
+        self.show_message("Ошибка", f"Не удалось импортировать:\n{error}", error=True)
+
+    def on_import_finished(self):
+        self.import_btn.setEnabled(True)
+        self.import_btn.setText("Импорт…")
+        self.import_thread = None
+
+    def show_message(self, title: str, text: str, error=False):
+        box = QMessageBox(self)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setIcon(QMessageBox.Critical if error else QMessageBox.Information)
+        apply_mica_to_dialog(box, alt=None if error else False)
+        box.exec()
+
+    def release_editors(self):
+        # Большие списки держат файл открытым через mmap
+        for editor in self.editors.values():
+            editor.close()
+
+    def closeEvent(self, event):
+        if self.import_thread is not None:
+            self.import_thread.wait()
+        self.release_editors()
+        super().closeEvent(event)
+
+    def done(self, result):
+        if self.import_thread is not None:
+            self.import_thread.wait()
+        self.release_editors()
+        super().done(result)
@@ -7,7 +7,7 @@ import subprocess
 from pathlib import Path
 from effects import apply_mica_effect, apply_mica_visual, apply_mica_to_dialog
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QFileSystemWatcher
 from PySide6.QtGui import QFont, QPalette, QColor
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -17,8 +17,19 @@ from PySide6.QtWidgets import (
 
 from toggle_switch import ToggleSwitch
 from worker_thread import WorkerThread
-from list_editor import ListEditorDialog
+from list_workspace import ListWorkspaceDialog
+from list_documents import DocumentCache
 from strategy_constructor import StrategyConstructorDialog
+from script_parameters import get_script_parameters, preset_names
+from strategy_tokenizer import StrategySyntaxError
+from option_schema import validate_cached, validate_registry
+from overhead_estimator import describe, estimate_preset
+from health_worker import ListHealthThread
+from list_artifacts import used_artifacts
+from list_workers import ArtifactBuildThread, AsnIpsetThread, CoverageThread, DebouncedTask
+from atomic_write import atomic_write, recover
+from asn_ipset import OUTPUT_NAME as ASN_OUTPUT_NAME, AsnIpsetBuilder
+from ipset_modes import MODE_DESCRIPTIONS, MODE_LABELS, next_mode, normalize_mode
 
 
 class MainWindow(QMainWindow):
@@ -32,10 +43,20 @@ class MainWindow(QMainWindow):
         self.bin_dir = self.script_dir / "bin"
         self.lists_dir = self.script_dir / "lists"
         self.winws_exe = self.bin_dir / "winws.exe"
+        # Прерванная групповая запись списков доводится до конца до первого чтения
+        try:
+            recover(self.lists_dir)
+        except OSError:
+            pass
         self.settings = self.load_settings()
+        self.ipset_mode = normalize_mode(self.settings.get("ipset_mode"))
+        # Содержимое списков остаётся в памяти между открытиями окна списков
+        self.list_documents = DocumentCache(self.lists_dir)
 
         self.is_connected = False
         self.current_thread = None
+        # Находки фоновых задач по источникам: проверка списков, покрытие профилей, сборка копий, ASN
+        self.issues = {}
 
         self.font_default = QFont("Segoe UI", 12)
         self.font_bold = QFont("Segoe UI", 14, QFont.Bold)
@@ -150,16 +171,11 @@ class MainWindow(QMainWindow):
                 background-color: rgba(255,255,255,0.15);
             }
         """)
-        strategies = [
-                    "General", "Alt", "Alt2", "Alt3", "Alt4",
-                    "Alt5", "Alt6", "Alt7", "Alt8",
-                    "Alt9", "Alt10", "Alt11",
-                    "Fake Tls Auto", "Fake Tls Auto Alt", "Fake Tls Auto Alt2",
-                    "Fake Tls Auto Alt3", "Simple fake", "Simple Fake ALT", "Simple Fake ALT2",
-                    "Custom"    
-                ]
+        strategies = preset_names() + ["Custom"]
         self.combo.addItems(strategies)
         self.combo.setCurrentText(self.settings.get("selected_strategy", "Custom"))
+        self.combo.currentIndexChanged.connect(
+            lambda index: self.combo.setToolTip(self.combo.itemData(index, Qt.ToolTipRole)))
         content_layout.addWidget(self.combo)
         apply_mica_visual(self.combo, alt=True)
 
@@ -190,6 +206,12 @@ class MainWindow(QMainWindow):
         status_layout.addStretch()
         status_layout.addWidget(label_status)
         status_layout.addWidget(self.status_value)
+
+        self.health_label = QLabel("")
+        self.health_label.setFont(self.font_default)
+        self.health_label.setStyleSheet("color: #FBBF24;")
+        self.health_label.setVisible(False)
+        status_layout.addWidget(self.health_label)
         status_layout.addStretch()
 
         content_layout.addWidget(status_container, alignment=Qt.AlignCenter)
@@ -251,8 +273,17 @@ class MainWindow(QMainWindow):
         self.edit_custom_btn.setCursor(Qt.PointingHandCursor)
         self.edit_custom_btn.clicked.connect(self.open_custom_editor)
 
+        self.ipset_btn = QPushButton()
+        self.ipset_btn.setFont(self.font_default)
+        self.ipset_btn.setMinimumHeight(40)
+        self.ipset_btn.setStyleSheet(btn_style)
+        self.ipset_btn.setCursor(Qt.PointingHandCursor)
+        self.ipset_btn.clicked.connect(self.switch_ipset_mode)
+        self.update_ipset_button()
+
         lists_layout.addWidget(self.edit_lists_btn)
         lists_layout.addWidget(self.edit_custom_btn)
+        lists_layout.addWidget(self.ipset_btn)
 
         content_layout.addLayout(lists_layout)
 
@@ -270,6 +301,7 @@ class MainWindow(QMainWindow):
         apply_mica_effect(self, alt=False)
         apply_mica_visual(self.edit_lists_btn, alt=False)
         apply_mica_visual(self.edit_custom_btn, alt=False)
+        apply_mica_visual(self.ipset_btn, alt=False)
 
         if not self.is_admin():
             box = QMessageBox(self)
@@ -286,6 +318,33 @@ class MainWindow(QMainWindow):
             else:
                 pass
 
+        self.check_strategies()
+        self.update_overhead_tooltips()
+
+        # Фоновые задачи по спискам, у каждой свои поводы для запуска:
+        #   проверка списков — изменение файлов в lists/, смена стратегии;
+        #   копии для winws  — изменение файлов в lists/;
+        #   покрытие профилей — изменение файлов, смена стратегии или режима ipset;
+        #   ipset из баз ASN — изменение файлов баз
+        self.health_task = DebouncedTask(self.make_health_thread, self.on_lists_health, self)
+        # Копии списков, с которыми запущен winws: пересборка не удаляет их до отключения
+        self.pinned_artifacts = frozenset()
+        self.artifact_task = DebouncedTask(lambda: ArtifactBuildThread(self.lists_dir, self.pinned_artifacts),
+                                           lambda issues: self.set_issues("artifacts", issues), self)
+        self.coverage_task = DebouncedTask(self.make_coverage_thread,
+                                           lambda issues: self.set_issues("coverage", issues), self)
+        self.asn_task = DebouncedTask(lambda: AsnIpsetThread(self.lists_dir), self.on_asn_ipset, self)
+        self.lists_watcher = QFileSystemWatcher(self)
+        for task in (self.health_task, self.artifact_task, self.coverage_task):
+            self.lists_watcher.directoryChanged.connect(task.schedule)
+            self.lists_watcher.fileChanged.connect(task.schedule)
+        self.asn_watcher = QFileSystemWatcher(self)
+        self.asn_watcher.fileChanged.connect(self.asn_task.schedule)
+        self.combo.currentIndexChanged.connect(self.health_task.schedule)
+        self.combo.currentIndexChanged.connect(self.coverage_task.schedule)
+        self.watch_lists()
+        for task in (self.health_task, self.artifact_task, self.coverage_task, self.asn_task):
+            task.run()
         self.log("Интерфейс готов.")
         self.update_ui_state()
 
@@ -319,7 +378,7 @@ class MainWindow(QMainWindow):
 
     def open_list_editor(self):
         try:
-            editor = ListEditorDialog(str(self.lists_dir), parent=self)
+            editor = ListWorkspaceDialog(str(self.lists_dir), self.list_documents, parent=self)
             apply_mica_to_dialog(editor, alt=True)
             editor.exec()
         except Exception as e:
@@ -488,13 +547,13 @@ class MainWindow(QMainWindow):
         return {}
 
     def save_settings(self):
-        data = {
+        self.settings.update({
             "selected_strategy": self.combo.currentText(),
-            "game_mode": self.game_mode.isChecked()
-        }
+            "game_mode": self.game_mode.isChecked(),
+            "ipset_mode": self.ipset_mode
+        })
         try:
-            with open(self.settings_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            atomic_write(self.settings_path, json.dumps(self.settings, ensure_ascii=False, indent=2))
         except Exception:
             pass
 
@@ -515,6 +574,72 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.show_error("Ошибка", f"Не удалось запустить от имени администратора:\n{e}")
 
+    def check_strategies(self):
+        try:
+            problems = validate_registry(str(self.lists_dir), str(self.bin_dir))
+        except Exception as e:
+            self.log(f"Не удалось проверить стратегии: {e}")
+            return
+        for name, issues in problems.items():
+            for issue in issues:
+                self.log(f"Стратегия {name}: {issue}")
+
+    def update_overhead_tooltips(self):
+        # Оценка лишних пакетов на соединение — в подсказке каждого пункта списка
+        for index in range(self.combo.count()):
+            mode = self.combo.itemText(index)
+            try:
+                tip = describe(estimate_preset(mode, self.game_mode.isChecked(),
+                                               str(self.lists_dir), str(self.bin_dir)))
+            except Exception as e:
+                tip = f"Не удалось оценить накладные расходы: {e}"
+            self.combo.setItemData(index, tip, Qt.ToolTipRole)
+        self.combo.setToolTip(self.combo.itemData(self.combo.currentIndex(), Qt.ToolTipRole))
+
+    def watch_lists(self):
+        # Файл, заменённый атомарной записью, выпадает из наблюдения: пути добавляются заново
+        if self.lists_dir.exists():
+            watched = [str(self.lists_dir)] + [str(p) for p in self.lists_dir.glob("*.txt")]
+            missing = [p for p in watched if p not in self.lists_watcher.files() + self.lists_watcher.directories()]
+            if missing:
+                self.lists_watcher.addPaths(missing)
+        databases = [path for path in AsnIpsetBuilder(self.lists_dir).databases if Path(path).exists()]
+        missing = [path for path in databases if path not in self.asn_watcher.files()]
+        if missing:
+            self.asn_watcher.addPaths(missing)
+
+    def make_health_thread(self):
+        self.watch_lists()
+        return ListHealthThread(self.lists_dir, self.bin_dir, self.combo.currentText(), self.game_mode.isChecked())
+
+    def make_coverage_thread(self):
+        return CoverageThread(self.lists_dir, self.bin_dir, self.combo.currentText(),
+                              self.game_mode.isChecked(), self.ipset_mode)
+
+    def on_lists_health(self, issues):
+        self.set_issues("health", issues)
+
+    def on_asn_ipset(self, count, issues):
+        self.watch_lists()
+        if count is not None:
+            self.log(f"{ASN_OUTPUT_NAME} пересобран из баз ASN: подсетей {count}")
+        self.set_issues("asn", issues)
+
+    def set_issues(self, source, issues):
+        known = [issue for items in self.issues.values() for issue in items]
+        new = [str(issue) for issue in issues if issue not in known]
+        self.issues[source] = issues
+        for line in new[:20]:
+            self.log(f"Списки: {line}")
+        issues = [issue for items in self.issues.values() for issue in items]
+        if issues:
+            self.health_label.setText(f"⚠ {len(issues)}")
+            tip = "\n".join(str(issue) for issue in issues[:30])
+            if len(issues) > 30:
+                tip += f"\n… и ещё {len(issues) - 30}"
+            self.health_label.setToolTip("Проблемы в списках:\n" + tip)
+        self.health_label.setVisible(bool(issues))
+
     def log(self, msg):
         print(f"[{time.strftime('%H:%M:%S')}] {msg}")
 
@@ -522,10 +647,12 @@ class MainWindow(QMainWindow):
         if self.is_connected:
             self.edit_lists_btn.setEnabled(True)
             self.edit_custom_btn.setEnabled(True)
+            self.ipset_btn.setEnabled(True)
             self.stop_zapret()
         else:
             self.edit_lists_btn.setEnabled(False)
             self.edit_custom_btn.setEnabled(False)
+            self.ipset_btn.setEnabled(False)
             self.start_zapret()
 
     def start_zapret(self):
@@ -538,17 +665,19 @@ class MainWindow(QMainWindow):
                 return
 
             mode = self.combo.currentText()
-            self.log(f"Запуск режима: {mode}")
-
-            from script_parameters import get_script_parameters
+            self.log(f"Запуск режима: {mode}, ipset: {MODE_LABELS[self.ipset_mode]}")
 
             params = get_script_parameters(
                 self.game_mode.isChecked(),
                 str(self.lists_dir),
                 str(self.bin_dir),
-                mode
+                mode,
+                self.ipset_mode
             )
-            cmd = [str(self.winws_exe)] + params
+            # Схема опций может отставать от winws: находки только показываются, запуск не блокируют
+            for issue in validate_cached(params, self.bin_dir):
+                self.log(f"Предупреждение: {issue}")
+            cmd = [str(self.winws_exe), *params]
 
             self.log("Выполняется команда:")
             self.log(" ".join(cmd))
@@ -557,10 +686,13 @@ class MainWindow(QMainWindow):
             self.current_thread.output.connect(self.log)
             self.current_thread.finished.connect(self.on_process_finished)
             self.current_thread.start()
+            self.pinned_artifacts = frozenset(used_artifacts(params, self.lists_dir))
 
             self.is_connected = True
             self.update_ui_state()
 
+        except StrategySyntaxError as e:
+            self.show_error("Ошибка в Custom стратегии", f"custom_strategy.txt, {e}")
         except Exception as e:
             self.show_error("Ошибка запуска", str(e))
 
@@ -573,6 +705,7 @@ class MainWindow(QMainWindow):
 
             self.current_thread = None
             self.is_connected = False
+            self.release_artifacts()
             self.update_ui_state()
             self.log("Процесс winws.exe остановлен.")
         except Exception as e:
@@ -583,13 +716,35 @@ class MainWindow(QMainWindow):
         self.log("Процесс завершён.")
         self.current_thread = None
         self.is_connected = False
+        self.release_artifacts()
         self.update_ui_state()
 
+    def release_artifacts(self):
+        # Устаревшие копии, которые держал winws, удалит следующая пересборка
+        if self.pinned_artifacts:
+            self.pinned_artifacts = frozenset()
+            self.artifact_task.schedule()
+
     def on_game_mode_toggle(self):
         if self.game_mode.isChecked():
             self.log("Игровой режим включён (фильтр: 1024-65535)")
         else:
             self.log("Игровой режим выключен (фильтр: 12)")
+        self.update_overhead_tooltips()
+        self.health_task.schedule()
+        self.coverage_task.schedule()
+        self.save_settings()
+
+    def update_ipset_button(self):
+        self.ipset_btn.setText(f"ipset: {MODE_LABELS[self.ipset_mode]}")
+        self.ipset_btn.setToolTip(f"{MODE_DESCRIPTIONS[self.ipset_mode]}\n"
+                                  "Нажмите, чтобы переключить режим (действует со следующего подключения).")
+
+    def switch_ipset_mode(self):
+        self.ipset_mode = next_mode(self.ipset_mode)
+        self.update_ipset_button()
+        self.log(f"Режим ipset: {MODE_LABELS[self.ipset_mode]} — {MODE_DESCRIPTIONS[self.ipset_mode]}")
+        self.coverage_task.schedule()
         self.save_settings()
 
     def update_ui_state(self):
@@ -624,6 +779,8 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         if self.is_connected:
             self.stop_zapret()
+        for task in (self.health_task, self.artifact_task, self.coverage_task, self.asn_task):
+            task.wait()
 
         self.save_settings()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Построчный доступ к большому текстовому файлу без чтения его целиком.
+
+Файл отображается в память (mmap), при открытии строится только индекс смещений
+начала строк. Правки не трогают файл: поверх него лежит таблица кусков
+(piece table) — отрезки строк исходного файла вперемешку с добавленными строками.
+При сохранении строки по очереди пишутся во временный файл, который затем
+атомарно заменяет исходный.
+"""
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from atomic_write import replace, write_temp
+
+# Кусок: (источник, начало, количество строк); источник FILE — строки файла, ADDED — self._added
+FILE = 0
+ADDED = 1
+Piece = Tuple[int, int, int]
+
+
+def _line_offsets(data) -> array:
+    offsets = array("Q", [0])
+    find = data.find
+    pos = find(b"\n")
+    while pos >= 0:
+        offsets.append(pos + 1)
+        pos = find(b"\n", pos + 1)
+    if offsets[-1] == len(data):
+        # Перевод строки в конце файла не открывает новую строку
+        offsets.pop()
+    return offsets
+
+
+class MappedLineFile:
+    def __init__(self, path: Path, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.encoding = encoding
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._data = b""
+        self._offsets = array("Q")
+        self._added: List[str] = []
+        self._pieces: List[Piece] = []
+        self._starts: List[int] = []
+        self._length = 0
+        self.modified = False
+        self.open()
+
+    # --- файл ---
+
+    def open(self):
+        self.close()
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = self._map
+        else:
+            # Пустой файл отобразить в память нельзя
+            self._data = b""
+        self._offsets = _line_offsets(self._data) if size else array("Q")
+        self._added = []
+        self._pieces = [(FILE, 0, len(self._offsets))] if len(self._offsets) else []
+        self._reindex()
+        self.modified = False
+
+    def close(self):
+        # На Windows отображённый файл нельзя заменить, поэтому перед сохранением mmap закрывается
+        self._data = b""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- чтение ---
+
+    def _reindex(self):
+        starts = []
+        total = 0
+        for _source, _start, count in self._pieces:
+            starts.append(total)
+            total += count
+        self._starts = starts
+        self._length = total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _file_line(self, index: int) -> str:
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else len(self._data)
+        raw = self._data[start:end].rstrip(b"\r\n")
+        return raw.decode(self.encoding, errors="replace")
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        piece = bisect_right(self._starts, index) - 1
+        return piece, index - self._starts[piece]
+
+    def line(self, index: int) -> str:
+        piece, offset = self._locate(index)
+        source, start, _count = self._pieces[piece]
+        if source == FILE:
+            return self._file_line(start + offset)
+        return self._added[start + offset]
+
+    __getitem__ = line
+
+    def __iter__(self) -> Iterator[str]:
+        for source, start, count in self._pieces:
+            if source == FILE:
+                for i in range(start, start + count):
+                    yield self._file_line(i)
+            else:
+                yield from self._added[start:start + count]
+
+    # --- правки ---
+
+    def _split(self, index: int) -> int:
+        """Разрезает кусок так, чтобы строка index начинала кусок; возвращает номер этого куска."""
+        if index == self._length:
+            return len(self._pieces)
+        piece, offset = self._locate(index)
+        if offset:
+            source, start, count = self._pieces[piece]
+            self._pieces[piece:piece + 1] = [(source, start, offset), (source, start + offset, count - offset)]
+            self._reindex()
+            piece += 1
+        return piece
+
+    def insert_lines(self, index: int, lines: Sequence[str]):
+        if not lines:
+            return
+        if not 0 <= index <= self._length:
+            raise IndexError(index)
+        piece = self._split(index)
+        self._pieces.insert(piece, (ADDED, len(self._added), len(lines)))
+        self._added.extend(lines)
+        self._reindex()
+        self.modified = True
+
+    def remove_lines(self, index: int, count: int = 1):
+        if count <= 0:
+            return
+        if index < 0 or index + count > self._length:
+            raise IndexError(index)
+        first = self._split(index)
+        last = self._split(index + count) if index + count < self._length else len(self._pieces)
+        del self._pieces[first:last]
+        self._reindex()
+        self.modified = True
+
+    def set_line(self, index: int, text: str):
+        if self.line(index) == text:
+            return
+        self.remove_lines(index, 1)
+        self.insert_lines(index, [text])
+
+    # --- сохранение ---
+
+    def save(self, path: Optional[Path] = None, newline: str = "\n"):
+        target = Path(path) if path is not None else self.path
+        tmp = write_temp(target, (line + newline for line in self), self.encoding)
+        if target == self.path:
+            self.close()
+        replace(tmp, target)
+        if target == self.path:
+            self.open()
@@ -0,0 +1,306 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from domain_normalizer import DOMAIN, normalize_entry
+from port_set import PortSet, PortSpecError
+from strategy_model import GLOBAL_OPTIONS, PROFILE_SEPARATOR, split_option
+from strategy_registry import BUILTIN_VARIABLES, load_registry
+
+# Проверка значения: возвращает текст ошибки или None
+Check = Callable[[str], Optional[str]]
+
+DESYNC_MODES = frozenset({
+    "fake", "fakeknown", "rst", "rstack", "synack", "syndata", "hopbyhop", "destopt", "ipfrag1",
+    "multisplit", "multidisorder", "fakedsplit", "fakeddisorder", "hostfakesplit",
+    "split", "split2", "disorder", "disorder2", "ipfrag2", "udplen", "tamper",
+})
+FOOLING_MODES = frozenset({"none", "md5sig", "badsum", "badseq", "datanoack", "ts", "hopbyhop", "hopbyhop2"})
+L7_PROTOCOLS = frozenset({"http", "tls", "quic", "wireguard", "dht", "discord", "stun", "unknown"})
+FAKE_TLS_MODS = frozenset({"none", "rnd", "rndsni", "dupsid", "padencap"})
+IP_ID_MODES = frozenset({"seq", "seqgroup", "rnd", "zero"})
+
+SPLIT_MARKERS = ("method", "host", "endhost", "sld", "midsld", "endsld", "sniext", "extlen")
+_SPLIT_POS_RE = re.compile(r"^(?:-?\d+|(?:%s)(?:[+-]\d+)?)$" % "|".join(SPLIT_MARKERS))
+_CUTOFF_RE = re.compile(r"^[nsd]\d+$")
+_WSSIZE_RE = re.compile(r"^\d+(?::\d+)?$")
+_CTRACK_TIMEOUTS_RE = re.compile(r"^\d+(?::\d+){0,3}$")
+_AUTOTTL_RE = re.compile(r"^-?\d+(?::\d+-\d+)?$")
+_HEX_RE = re.compile(r"^0x(?:[0-9a-fA-F]{2})+$")
+
+
+class Issue(NamedTuple):
+    profile: int
+    option: str
+    message: str
+
+    def __str__(self):
+        return f"профиль {self.profile + 1}, {self.option}: {self.message}"
+
+
+def ports(value: str) -> Optional[str]:
+    try:
+        PortSet.parse(value)
+    except PortSpecError as e:
+        return str(e)
+    return None
+
+
+def integer(lo: int, hi: int) -> Check:
+    def check(value: str) -> Optional[str]:
+        try:
+            number = int(value, 0)
+        except ValueError:
+            return f"ожидается число, получено {value!r}"
+        if not lo <= number <= hi:
+            return f"число вне диапазона {lo}..{hi}"
+        return None
+    return check
+
+
+def enum_list(allowed: Iterable[str]) -> Check:
+    allowed = frozenset(allowed)
+
+    def check(value: str) -> Optional[str]:
+        bad = [v for v in value.split(",") if v not in allowed]
+        if bad:
+            return f"неизвестные значения: {', '.join(bad)}"
+        return None
+    return check
+
+
+def pattern(regex: "re.Pattern", what: str, many: bool = False) -> Check:
+    def check(value: str) -> Optional[str]:
+        parts = value.split(",") if many else [value]
+        bad = [p for p in parts if not regex.match(p)]
+        if bad:
+            return f"{what}: {', '.join(bad)}"
+        return None
+    return check
+
+
+def _is_domain(value: str) -> bool:
+    # Разбор тот же, что у строк hostlist, но winws значение опции не исправляет:
+    # оно должно быть уже в нормальном виде
+    return normalize_entry(value) == (DOMAIN, value)
+
+
+def domains(value: str) -> Optional[str]:
+    bad = [part for part in value.split(",") if not _is_domain(part)]
+    if bad:
+        return f"некорректные домены: {', '.join(bad)}"
+    return None
+
+
+def any_value(value: str) -> Optional[str]:
+    return None
+
+
+def file_path(value: str, base_dir: Optional[Path] = None) -> Optional[str]:
+    if not value:
+        return "пустой путь"
+    if any("{" + name + "}" in value for name in BUILTIN_VARIABLES):
+        # Шаблон блока: путь станет известен при запуске
+        return None
+    path = Path(value)
+    # winws запускается с рабочей папкой bin, относительные пути считаются от неё
+    if base_dir is not None and not path.is_absolute():
+        path = Path(base_dir) / path
+    if not path.is_file():
+        return f"файл не найден: {value}"
+    return None
+
+
+def payload(value: str, base_dir: Optional[Path] = None) -> Optional[str]:
+    # Фейковый пакет: hex-строка, "!" (стандартный) или путь к .bin
+    if value == "!" or _HEX_RE.match(value):
+        return None
+    if value.startswith("0x"):
+        return f"некорректная hex-строка: {value}"
+    return file_path(value, base_dir)
+
+
+def fake_tls_mod(value: str) -> Optional[str]:
+    bad = [v for v in value.split(",") if v not in FAKE_TLS_MODS and not v.startswith("sni=")]
+    if bad:
+        return f"неизвестные модификаторы: {', '.join(bad)}"
+    return None
+
+
+def hostfakesplit_mod(value: str) -> Optional[str]:
+    for part in value.split(","):
+        key, sep, arg = part.partition("=")
+        if key == "host" and sep and not arg.startswith("^") and _is_domain(arg):
+            continue
+        if key == "altorder" and sep and arg.isdigit():
+            continue
+        return f"некорректный модификатор: {part}"
+    return None
+
+
+# Опция -> проверка значения; None — опция без значения
+SCHEMA: Dict[str, Optional[Check]] = {
+    "--wf-tcp": ports,
+    "--wf-udp": ports,
+    "--wf-raw": any_value,
+    "--wf-l3": enum_list({"ipv4", "ipv6"}),
+    "--wf-save": any_value,
+    "--wf-iface": pattern(re.compile(r"^\d+(?:\.\d+)?$"), "формат ifidx[.subifidx]"),
+    "--wf-dup-check": enum_list({"0", "1"}),
+    "--ctrack-timeouts": pattern(_CTRACK_TIMEOUTS_RE, "формат syn:est:fin:udp"),
+    "--ctrack-disable": enum_list({"0", "1"}),
+    "--ipcache-lifetime": integer(0, 2 ** 31 - 1),
+    "--ipcache-hostname": enum_list({"0", "1"}),
+    "--comment": any_value,
+    "--debug": any_value,
+    "--dry-run": None,
+    "--version": None,
+    "--filter-tcp": ports,
+    "--filter-udp": ports,
+    "--filter-l3": enum_list({"ipv4", "ipv6"}),
+    "--filter-l7": enum_list(L7_PROTOCOLS),
+    "--hostlist": file_path,
+    "--hostlist-exclude": file_path,
+    "--hostlist-domains": domains,
+    "--hostlist-exclude-domains": domains,
+    "--hostlist-auto": any_value,
+    "--hostlist-auto-fail-threshold": integer(1, 20),
+    "--hostlist-auto-fail-time": integer(1, 2 ** 31 - 1),
+    "--hostlist-auto-retrans-threshold": integer(2, 10),
+    "--hostlist-auto-debug": any_value,
+    "--filter-ssid": any_value,
+    "--nlm-filter": any_value,
+    "--ipset": file_path,
+    "--ipset-exclude": file_path,
+    "--ipset-ip": any_value,
+    "--ipset-exclude-ip": any_value,
+    "--ip-id": enum_list(IP_ID_MODES),
+    "--dpi-desync": enum_list(DESYNC_MODES),
+    "--dpi-desync-repeats": integer(1, 1024),
+    "--dpi-desync-fooling": enum_list(FOOLING_MODES),
+    "--dpi-desync-badseq-increment": integer(-2 ** 31, 2 ** 32 - 1),
+    "--dpi-desync-badack-increment": integer(-2 ** 31, 2 ** 32 - 1),
+    "--dpi-desync-ttl": integer(0, 255),
+    "--dpi-desync-ttl6": integer(0, 255),
+    "--dpi-desync-autottl": pattern(_AUTOTTL_RE, "формат delta[:min-max]"),
+    "--dpi-desync-autottl6": pattern(_AUTOTTL_RE, "формат delta[:min-max]"),
+    "--dpi-desync-start": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--dpi-desync-cutoff": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--dpi-desync-skip-nosni": enum_list({"0", "1"}),
+    "--dpi-desync-ipfrag-pos-tcp": integer(8, 65535),
+    "--dpi-desync-ipfrag-pos-udp": integer(8, 65535),
+    "--dpi-desync-udplen-increment": integer(-65535, 65535),
+    "--dpi-desync-udplen-pattern": payload,
+    "--dpi-desync-any-protocol": enum_list({"0", "1"}),
+    "--dpi-desync-split-pos": pattern(_SPLIT_POS_RE, "некорректные позиции", many=True),
+    "--dpi-desync-split-seqovl": integer(0, 65535),
+    "--dpi-desync-split-seqovl-pattern": payload,
+    "--dpi-desync-fakedsplit-pattern": payload,
+    "--dpi-desync-hostfakesplit-mod": hostfakesplit_mod,
+    "--dpi-desync-hostfakesplit-midhost": pattern(_SPLIT_POS_RE, "некорректная позиция"),
+    "--dpi-desync-fake-tls": payload,
+    "--dpi-desync-fake-tls-mod": fake_tls_mod,
+    "--dpi-desync-fake-quic": payload,
+    "--dpi-desync-fake-http": payload,
+    "--dpi-desync-fake-unknown": payload,
+    "--dpi-desync-fake-unknown-udp": payload,
+    "--dpi-desync-fake-syndata": payload,
+    "--dpi-desync-fake-wireguard": payload,
+    "--dpi-desync-fake-dht": payload,
+    "--dpi-desync-fake-discord": payload,
+    "--dpi-desync-fake-stun": payload,
+    "--dup": integer(0, 1024),
+    "--dup-cutoff": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--dup-fooling": enum_list(FOOLING_MODES),
+    "--dup-ttl": integer(0, 255),
+    "--dup-autottl": pattern(_AUTOTTL_RE, "формат delta[:min-max]"),
+    "--dup-start": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--dup-replace": enum_list({"0", "1"}),
+    "--orig-ttl": integer(0, 255),
+    "--orig-autottl": pattern(_AUTOTTL_RE, "формат delta[:min-max]"),
+    "--orig-mod-start": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--orig-mod-cutoff": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--wssize": pattern(_WSSIZE_RE, "формат window[:scale]"),
+    "--wssize-cutoff": pattern(_CUTOFF_RE, "формат n<N>, d<N> или s<N>"),
+    "--synack-split": enum_list({"syn", "synack", "acksyn"}),
+    "--hostcase": None,
+    "--hostspell": any_value,
+    "--hostnospace": None,
+    "--domcase": None,
+    "--methodeol": None,
+}
+
+# Опции, у которых значение необязательно (или которые вовсе без значения)
+FLAG_OPTIONS = frozenset({
+    "--debug", "--dry-run", "--version", "--wf-dup-check", "--ctrack-disable", "--ipcache-hostname",
+    "--dpi-desync-autottl", "--dpi-desync-autottl6", "--dpi-desync-any-protocol",
+    "--dpi-desync-skip-nosni", "--dup-autottl", "--dup-replace", "--orig-autottl", "--synack-split",
+    "--hostcase", "--hostnospace", "--domcase", "--methodeol",
+})
+
+# Проверки, которым нужна рабочая папка winws
+_PATH_CHECKS = (file_path, payload)
+
+
+def validate_args(args: Sequence[str], base_dir: Optional[Path] = None) -> List[Issue]:
+    """Находки по схеме опций. Это предупреждения: схема может отставать от версии winws,
+    поэтому запуск они не блокируют — синтаксис проверяет strategy_tokenizer."""
+    issues = []
+    profile = 0
+    for arg in args:
+        if arg == PROFILE_SEPARATOR:
+            profile += 1
+            continue
+        name, value = split_option(arg)
+        if name not in SCHEMA:
+            issues.append(Issue(profile, name, "неизвестная опция"))
+            continue
+        if value is None:
+            if name not in FLAG_OPTIONS:
+                issues.append(Issue(profile, name, "не указано значение"))
+            continue
+        check = SCHEMA[name]
+        if check is None:
+            message = "опция без значения"
+        elif check in _PATH_CHECKS:
+            message = check(value, base_dir)
+        else:
+            message = check(value)
+        if message:
+            issues.append(Issue(profile, name, message))
+        elif name in GLOBAL_OPTIONS and profile:
+            issues.append(Issue(profile, name, "глобальная опция внутри профиля"))
+    return issues
+
+
+@lru_cache(maxsize=256)
+def _validate(args: Tuple[str, ...], base_dir: Optional[str]) -> Tuple[Issue, ...]:
+    return tuple(validate_args(args, None if base_dir is None else Path(base_dir)))
+
+
+def validate_cached(args: Sequence[str], base_dir: Optional[Path] = None) -> List[Issue]:
+    """validate_args с кэшем только на время работы программы, не больше 256 наборов аргументов.
+
+    Пути к файлам входят в аргументы, поэтому одинаковые аргументы — одинаковый результат.
+    Пропавший файл запись не инвалидирует, но при подключении его всё равно заметит winws."""
+    return list(_validate(tuple(args), None if base_dir is None else str(base_dir)))
+
+
+def validate_registry(lists_dir: str, bin_dir: str, game_filter: str = "1024-65535") -> Dict[str, List[Issue]]:
+    """Проверяет разом все пресеты и блоки конструктора; ключ — "пресет" или "группа/блок"."""
+    registry = load_registry()
+    variables = registry.resolve_variables({
+        "bin_dir": bin_dir, "lists_dir": lists_dir, "game_filter": game_filter,
+    })
+    results = {}
+    for name in registry.preset_names():
+        issues = validate_cached(registry.preset_args(name, variables), Path(bin_dir))
+        if issues:
+            results[name] = issues
+    for group, items in registry.blocks.items():
+        for name, profiles in items.items():
+            issues = validate_cached(registry.render_profiles(profiles, variables), Path(bin_dir))
+            if issues:
+                results[f"{group}/{name}"] = issues
+    return results
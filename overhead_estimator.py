@@ -0,0 +1,212 @@
+"""Оценка лишнего трафика, который стратегия добавляет к каждому соединению.
+
+Модель грубая и считает худший случай: пакет попадает в самый «дорогой» профиль
+своего протокола. Учитываются фейки (--dpi-desync-repeats, размеры .bin),
+дополнительные сегменты от split-позиций, seqovl, --dup и --dpi-desync-any-protocol.
+"""
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from port_set import PortSet
+from script_parameters import compile_script_parameters
+from strategy_model import Profile, Strategy
+from strategy_optimizer import port_domain
+
+TCP_HEADER = 40
+UDP_HEADER = 28
+# Типичный ClientHello, от которого считаются фейки fakedsplit/hostfakesplit
+CLIENT_HELLO = 517
+HOST_LENGTH = 16
+# Средний пакет потока для cutoff по sequence: полный сегмент TCP, короткий пакет игр и голоса по UDP
+TCP_PAYLOAD = 1460
+UDP_PAYLOAD = 200
+
+# Размеры встроенных фейков winws, когда файл не указан или указан "!"
+DEFAULT_FAKES = {
+    "--dpi-desync-fake-tls": 517,
+    "--dpi-desync-fake-http": 75,
+    "--dpi-desync-fake-quic": 1200,
+    "--dpi-desync-fake-unknown": 256,
+    "--dpi-desync-fake-unknown-udp": 64,
+}
+
+# Режимы первой фазы: шлют отдельные пакеты до оригинала
+_FAKE_MODES = {"fake", "fakeknown"}
+_EMPTY_MODES = {"rst", "rstack", "synack"}
+_SPLIT_MODES = {"multisplit", "multidisorder", "split", "split2", "disorder", "disorder2"}
+
+
+class Overhead(NamedTuple):
+    packets: int = 0
+    bytes: int = 0
+    # Применяется к каждому пакету потока (any-protocol без cutoff) — оценка на пакет
+    unbounded: bool = False
+
+    def __add__(self, other: "Overhead") -> "Overhead":
+        return Overhead(self.packets + other.packets, self.bytes + other.bytes,
+                        self.unbounded or other.unbounded)
+
+    def scale(self, times: int) -> "Overhead":
+        return Overhead(self.packets * times, self.bytes * times, self.unbounded)
+
+
+class Estimate(NamedTuple):
+    tcp: Overhead
+    udp: Overhead
+    # Порты UDP, где desync применяется к любому протоколу (игры, голос), и цена такого потока
+    any_udp: PortSet
+    any_udp_cost: Overhead
+    profiles: List[Dict[str, Overhead]]
+
+
+_payload_sizes: Dict[str, tuple] = {}
+
+
+def payload_size(option: str, value: Optional[str], variables: Optional[Dict[str, str]] = None) -> int:
+    default = DEFAULT_FAKES.get(option, CLIENT_HELLO)
+    if value is None or value == "!":
+        return default
+    if value.startswith("0x"):
+        return max(0, (len(value) - 2) // 2)
+    for name, replacement in (variables or {}).items():
+        value = value.replace("{" + name + "}", replacement)
+    path = Path(value)
+    try:
+        stat = path.stat()
+    except OSError:
+        return default
+    # Размер файла кэшируется по mtime: оценка пересчитывается на каждое изменение комбобокса
+    cached = _payload_sizes.get(value)
+    if cached is None or cached[0] != stat.st_mtime_ns:
+        cached = (stat.st_mtime_ns, stat.st_size)
+        _payload_sizes[value] = cached
+    return cached[1]
+
+
+def _int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value, 0) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _fakes(profile: Profile, options: tuple, variables: Optional[Dict[str, str]]) -> List[int]:
+    # Каждая --dpi-desync-fake-* опция добавляет свой фейк; без них winws шлёт встроенный
+    sizes = [payload_size(opt, value, variables) for opt, value in profile.options if opt in options]
+    return sizes or [DEFAULT_FAKES[options[0]]]
+
+
+def _cutoff(value: Optional[str], payload: int) -> Optional[int]:
+    """Сколько пакетов обработается до cutoff: n<N> — номер пакета, d<N> — номер пакета с данными,
+    s<N> — относительный sequence, т.е. байты данных, пересчитанные в пакеты по payload."""
+    if not value or value[0] not in "nds" or not value[1:].isdigit():
+        return None
+    limit = int(value[1:])
+    if value[0] == "s":
+        return max(1, -(-limit // payload))
+    return limit
+
+
+def profile_overhead(profile: Profile, variables: Optional[Dict[str, str]] = None) -> Dict[str, Overhead]:
+    """Лишние пакеты и байты на одно TCP-соединение / один UDP-поток, попавшие в профиль."""
+    modes = set()
+    for value in profile.option_values("--dpi-desync"):
+        modes.update((value or "").split(","))
+    repeats = _int(profile.option("--dpi-desync-repeats"), 1)
+    positions = len((profile.option("--dpi-desync-split-pos") or "2").split(","))
+    seqovl = _int(profile.option("--dpi-desync-split-seqovl"), 0)
+    dup = _int(profile.option("--dup"), 0)
+    any_protocol = profile.option("--dpi-desync-any-protocol") == "1"
+
+    result = {}
+    for proto in port_domain(profile):
+        header = TCP_HEADER if proto == "tcp" else UDP_HEADER
+        payload = TCP_PAYLOAD if proto == "tcp" else UDP_PAYLOAD
+        cutoff = _cutoff(profile.option("--dpi-desync-cutoff"), payload)
+        dup_cutoff = _cutoff(profile.option("--dup-cutoff"), payload)
+        per_packet = Overhead()
+        if modes & _FAKE_MODES:
+            if proto == "tcp":
+                # Соединение либо TLS, либо HTTP: в счёт идёт более дорогой набор фейков
+                fakes = max((_fakes(profile, (option,), variables)
+                             for option in ("--dpi-desync-fake-tls", "--dpi-desync-fake-http")), key=sum)
+            elif any_protocol:
+                fakes = _fakes(profile, ("--dpi-desync-fake-unknown-udp",), variables)
+            else:
+                fakes = _fakes(profile, ("--dpi-desync-fake-quic",), variables)
+            per_packet += Overhead(len(fakes), sum(fakes) + header * len(fakes)).scale(repeats)
+        if proto == "tcp":
+            if modes & _EMPTY_MODES:
+                per_packet += Overhead(1, header).scale(repeats)
+            if modes & _SPLIT_MODES:
+                per_packet += Overhead(positions, header * positions + seqovl)
+            if modes & {"fakedsplit", "fakeddisorder"}:
+                # Две части, каждая обрамлена фейками того же размера
+                per_packet += Overhead(1, header) + Overhead(4, 2 * (CLIENT_HELLO + 2 * header)).scale(repeats)
+            if "hostfakesplit" in modes:
+                per_packet += Overhead(2, 2 * header) + Overhead(2, 2 * (HOST_LENGTH + header)).scale(repeats)
+        else:
+            if "ipfrag2" in modes:
+                per_packet += Overhead(1, header)
+            if "udplen" in modes:
+                per_packet += Overhead(0, _int(profile.option("--dpi-desync-udplen-increment"), 2))
+        dup_cost = Overhead(dup, dup * (CLIENT_HELLO + header)) if dup else Overhead()
+        if dup_cutoff is None:
+            per_packet += dup_cost
+            dup_total = Overhead()
+        else:
+            # У --dup свой cutoff, независимый от --dpi-desync-cutoff
+            dup_total = dup_cost.scale(dup_cutoff)
+
+        # Известные протоколы обрабатываются по первому пакету; any-protocol — до cutoff или всегда
+        if proto == "udp" and any_protocol:
+            if cutoff is None:
+                # Оценка на пакет: ограниченный --dup-cutoff дубль в ней не виден
+                result[proto] = per_packet._replace(unbounded=True)
+            else:
+                result[proto] = per_packet.scale(cutoff) + dup_total
+        else:
+            result[proto] = per_packet + dup_total
+    return result
+
+
+def estimate(strategy: Strategy, variables: Optional[Dict[str, str]] = None) -> Estimate:
+    per_profile = [profile_overhead(profile, variables) for profile in strategy.profiles]
+    worst = {"tcp": Overhead(), "udp": Overhead()}
+    for overhead in per_profile:
+        for proto, value in overhead.items():
+            if (value.unbounded, value.bytes) > (worst[proto].unbounded, worst[proto].bytes):
+                worst[proto] = value
+    any_udp, any_cost = PortSet(), Overhead()
+    for profile, overhead in zip(strategy.profiles, per_profile):
+        if profile.option("--dpi-desync-any-protocol") == "1" and "udp" in overhead:
+            ports = port_domain(profile)["udp"]
+            if ports:
+                any_udp = any_udp | ports
+            cost = overhead["udp"]
+            if (cost.unbounded, cost.bytes) > (any_cost.unbounded, any_cost.bytes):
+                any_cost = cost
+    return Estimate(worst["tcp"], worst["udp"], any_udp, any_cost, per_profile)
+
+
+def estimate_preset(mode: str, game_mode_checked: bool, lists_dir: str, bin_dir: str) -> Estimate:
+    args = compile_script_parameters(game_mode_checked, lists_dir, bin_dir, mode)
+    return estimate(Strategy.from_argv(list(args)))
+
+
+def _format(overhead: Overhead) -> str:
+    if not overhead.packets and not overhead.bytes:
+        return "без накладных"
+    size = f"{overhead.bytes / 1024:.1f} КБ" if overhead.bytes >= 1024 else f"{overhead.bytes} Б"
+    text = f"+{overhead.packets} пак., +{size}"
+    return text + " на каждый пакет" if overhead.unbounded else text
+
+
+def describe(result: Estimate) -> str:
+    lines = [
+        f"TCP-соединение: {_format(result.tcp)}",
+        f"UDP-поток: {_format(result.udp)}",
+    ]
+    if result.any_udp:
+        lines.append(f"Любой UDP {result.any_udp}: {_format(result.any_udp_cost)}")
+    return "\n".join(lines)
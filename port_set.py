@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from typing import Iterable, Iterator, Optional, Tuple
+
+MAX_PORT = 65535
+
+Range = Tuple[int, int]
+
+
+class PortSpecError(ValueError):
+    pass
+
+
+def _normalize(ranges: Iterable[Range]) -> Tuple[Range, ...]:
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return tuple(merged)
+
+
+class PortSet:
+    """Неизменяемое множество портов в виде отсортированных непересекающихся интервалов."""
+
+    __slots__ = ("ranges", "_starts")
+
+    def __init__(self, ranges: Iterable[Range] = ()):
+        self.ranges: Tuple[Range, ...] = _normalize(ranges)
+        self._starts = tuple(lo for lo, _hi in self.ranges)
+
+    @classmethod
+    def parse(cls, spec: str) -> "PortSet":
+        # Формат winws: "80,443,19294-19344,50000-50100"
+        ranges = []
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            lo, sep, hi = part.partition("-")
+            if not lo.isdigit() or (sep and not hi.isdigit()):
+                raise PortSpecError(f"Некорректный диапазон портов: {part!r}")
+            lo_i = int(lo)
+            hi_i = int(hi) if sep else lo_i
+            if lo_i > hi_i or hi_i > MAX_PORT:
+                raise PortSpecError(f"Некорректный диапазон портов: {part!r}")
+            ranges.append((lo_i, hi_i))
+        return cls(ranges)
+
+    @classmethod
+    def try_parse(cls, spec: Optional[str]) -> Optional["PortSet"]:
+        if spec is None:
+            return None
+        try:
+            return cls.parse(spec)
+        except PortSpecError:
+            return None
+
+    def __contains__(self, port: int) -> bool:
+        i = bisect_right(self._starts, port) - 1
+        return i >= 0 and port <= self.ranges[i][1]
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        return PortSet(self.ranges + other.ranges)
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        result = []
+        i = j = 0
+        a, b = self.ranges, other.ranges
+        while i < len(a) and j < len(b):
+            lo = max(a[i][0], b[j][0])
+            hi = min(a[i][1], b[j][1])
+            if lo <= hi:
+                result.append((lo, hi))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return PortSet(result)
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        result = []
+        for lo, hi in self.ranges:
+            for olo, ohi in other.ranges:
+                if ohi < lo or olo > hi:
+                    continue
+                if olo > lo:
+                    result.append((lo, olo - 1))
+                lo = ohi + 1
+                if lo > hi:
+                    break
+            if lo <= hi:
+                result.append((lo, hi))
+        return PortSet(result)
+
+    def issuperset(self, other: "PortSet") -> bool:
+        return not (other - self)
+
+    def isdisjoint(self, other: "PortSet") -> bool:
+        return not (self & other)
+
+    __ge__ = issuperset
+
+    def __le__(self, other: "PortSet") -> bool:
+        return other.issuperset(self)
+
+    def __iter__(self) -> Iterator[Range]:
+        return iter(self.ranges)
+
+    def __len__(self) -> int:
+        return sum(hi - lo + 1 for lo, hi in self.ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self.ranges)
+
+    def __eq__(self, other):
+        if not isinstance(other, PortSet):
+            return NotImplemented
+        return self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __str__(self):
+        return ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in self.ranges)
+
+    def __repr__(self):
+        return f"PortSet({str(self)!r})"
+
+
+ALL_PORTS = PortSet([(0, MAX_PORT)])
@@ -1,650 +1,119 @@
-from typing import List
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+from ipset_modes import DEFAULT_IPSET_MODE, apply_ipset_mode
+from list_artifacts import ArtifactCache, rewrite_args
+from port_set import ALL_PORTS, PortSet
+from strategy_model import Strategy
+from strategy_optimizer import optimize, port_domain
+from strategy_registry import Registry, load_registry, parse_template, render_template
+from strategy_tokenizer import tokenize
+from wf_filter import build_params
 
-def get_script_parameters(game_mode_checked: bool, lists_dir: str, bin_dir: str, mode: str) -> List[str]:
-    if game_mode_checked:
-        game_filter = "1024-65535"
-    else:
-        game_filter = "12"
+GAME_FILTER_ON = "1024-65535"
+GAME_FILTER_OFF = "12"
 
-    base_params = [
-        f"--wf-tcp=80,443,2053,2083,2087,2096,8443,{game_filter}",
-        f"--wf-udp=443,19294-19344,50000-50100,{game_filter}"
-    ]
+# Порты перехвата по умолчанию: используются для профилей без --filter-tcp/--filter-udp
+# или с нераспознанной спецификацией портов
+BASE_TEMPLATE = [
+    "--wf-tcp=80,443,2053,2083,2087,2096,8443,{game_filter}",
+    "--wf-udp=443,19294-19344,50000-50100,{game_filter}"
+]
 
-    mode_params = {
-        "General": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
+_BASE = tuple(parse_template(arg) for arg in BASE_TEMPLATE)
 
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
 
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=568', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_4pda_to.bin', '--new',
+def interception_ports(strategy: Strategy, fallback: Dict[str, PortSet]) -> Dict[str, PortSet]:
+    """Минимальные порты WinDivert: объединение фильтров всех профилей по протоколам."""
+    ports = {"tcp": PortSet(), "udp": PortSet()}
+    for profile in strategy.profiles:
+        for proto, profile_ports in port_domain(profile).items():
+            if profile_ports is None or profile_ports is ALL_PORTS:
+                profile_ports = fallback[proto]
+            ports[proto] = ports[proto] | profile_ports
+    return ports
 
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
 
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=568', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_4pda_to.bin', '--new',
+def interception_params(strategy: Strategy, variables: Dict[str, str]) -> List[str]:
+    fallback = {}
+    for template in _BASE:
+        name, _, spec = render_template(template, variables).partition("=")
+        fallback[name[len("--wf-"):]] = PortSet.parse(spec)
+    ports = interception_ports(strategy, fallback)
+    # Подсети из ipset-exclude.txt отсекаются ещё в драйвере через --wf-raw
+    return build_params(ports, exclude_list_path(variables["lists_dir"]))
 
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
 
-        "Alt": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            '--dpi-desync-fakedsplit-pattern=0x00', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
+def preset_names() -> List[str]:
+    return load_registry().preset_names()
 
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            '--dpi-desync-fakedsplit-pattern=0x00', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
 
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            '--dpi-desync-fakedsplit-pattern=0x00', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
+def custom_strategy_path(lists_dir: str) -> Path:
+    return Path(lists_dir) / "custom_strategy.txt"
 
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
 
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            '--dpi-desync-fakedsplit-pattern=0x00', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
+def exclude_list_path(lists_dir: str) -> Path:
+    return Path(lists_dir) / "ipset-exclude.txt"
 
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n3'
-        ],
 
-        "Alt2": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=652', '--dpi-desync-split-pos=2',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
 
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=652', '--dpi-desync-split-pos=2',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=652', '--dpi-desync-split-pos=2',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=652', '--dpi-desync-split-pos=2',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt3": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,hostfakesplit', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com',
-            '--dpi-desync-hostfakesplit-mod=host=www.google.com,altorder=1', '--dpi-desync-fooling=ts', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,hostfakesplit', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com',
-            '--dpi-desync-hostfakesplit-mod=host=www.google.com,altorder=1', '--dpi-desync-fooling=ts', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,hostfakesplit', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=ya.ru',
-            '--dpi-desync-hostfakesplit-mod=host=ya.ru,altorder=1', '--dpi-desync-fooling=ts', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,hostfakesplit', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=ya.ru',
-            '--dpi-desync-hostfakesplit-mod=host=ya.ru,altorder=1', '--dpi-desync-fooling=ts', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt4": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=1000', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=1000', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=1000', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=1000', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt5": [
-            '--filter-l3=ipv4', f'--filter-tcp=443,2053,2083,2087,2096,8443,{game_filter}',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=syndata,multidisorder', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=14',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n3'
-        ],
-
-        "Alt6": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt7": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=multisplit', '--dpi-desync-split-pos=2,sniext+1', '--dpi-desync-split-seqovl=679',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=multisplit', '--dpi-desync-split-pos=2,sniext+1', '--dpi-desync-split-seqovl=679',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=multisplit', '--dpi-desync-split-pos=2,sniext+1', '--dpi-desync-split-seqovl=679',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=syndata', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt8": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake', '--dpi-desync-fake-tls-mod=none', '--dpi-desync-repeats=6',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=2', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake', '--dpi-desync-fake-tls-mod=none', '--dpi-desync-repeats=6',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=2', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-fake-tls-mod=none', '--dpi-desync-repeats=6',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=2', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-fake-tls-mod=none', '--dpi-desync-repeats=6',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=2', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt9": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=hostfakesplit', '--dpi-desync-repeats=4', '--dpi-desync-fooling=ts',
-            '--dpi-desync-hostfakesplit-mod=host=www.google.com', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=hostfakesplit', '--dpi-desync-repeats=4', '--dpi-desync-fooling=ts',
-            '--dpi-desync-hostfakesplit-mod=host=www.google.com', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=hostfakesplit', '--dpi-desync-repeats=4', '--dpi-desync-fooling=ts,md5sig',
-            '--dpi-desync-hostfakesplit-mod=host=ozon.ru', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=hostfakesplit', '--dpi-desync-repeats=4', '--dpi-desync-fooling=ts',
-            '--dpi-desync-hostfakesplit-mod=host=ozon.ru', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt10": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=none', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_4pda_to.bin', '--dpi-desync-fake-tls-mod=none', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            '--dpi-desync-fake-tls=!', '--dpi-desync-fake-tls-mod=rnd,sni=www.google.com',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_4pda_to.bin',
-            '--dpi-desync-fake-tls-mod=none', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Alt11": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=654', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_max_ru.bin',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_max_ru.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=11',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=654', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_max_ru.bin',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_max_ru.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Fake Tls Auto Alt": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-split-pos=1', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', '--dpi-desync-repeats=8',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-split-pos=1', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', '--dpi-desync-repeats=8',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-split-pos=1', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', '--dpi-desync-repeats=8',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=11',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,fakedsplit', '--dpi-desync-split-pos=1', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', '--dpi-desync-repeats=8',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Fake Tls Auto Alt2": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=10000000',
-            '--dpi-desync-repeats=8', f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=10000000',
-            '--dpi-desync-repeats=8', f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=10000000',
-            '--dpi-desync-repeats=8', f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=11',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=badseq', '--dpi-desync-badseq-increment=10000000',
-            '--dpi-desync-repeats=8', f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Fake Tls Auto Alt3": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=11',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multisplit', '--dpi-desync-split-seqovl=681', '--dpi-desync-split-pos=1',
-            '--dpi-desync-fooling=ts', '--dpi-desync-repeats=8',
-            f'--dpi-desync-split-seqovl-pattern={bin_dir}/tls_clienthello_www_google_com.bin',
-            '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Fake Tls Auto": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake,multidisorder', '--dpi-desync-split-pos=1,midsld',
-            '--dpi-desync-repeats=11', '--dpi-desync-fooling=badseq', '--dpi-desync-fake-tls=0x00000000',
-            '--dpi-desync-fake-tls=!', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake,multidisorder', '--dpi-desync-split-pos=1,midsld',
-            '--dpi-desync-repeats=11', '--dpi-desync-fooling=badseq', '--dpi-desync-fake-tls=0x00000000',
-            '--dpi-desync-fake-tls=!', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multidisorder', '--dpi-desync-split-pos=1,midsld',
-            '--dpi-desync-repeats=11', '--dpi-desync-fooling=badseq', '--dpi-desync-fake-tls=0x00000000',
-            '--dpi-desync-fake-tls=!', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=11',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake,multidisorder', '--dpi-desync-split-pos=1,midsld',
-            '--dpi-desync-repeats=11', '--dpi-desync-fooling=badseq', '--dpi-desync-fake-tls=0x00000000',
-            '--dpi-desync-fake-tls=!', '--dpi-desync-fake-tls-mod=rnd,dupsid,sni=www.google.com', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Simple Fake ALT": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=badseq',
-            '--dpi-desync-badseq-increment=2', f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=10',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n2'
-        ],
-
-        "Simple Fake ALT2": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_max_ru.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_max_ru.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n3'
-        ],
-
-        "Simple fake": [
-            '--filter-tcp=2053,2083,2087,2096,8443', '--hostlist-domains=discord.media',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=443', f'--hostlist={lists_dir}/list-google.txt', '--ip-id=zero',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-tcp=80,443', f'--hostlist={lists_dir}/list-general.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            '--filter-udp=443', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6',
-            f'--dpi-desync-fake-quic={bin_dir}/quic_initial_www_google_com.bin', '--new',
-
-            f'--filter-tcp=80,443,{game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--hostlist-exclude={lists_dir}/list-exclude.txt', f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-repeats=6', '--dpi-desync-fooling=ts',
-            f'--dpi-desync-fake-tls={bin_dir}/tls_clienthello_www_google_com.bin', '--new',
-
-            f'--filter-udp={game_filter}', f'--ipset={lists_dir}/ipset-all.txt',
-            f'--ipset-exclude={lists_dir}/ipset-exclude.txt',
-            '--dpi-desync=fake', '--dpi-desync-autottl=2', '--dpi-desync-repeats=12',
-            '--dpi-desync-any-protocol=1', f'--dpi-desync-fake-unknown-udp={bin_dir}/quic_initial_www_google_com.bin',
-            '--dpi-desync-cutoff=n3'
-        ]
-    }
-
-    params = base_params
 
+@lru_cache(maxsize=64)
+def _compile(registry: Registry, mode: str, game_mode_checked: bool, lists_dir: str, bin_dir: str,
+             custom_mtime: Optional[int], exclude_mtime: Optional[int]) -> Tuple[str, ...]:
+    variables = registry.resolve_variables({
+        "bin_dir": bin_dir,
+        "lists_dir": lists_dir,
+        "game_filter": GAME_FILTER_ON if game_mode_checked else GAME_FILTER_OFF,
+    })
+    args: List[str] = []
     if mode == "Custom":
-        try:
-            custom_file = Path(lists_dir) / "custom_strategy.txt"
-            if custom_file.exists():
-                content = custom_file.read_text(encoding='utf-8')
-                custom_args = content.split()
-                
-                final_args = []
-                for arg in custom_args:
-                    arg = arg.replace("{bin_dir}", bin_dir) \
-                            .replace("{lists_dir}", lists_dir) \
-                            .replace("{game_filter}", game_filter)
-                    final_args.append(arg)
-                params = base_params + final_args
-
-        except Exception:
-            pass
-
-    elif mode in mode_params:
-        params += mode_params[mode]
-
-    return params
\ No newline at end of file
+        # Ошибки разбора не глотаем: пусть пользователь увидит строку и столбец до запуска winws
+        if custom_mtime is not None:
+            content = custom_strategy_path(lists_dir).read_text(encoding='utf-8')
+            for token in tokenize(content):
+                arg = token.value
+                for name, value in variables.items():
+                    arg = arg.replace("{" + name + "}", value)
+                args.append(arg)
+
+    elif mode in registry.presets:
+        args = registry.preset_args(mode, variables)
+
+    strategy = Strategy.from_argv(args)
+    result = optimize(strategy)
+    # Без объединённых и удалённых профилей argv остаётся как есть: Custom-стратегия
+    # пользователя не переставляется и не переписывается
+    if result.removed:
+        strategy = result.strategy
+        args = strategy.to_argv()
+
+    # Свои --wf-* в Custom стратегии имеют приоритет над вычисленными
+    if any(name.startswith("--wf-") for name, _ in strategy.global_options):
+        return tuple(args)
+    return tuple(interception_params(strategy, variables) + args)
+
+
+def compile_script_parameters(game_mode_checked: bool, lists_dir: str, bin_dir: str,
+                              mode: str) -> Tuple[str, ...]:
+    # Реестр входит в ключ кэша: при изменении файлов стратегий load_registry вернёт новый объект.
+    # mtime custom-файла и ipset-exclude.txt тоже в ключе: правка файла сама инвалидирует запись.
+    custom_mtime = _mtime(custom_strategy_path(lists_dir)) if mode == "Custom" else None
+    exclude_mtime = _mtime(exclude_list_path(lists_dir))
+    return _compile(load_registry(), mode, bool(game_mode_checked), lists_dir, bin_dir,
+                    custom_mtime, exclude_mtime)
+
+
+def get_script_parameters(game_mode_checked: bool, lists_dir: str, bin_dir: str, mode: str,
+                          ipset_mode: str = DEFAULT_IPSET_MODE) -> List[str]:
+    """Аргументы для запуска winws: режим ipset применяется к путям, затем списки заменяются
+    скомпилированными копиями, если те свежие."""
+    args = compile_script_parameters(game_mode_checked, lists_dir, bin_dir, mode)
+    args = apply_ipset_mode(args, lists_dir, ipset_mode)
+    return rewrite_args(args, ArtifactCache(Path(lists_dir)))
@@ -10,6 +10,11 @@ from toggle_switch import ToggleSwitch
 from list_editor import ListEditorDialog
 from effects import apply_mica_effect, apply_mica_visual, apply_mica_to_dialog
 import strategies_db
+from strategy_optimizer import optimize
+from overhead_estimator import describe, estimate
+from script_parameters import GAME_FILTER_ON
+from atomic_write import Transaction
+from backup_store import BackupStore
 
 class StrategyConstructorDialog(QDialog):
     def __init__(self, lists_dir: str, settings: dict = None, parent=None):
@@ -86,6 +91,11 @@ class StrategyConstructorDialog(QDialog):
         game_info.setStyleSheet("color: #9CA3AF; font-size: 11px;")
         layout.addWidget(game_info)
 
+        self.overhead_label = QLabel()
+        self.overhead_label.setWordWrap(True)
+        self.overhead_label.setStyleSheet("color: #9CA3AF; font-size: 11px;")
+        layout.addWidget(self.overhead_label)
+
         layout.addStretch()
 
         btns_layout = QHBoxLayout()
@@ -124,6 +134,11 @@ class StrategyConstructorDialog(QDialog):
             
         self.toggle_discord.setChecked(last_discord)
 
+        self.combo_youtube.currentTextChanged.connect(self.update_overhead)
+        self.combo_general.currentTextChanged.connect(self.update_overhead)
+        self.toggle_discord.stateChanged.connect(self.update_overhead)
+        self.update_overhead()
+
         apply_mica_effect(self)
         apply_mica_visual(self.btn_manual)
         apply_mica_visual(self.btn_save)
@@ -135,6 +150,23 @@ class StrategyConstructorDialog(QDialog):
             "last_discord": self.toggle_discord.isChecked()
         }
 
+    def update_overhead(self, *_):
+        try:
+            strategy = strategies_db.assemble_strategy(
+                self.combo_youtube.currentText(),
+                self.combo_general.currentText(),
+                self.toggle_discord.isChecked()
+            )
+            variables = {
+                "bin_dir": str(Path(__file__).parent / "bin"),
+                "lists_dir": str(self.lists_dir),
+                "game_filter": GAME_FILTER_ON,
+            }
+            result = estimate(optimize(strategy).strategy, variables)
+            self.overhead_label.setText("Накладные расходы (оценка):\n" + describe(result))
+        except Exception as e:
+            self.overhead_label.setText(f"Не удалось оценить накладные расходы: {e}")
+
     def create_label(self, text):
         lbl = QLabel(text)
         lbl.setFont(self.font_header)
@@ -151,31 +183,28 @@ class StrategyConstructorDialog(QDialog):
         editor.exec()
 
     def save_strategy(self):
-        blocks = []
-
-        y_sel = self.combo_youtube.currentText()
-        if y_sel != "Нет" and y_sel in strategies_db.YOUTUBE_STRATEGIES:
-            blocks.append("\n".join(strategies_db.YOUTUBE_STRATEGIES[y_sel]))
-
-        g_sel = self.combo_general.currentText()
-        if g_sel != "Нет" and g_sel in strategies_db.GENERAL_STRATEGIES:
-            blocks.append("\n".join(strategies_db.GENERAL_STRATEGIES[g_sel]))
-
-        if self.toggle_discord.isChecked():
-            blocks.append("\n".join(strategies_db.DISCORD_STRATEGY))
-
-        blocks.append("\n".join(strategies_db.GAME_STRATEGY))
-
-        full_text = "\n--new\n".join(blocks)
+        strategy = strategies_db.assemble_strategy(
+            self.combo_youtube.currentText(),
+            self.combo_general.currentText(),
+            self.toggle_discord.isChecked()
+        )
+        result = optimize(strategy)
+        full_text = result.strategy.to_text()
 
         try:
             if not self.lists_dir.exists():
                 self.lists_dir.mkdir(parents=True, exist_ok=True)
             
             file_path = self.lists_dir / "custom_strategy.txt"
-            file_path.write_text(full_text, encoding="utf-8")
+            BackupStore.for_lists(self.lists_dir).backup(file_path)
+            with Transaction(self.lists_dir) as tx:
+                tx.write(file_path, full_text)
             
-            QMessageBox.information(self, "Успех", "Стратегия собрана и сохранена!")
+            msg = "Стратегия собрана и сохранена!"
+            if result.removed:
+                msg += (f"\nОптимизация: объединено профилей — {result.merged}, "
+                        f"удалено недостижимых — {result.dropped}.")
+            QMessageBox.information(self, "Успех", msg)
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить:\n{e}")
\ No newline at end of file
@@ -0,0 +1,201 @@
+from typing import Iterable, List, Optional, Tuple
+
+from strategy_tokenizer import quote
+
+PROFILE_SEPARATOR = "--new"
+
+# Опции winws, которые действуют на весь процесс, а не на отдельный профиль
+GLOBAL_OPTIONS = frozenset({
+    "--wf-iface", "--wf-l3", "--wf-tcp", "--wf-udp", "--wf-raw", "--wf-save",
+    "--wf-dup-check", "--ctrack-timeouts", "--ctrack-disable", "--ipcache-lifetime",
+    "--ipcache-hostname", "--debug", "--dry-run", "--version", "--comment",
+})
+
+# Опции-списки: имя опции -> атрибут профиля
+LIST_OPTIONS = {
+    "--hostlist": "hostlists",
+    "--hostlist-domains": "hostlist_domains",
+    "--hostlist-exclude": "hostlist_excludes",
+    "--hostlist-exclude-domains": "hostlist_exclude_domains",
+    "--ipset": "ipsets",
+    "--ipset-ip": "ipset_ips",
+    "--ipset-exclude": "ipset_excludes",
+    "--ipset-exclude-ip": "ipset_exclude_ips",
+}
+
+# Значения этих опций перечисляются через запятую, в модели хранятся поэлементно
+_COMMA_LISTS = frozenset({"hostlist_domains", "hostlist_exclude_domains", "ipset_ips", "ipset_exclude_ips"})
+
+Option = Tuple[str, Optional[str]]
+
+
+def split_option(token: str) -> Option:
+    name, sep, value = token.partition("=")
+    return (name, value) if sep else (name, None)
+
+
+def join_option(name: str, value: Optional[str]) -> str:
+    return name if value is None else f"{name}={value}"
+
+
+class Profile:
+    __slots__ = (
+        "filter_tcp", "filter_udp", "filter_l3", "filter_l7",
+        "hostlists", "hostlist_domains", "hostlist_excludes", "hostlist_exclude_domains",
+        "ipsets", "ipset_ips", "ipset_excludes", "ipset_exclude_ips",
+        "options",
+    )
+
+    def __init__(self):
+        self.filter_tcp: Optional[str] = None
+        self.filter_udp: Optional[str] = None
+        self.filter_l3: Optional[str] = None
+        self.filter_l7: Tuple[str, ...] = ()
+        self.hostlists: List[str] = []
+        self.hostlist_domains: List[str] = []
+        self.hostlist_excludes: List[str] = []
+        self.hostlist_exclude_domains: List[str] = []
+        self.ipsets: List[str] = []
+        self.ipset_ips: List[str] = []
+        self.ipset_excludes: List[str] = []
+        self.ipset_exclude_ips: List[str] = []
+        # Остальные опции (dpi-desync и прочие) в исходном порядке:
+        # порядок важен, например --dpi-desync-fake-tls-mod относится к предыдущему --dpi-desync-fake-tls
+        self.options: List[Option] = []
+
+    def add(self, name: str, value: Optional[str]):
+        if name == "--filter-tcp" and value is not None:
+            self.filter_tcp = value if self.filter_tcp is None else f"{self.filter_tcp},{value}"
+        elif name == "--filter-udp" and value is not None:
+            self.filter_udp = value if self.filter_udp is None else f"{self.filter_udp},{value}"
+        elif name == "--filter-l3" and value is not None:
+            self.filter_l3 = value
+        elif name == "--filter-l7" and value is not None:
+            self.filter_l7 += tuple(v for v in value.split(",") if v)
+        elif name in LIST_OPTIONS and value is not None:
+            attr = LIST_OPTIONS[name]
+            items = getattr(self, attr)
+            if attr in _COMMA_LISTS:
+                items.extend(v for v in value.split(",") if v)
+            else:
+                items.append(value)
+        else:
+            self.options.append((name, value))
+
+    def option_values(self, name: str) -> List[Optional[str]]:
+        return [value for opt, value in self.options if opt == name]
+
+    def option(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        values = self.option_values(name)
+        return values[-1] if values else default
+
+    @property
+    def desync_key(self) -> Tuple[Option, ...]:
+        return tuple(self.options)
+
+    def is_empty(self) -> bool:
+        return not (self.filter_tcp or self.filter_udp or self.filter_l3 or self.filter_l7
+                    or self.options or any(getattr(self, attr) for attr in LIST_OPTIONS.values()))
+
+    @property
+    def has_includes(self) -> bool:
+        return bool(self.hostlists or self.hostlist_domains or self.ipsets or self.ipset_ips)
+
+    def copy(self) -> "Profile":
+        other = Profile()
+        for attr in Profile.__slots__:
+            value = getattr(self, attr)
+            setattr(other, attr, list(value) if isinstance(value, list) else value)
+        return other
+
+    def to_argv(self) -> List[str]:
+        argv = []
+        if self.filter_l3 is not None:
+            argv.append(f"--filter-l3={self.filter_l3}")
+        if self.filter_tcp is not None:
+            argv.append(f"--filter-tcp={self.filter_tcp}")
+        if self.filter_udp is not None:
+            argv.append(f"--filter-udp={self.filter_udp}")
+        if self.filter_l7:
+            argv.append("--filter-l7=" + ",".join(self.filter_l7))
+        for name, attr in LIST_OPTIONS.items():
+            items = getattr(self, attr)
+            if not items:
+                continue
+            if attr in _COMMA_LISTS:
+                argv.append(f"{name}=" + ",".join(items))
+            else:
+                argv.extend(f"{name}={item}" for item in items)
+        argv.extend(join_option(name, value) for name, value in self.options)
+        return argv
+
+    def __eq__(self, other):
+        if not isinstance(other, Profile):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in Profile.__slots__)
+
+    def __repr__(self):
+        return f"Profile({' '.join(self.to_argv())})"
+
+
+class Strategy:
+    __slots__ = ("global_options", "profiles")
+
+    def __init__(self, profiles: Optional[List[Profile]] = None,
+                 global_options: Optional[List[Option]] = None):
+        self.global_options: List[Option] = global_options if global_options is not None else []
+        self.profiles: List[Profile] = profiles if profiles is not None else []
+
+    @classmethod
+    def from_argv(cls, argv: Iterable[str]) -> "Strategy":
+        strategy = cls()
+        profile = Profile()
+        # Последний токен был опцией без значения: следующий позиционный токен — её значение
+        pending = False
+        for token in argv:
+            if token == PROFILE_SEPARATOR:
+                strategy.profiles.append(profile)
+                profile, pending = Profile(), False
+                continue
+            if pending and not token.startswith("-"):
+                # "--opt value" вместо "--opt=value"
+                name, _ = profile.options.pop()
+                profile.add(name, token)
+                pending = False
+                continue
+            name, value = split_option(token)
+            if name in GLOBAL_OPTIONS:
+                strategy.global_options.append((name, value))
+                pending = False
+            else:
+                profile.add(name, value)
+                pending = value is None
+        if not profile.is_empty() or not strategy.profiles:
+            strategy.profiles.append(profile)
+        return strategy
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Iterable[str]]) -> "Strategy":
+        strategy = cls()
+        for block in blocks:
+            part = cls.from_argv(block)
+            strategy.global_options.extend(part.global_options)
+            strategy.profiles.extend(p for p in part.profiles if not p.is_empty())
+        return strategy
+
+    def to_argv(self) -> List[str]:
+        argv = [join_option(name, value) for name, value in self.global_options]
+        for i, profile in enumerate(self.profiles):
+            if i:
+                argv.append(PROFILE_SEPARATOR)
+            argv.extend(profile.to_argv())
+        return argv
+
+    def to_text(self) -> str:
+        return "\n".join(quote(arg) for arg in self.to_argv())
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __repr__(self):
+        return f"Strategy({len(self.profiles)} profiles)"
@@ -0,0 +1,252 @@
+import argparse
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from port_set import ALL_PORTS, PortSet
+from strategy_model import Profile, Strategy
+
+# Опции, влияющие на выбор профиля, но не разобранные в отдельные поля модели.
+# Профили с разными значениями этих опций не сравниваем и не объединяем.
+MATCH_OPTIONS = frozenset({
+    "--filter-ssid", "--nlm-filter", "--hostlist-auto", "--hostlist-auto-fail-threshold",
+    "--hostlist-auto-fail-time", "--hostlist-auto-retrans-threshold", "--hostlist-auto-debug",
+})
+
+_HOST_INCLUDES = ("hostlists", "hostlist_domains")
+_IP_INCLUDES = ("ipsets", "ipset_ips")
+_EXCLUDES = ("hostlist_excludes", "hostlist_exclude_domains", "ipset_excludes", "ipset_exclude_ips")
+
+
+class OptimizeResult(NamedTuple):
+    strategy: Strategy
+    merged: int
+    dropped: int
+
+    @property
+    def removed(self) -> int:
+        return self.merged + self.dropped
+
+
+def port_domain(profile: Profile) -> Dict[str, Optional[PortSet]]:
+    # Без --filter-tcp/--filter-udp профиль ловит оба протокола на любых портах,
+    # с одним из них — только указанный протокол.
+    # None вместо множества — спецификация не разобрана (например, ещё содержит {game_filter}).
+    if profile.filter_tcp is None and profile.filter_udp is None:
+        return {"tcp": ALL_PORTS, "udp": ALL_PORTS}
+    domain = {}
+    if profile.filter_tcp is not None:
+        domain["tcp"] = PortSet.try_parse(profile.filter_tcp)
+    if profile.filter_udp is not None:
+        domain["udp"] = PortSet.try_parse(profile.filter_udp)
+    return domain
+
+
+def _match_options(profile: Profile) -> Tuple:
+    return tuple(opt for opt in profile.options if opt[0] in MATCH_OPTIONS)
+
+
+def _items(profile: Profile, attrs: Tuple[str, ...]) -> frozenset:
+    return frozenset((attr, item) for attr in attrs for item in getattr(profile, attr))
+
+
+def covers(a: Profile, b: Profile) -> bool:
+    """Любой пакет, подходящий под b, подходит и под a — значит, b после a никогда не сработает."""
+    if a.filter_l3 is not None and a.filter_l3 != b.filter_l3:
+        return False
+    if a.filter_l7 and not (b.filter_l7 and set(b.filter_l7) <= set(a.filter_l7)):
+        return False
+    if _match_options(a) != _match_options(b):
+        return False
+
+    da, db = port_domain(a), port_domain(b)
+    for proto, ports in db.items():
+        if proto not in da:
+            return False
+        outer = da[proto]
+        if outer is None or ports is None:
+            if outer is None or outer != ports:
+                return False
+        elif not outer.issuperset(ports):
+            return False
+
+    for attrs in (_HOST_INCLUDES, _IP_INCLUDES):
+        inc_a, inc_b = _items(a, attrs), _items(b, attrs)
+        if inc_a and not (inc_b and inc_b <= inc_a):
+            return False
+    return _items(a, _EXCLUDES) <= _items(b, _EXCLUDES)
+
+
+def disjoint(a: Profile, b: Profile) -> bool:
+    """Профили гарантированно не претендуют на один и тот же трафик."""
+    if a.filter_l3 is not None and b.filter_l3 is not None and a.filter_l3 != b.filter_l3:
+        return True
+    if a.filter_l7 and b.filter_l7 and not set(a.filter_l7) & set(b.filter_l7):
+        return True
+    da, db = port_domain(a), port_domain(b)
+    for proto in da.keys() & db.keys():
+        pa, pb = da[proto], db[proto]
+        if pa is None or pb is None or not pa.isdisjoint(pb):
+            return False
+    return True
+
+
+def _ports_key(spec: Optional[str]):
+    ports = PortSet.try_parse(spec)
+    return spec if ports is None else ports
+
+
+def _condition(profile: Profile, skip: str) -> Tuple:
+    parts = {
+        "ports": (_ports_key(profile.filter_tcp), _ports_key(profile.filter_udp)),
+        "hosts": _items(profile, _HOST_INCLUDES),
+        "ips": _items(profile, _IP_INCLUDES),
+        "l7": frozenset(profile.filter_l7),
+    }
+    parts.pop(skip)
+    return (profile.filter_l3, _items(profile, _EXCLUDES), _match_options(profile),
+            profile.desync_key) + tuple(parts.values())
+
+
+def _union_ports(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if a is None or b is None:
+        return None
+    ports = PortSet.try_parse(f"{a},{b}")
+    return f"{a},{b}" if ports is None else str(ports)
+
+
+def _try_merge(a: Profile, b: Profile) -> Optional[Profile]:
+    """Объединяет b в a, если профили отличаются ровно одним измерением условия."""
+    if a.desync_key != b.desync_key:
+        return None
+    for dim in ("ports", "hosts", "ips", "l7"):
+        if _condition(a, dim) != _condition(b, dim):
+            continue
+        merged = a.copy()
+        if dim == "ports":
+            if (a.filter_tcp is None) != (b.filter_tcp is None) or (a.filter_udp is None) != (b.filter_udp is None):
+                return None
+            merged.filter_tcp = _union_ports(a.filter_tcp, b.filter_tcp)
+            merged.filter_udp = _union_ports(a.filter_udp, b.filter_udp)
+        elif dim == "l7":
+            if not (a.filter_l7 and b.filter_l7):
+                return None
+            merged.filter_l7 = a.filter_l7 + tuple(p for p in b.filter_l7 if p not in a.filter_l7)
+        else:
+            attrs = _HOST_INCLUDES if dim == "hosts" else _IP_INCLUDES
+            if not (_items(a, attrs) and _items(b, attrs)):
+                return None
+            for attr in attrs:
+                items = getattr(merged, attr)
+                items.extend(item for item in getattr(b, attr) if item not in items)
+        return merged
+    return None
+
+
+def optimize(strategy: Strategy) -> OptimizeResult:
+    profiles: List[Profile] = [p.copy() for p in strategy.profiles]
+    merged_count = 0
+    dropped_count = 0
+
+    changed = True
+    while changed:
+        changed = False
+
+        kept: List[Profile] = []
+        for profile in profiles:
+            if any(covers(earlier, profile) for earlier in kept):
+                dropped_count += 1
+                changed = True
+            else:
+                kept.append(profile)
+        profiles = kept
+
+        j = 1
+        while j < len(profiles):
+            b = profiles[j]
+            target = None
+            for i in range(j - 1, -1, -1):
+                merged = _try_merge(profiles[i], b)
+                if merged is not None:
+                    profiles[i] = merged
+                    target = i
+                    break
+                # Поднять трафик b выше профиля i можно, только если i на него не претендует
+                if not disjoint(profiles[i], b):
+                    break
+            if target is None:
+                j += 1
+            else:
+                del profiles[j]
+                merged_count += 1
+                changed = True
+
+    result = Strategy(profiles, list(strategy.global_options))
+    return OptimizeResult(result, merged_count, dropped_count)
+
+
+# Самопроверка: (argv стратегии, ожидаемые профили после optimize). Первое совпадение
+# у winws решает, какой профиль обработает пакет, и оптимизация не должна это менять
+SELF_CHECKS = [
+    # Перекрытый профиль: весь его трафик забирает более широкий профиль выше
+    (["--filter-tcp=80,443", "--dpi-desync=fake", "--new", "--filter-tcp=443", "--dpi-desync=split"],
+     [["--filter-tcp=80,443", "--dpi-desync=fake"]]),
+    # Одинаковые профили, отличающиеся только портами, объединяются
+    (["--filter-tcp=80", "--dpi-desync=fake", "--new", "--filter-tcp=443,81", "--dpi-desync=fake"],
+     [["--filter-tcp=80-81,443", "--dpi-desync=fake"]]),
+    # Объединение через непересекающийся профиль: tcp и udp не конкурируют
+    (["--filter-tcp=80", "--dpi-desync=fake", "--new", "--filter-udp=443", "--dpi-desync=fake",
+      "--new", "--filter-tcp=443", "--dpi-desync=fake"],
+     [["--filter-tcp=80,443", "--dpi-desync=fake"], ["--filter-udp=443", "--dpi-desync=fake"]]),
+    # Через пересекающийся профиль с другой стратегией объединять нельзя: пакет для c.txt
+    # из списка b.txt сменил бы обработчик
+    (["--filter-tcp=443", "--hostlist=a.txt", "--dpi-desync=fake", "--new",
+      "--filter-tcp=443", "--hostlist=b.txt", "--dpi-desync=split", "--new",
+      "--filter-tcp=443", "--hostlist=c.txt", "--dpi-desync=fake"],
+     [["--filter-tcp=443", "--hostlist=a.txt", "--dpi-desync=fake"],
+      ["--filter-tcp=443", "--hostlist=b.txt", "--dpi-desync=split"],
+      ["--filter-tcp=443", "--hostlist=c.txt", "--dpi-desync=fake"]]),
+    # Исключения сужают профиль: он не перекрывает профиль без них
+    (["--filter-tcp=443", "--hostlist-exclude=x.txt", "--dpi-desync=fake", "--new",
+      "--filter-tcp=443", "--dpi-desync=split"],
+     [["--filter-tcp=443", "--hostlist-exclude=x.txt", "--dpi-desync=fake"],
+      ["--filter-tcp=443", "--dpi-desync=split"]]),
+]
+
+# Алгебра PortSet, на которой построены covers/disjoint: (выражение, ожидаемое множество)
+PORT_CHECKS = [
+    (lambda: PortSet.parse("443,80,1000-2000,1500-3000"), "80,443,1000-3000"),
+    (lambda: PortSet.parse("80,443") | PortSet.parse("444-500"), "80,443-500"),
+    (lambda: PortSet.parse("1-1000") - PortSet.parse("80,443"), "1-79,81-442,444-1000"),
+    (lambda: PortSet.parse("1-1000") & PortSet.parse("443,2000"), "443"),
+]
+
+
+def self_check() -> List[str]:
+    """Расхождения с ожидаемым поведением; пустой список — всё в порядке."""
+    errors = []
+    for make, expected in PORT_CHECKS:
+        got = str(make())
+        if got != str(PortSet.parse(expected)):
+            errors.append(f"PortSet: ожидалось {expected}, получено {got}")
+    if not PortSet.parse("1-1000").issuperset(PortSet.parse("80,443")) \
+            or not PortSet.parse("80").isdisjoint(PortSet.parse("81-90")):
+        errors.append("PortSet: неверные issuperset/isdisjoint")
+    for argv, expected in SELF_CHECKS:
+        got = [profile.to_argv() for profile in optimize(Strategy.from_argv(argv)).strategy.profiles]
+        if got != expected:
+            errors.append(f"{' '.join(argv)}\n  ожидалось: {expected}\n  получено:  {got}")
+    return errors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Самопроверка оптимизатора профилей и PortSet")
+    parser.parse_args(argv)
+    errors = self_check()
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(f"Проверок: {len(PORT_CHECKS) + 1 + len(SELF_CHECKS)}, ошибок: {len(errors)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
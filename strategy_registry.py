@@ -0,0 +1,222 @@
+import hashlib
+import json
+from pathlib import Path
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+REGISTRY_DIR = Path(__file__).parent / "strategies"
+REGISTRY_FORMAT = 1
+
+# Переменные, значения которых известны только в момент запуска
+BUILTIN_VARIABLES = ("bin_dir", "lists_dir", "game_filter")
+
+BLOCK_GROUPS = ("youtube", "general", "discord", "game")
+
+# Аргумент шаблона после разбора: кортеж пар (литерал, имя_переменной или None)
+Template = Tuple[Tuple[str, Optional[str]], ...]
+
+_formatter = Formatter()
+
+
+class RegistryError(ValueError):
+    pass
+
+
+def parse_template(arg: str) -> Template:
+    try:
+        return tuple((literal, field) for literal, field, _spec, _conv in _formatter.parse(arg))
+    except ValueError as e:
+        raise RegistryError(f"Некорректный шаблон {arg!r}: {e}")
+
+
+def render_template(template: Template, variables: Dict[str, str]) -> str:
+    return "".join(
+        literal + (variables[field] if field is not None else "")
+        for literal, field in template
+    )
+
+
+def template_fields(template: Template) -> List[str]:
+    return [field for _literal, field in template if field is not None]
+
+
+def _placeholders() -> Dict[str, str]:
+    return {var: "{" + var + "}" for var in BUILTIN_VARIABLES}
+
+
+class RegistryFile:
+    __slots__ = ("path", "mtime_ns", "size", "digest", "variables", "presets", "blocks")
+
+    def __init__(self, path: Path, mtime_ns: int, size: int, digest: str,
+                 variables: Dict[str, Template],
+                 presets: Dict[str, Tuple[Tuple[Template, ...], ...]],
+                 blocks: Dict[str, Dict[str, Tuple[Tuple[Template, ...], ...]]]):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.variables = variables
+        self.presets = presets
+        self.blocks = blocks
+
+
+def _parse_profiles(where: str, value) -> Tuple[Tuple[Template, ...], ...]:
+    if not isinstance(value, list) or not value:
+        raise RegistryError(f"{where}: ожидается непустой список профилей")
+    profiles = []
+    for i, profile in enumerate(value):
+        if not isinstance(profile, list) or not all(isinstance(a, str) for a in profile):
+            raise RegistryError(f"{where}[{i}]: профиль должен быть списком строк")
+        if "--new" in profile:
+            raise RegistryError(f"{where}[{i}]: '--new' не нужен, профили разделяются списками")
+        profiles.append(tuple(parse_template(a) for a in profile))
+    return tuple(profiles)
+
+
+def _parse_file(path: Path, raw: bytes, mtime_ns: int) -> RegistryFile:
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RegistryError(f"{path.name}: не удалось разобрать JSON: {e}")
+    if not isinstance(data, dict):
+        raise RegistryError(f"{path.name}: ожидается JSON-объект")
+    if data.get("format", REGISTRY_FORMAT) != REGISTRY_FORMAT:
+        raise RegistryError(f"{path.name}: неподдерживаемая версия формата {data.get('format')!r}")
+
+    variables = {}
+    for name, value in (data.get("variables") or {}).items():
+        if name in BUILTIN_VARIABLES:
+            raise RegistryError(f"{path.name}: переменную {{{name}}} переопределять нельзя")
+        if not isinstance(value, str):
+            raise RegistryError(f"{path.name}: значение переменной {name} должно быть строкой")
+        variables[name] = parse_template(value)
+
+    presets = {}
+    for name, value in (data.get("presets") or {}).items():
+        presets[name] = _parse_profiles(f"{path.name}: presets.{name}", value)
+
+    blocks = {}
+    for group, items in (data.get("blocks") or {}).items():
+        if group not in BLOCK_GROUPS:
+            raise RegistryError(f"{path.name}: неизвестная группа блоков {group!r}")
+        if not isinstance(items, dict):
+            raise RegistryError(f"{path.name}: blocks.{group} должен быть объектом")
+        blocks[group] = {
+            name: _parse_profiles(f"{path.name}: blocks.{group}.{name}", value)
+            for name, value in items.items()
+        }
+
+    digest = hashlib.sha256(raw).hexdigest()
+    return RegistryFile(path, mtime_ns, len(raw), digest, variables, presets, blocks)
+
+
+class Registry:
+    """Объединённое содержимое всех файлов реестра; более поздние файлы переопределяют ранние."""
+
+    def __init__(self, files: List[RegistryFile]):
+        self.files = tuple(files)
+        self.revision = tuple(f.digest for f in files)
+        self.variables: Dict[str, Template] = {}
+        self.presets: Dict[str, Tuple[Tuple[Template, ...], ...]] = {}
+        self.blocks: Dict[str, Dict[str, Tuple[Tuple[Template, ...], ...]]] = {g: {} for g in BLOCK_GROUPS}
+        for f in files:
+            self.variables.update(f.variables)
+            self.presets.update(f.presets)
+            for group, items in f.blocks.items():
+                self.blocks[group].update(items)
+        self._check_variables()
+
+    def _check_variables(self):
+        known = set(BUILTIN_VARIABLES) | set(self.variables)
+        templates = [t for t in self.variables.values()]
+        for profiles in self.presets.values():
+            templates.extend(t for profile in profiles for t in profile)
+        for items in self.blocks.values():
+            for profiles in items.values():
+                templates.extend(t for profile in profiles for t in profile)
+        for t in templates:
+            for field in template_fields(t):
+                if field not in known:
+                    raise RegistryError(f"Неизвестная переменная {{{field}}}")
+        # Ловим циклы заранее, а не при подключении
+        self.resolve_variables(_placeholders())
+
+    def resolve_variables(self, builtins: Dict[str, str]) -> Dict[str, str]:
+        resolved = dict(builtins)
+        resolving = set()
+
+        def resolve(name: str) -> str:
+            if name in resolved:
+                return resolved[name]
+            if name in resolving:
+                raise RegistryError(f"Циклическая ссылка в переменной {{{name}}}")
+            resolving.add(name)
+            template = self.variables[name]
+            for field in template_fields(template):
+                resolve(field)
+            resolved[name] = render_template(template, resolved)
+            resolving.discard(name)
+            return resolved[name]
+
+        for name in self.variables:
+            resolve(name)
+        return resolved
+
+    def preset_names(self) -> List[str]:
+        return list(self.presets)
+
+    def block_names(self, group: str) -> List[str]:
+        return list(self.blocks[group])
+
+    def render_profiles(self, profiles: Tuple[Tuple[Template, ...], ...],
+                        variables: Dict[str, str]) -> List[str]:
+        args = []
+        for i, profile in enumerate(profiles):
+            if i:
+                args.append("--new")
+            args.extend(render_template(t, variables) for t in profile)
+        return args
+
+    def preset_args(self, name: str, variables: Dict[str, str]) -> List[str]:
+        return self.render_profiles(self.presets[name], variables)
+
+    def block_args(self, group: str, name: str) -> List[str]:
+        # Пользовательские переменные раскрываются, встроенные остаются плейсхолдерами:
+        # блоки попадают в custom_strategy.txt, где их подставит get_script_parameters.
+        variables = self.resolve_variables(_placeholders())
+        return self.render_profiles(self.blocks[group][name], variables)
+
+
+_file_cache: Dict[Path, RegistryFile] = {}
+_registry_cache: Dict[Path, Registry] = {}
+
+
+def _load_file(path: Path) -> RegistryFile:
+    st = path.stat()
+    cached = _file_cache.get(path)
+    if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+        return cached
+
+    raw = path.read_bytes()
+    if cached is not None and cached.digest == hashlib.sha256(raw).hexdigest():
+        # Файл "потрогали", но содержимое не изменилось — разбирать заново незачем
+        cached.mtime_ns = st.st_mtime_ns
+        return cached
+
+    entry = _parse_file(path, raw, st.st_mtime_ns)
+    _file_cache[path] = entry
+    return entry
+
+
+def load_registry(directory: Path = REGISTRY_DIR) -> Registry:
+    directory = Path(directory)
+    files = [_load_file(p) for p in sorted(directory.glob("*.json"))]
+    revision = tuple(f.digest for f in files)
+
+    cached = _registry_cache.get(directory)
+    if cached is not None and cached.revision == revision:
+        return cached
+
+    registry = Registry(files)
+    _registry_cache[directory] = registry
+    return registry
@@ -0,0 +1,139 @@
+"""Разбор custom_strategy.txt на аргументы winws.
+
+Правила:
+  * аргументы разделяются пробелами и переводами строк;
+  * '#' в начале аргумента открывает комментарий до конца строки;
+  * кавычки '...' и "..." защищают пробелы: --hostlist="C:/My Lists/list.txt";
+  * обратная косая черта не экранирует (пути Windows пишутся как есть);
+  * кавычка должна закрываться на той же строке.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+QUOTES = "'\""
+
+
+class Token(NamedTuple):
+    value: str
+    line: int
+    column: int
+
+
+class StrategySyntaxError(ValueError):
+    def __init__(self, message: str, line: int, column: int):
+        super().__init__(f"строка {line}, столбец {column}: {message}")
+        self.message = message
+        self.line = line
+        self.column = column
+
+
+# Результат разбора одной строки: ((значение, столбец), ...) и ошибка (столбец, текст) или None
+LineResult = Tuple[Tuple[Tuple[str, int], ...], Optional[Tuple[int, str]]]
+
+
+def tokenize_line(text: str) -> LineResult:
+    tokens = []
+    i, n = 0, len(text)
+    while i < n:
+        if text[i].isspace():
+            i += 1
+            continue
+        if text[i] == "#":
+            break
+        start = i
+        value = []
+        while i < n and not text[i].isspace():
+            ch = text[i]
+            if ch in QUOTES:
+                end = text.find(ch, i + 1)
+                if end < 0:
+                    return tuple(tokens), (i + 1, "незакрытая кавычка")
+                value.append(text[i + 1:end])
+                i = end + 1
+            else:
+                value.append(ch)
+                i += 1
+        tokens.append(("".join(value), start + 1))
+    return tuple(tokens), None
+
+
+def tokenize(text: str) -> List[Token]:
+    """Разбирает текст целиком; при первой ошибке бросает StrategySyntaxError."""
+    result = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        tokens, error = tokenize_line(line)
+        if error is not None:
+            raise StrategySyntaxError(error[1], lineno, error[0])
+        result.extend(Token(value, lineno, col) for value, col in tokens)
+    return result
+
+
+def quote(arg: str) -> str:
+    if arg and not any(ch.isspace() or ch in QUOTES for ch in arg) and not arg.startswith("#"):
+        return arg
+    if '"' not in arg:
+        return f'"{arg}"'
+    if "'" not in arg:
+        return f"'{arg}'"
+    # Есть оба вида кавычек: соседние куски в кавычках склеиваются в один аргумент
+    return "'\"'".join(f'"{part}"' for part in arg.split('"'))
+
+
+class IncrementalTokenizer:
+    """Держит разбор по строкам и при изменении текста перебирает только изменившиеся строки."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._results: List[LineResult] = []
+        self._cache: Dict[str, LineResult] = {}
+        self.reparsed = 0
+
+    def _parse(self, line: str) -> LineResult:
+        result = self._cache.get(line)
+        if result is None:
+            result = tokenize_line(line)
+            self.reparsed += 1
+            if len(self._cache) > 4 * len(self._lines) + 1024:
+                self._cache.clear()
+            self._cache[line] = result
+        return result
+
+    def update(self, text: str) -> Tuple[int, int]:
+        """Возвращает диапазон строк [start, end), которые пришлось перебрать."""
+        lines = text.splitlines()
+        old = self._lines
+        prefix = 0
+        limit = min(len(old), len(lines))
+        while prefix < limit and old[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix
+               and old[len(old) - 1 - suffix] == lines[len(lines) - 1 - suffix]):
+            suffix += 1
+
+        changed = [self._parse(line) for line in lines[prefix:len(lines) - suffix]]
+        self._results[prefix:len(old) - suffix] = changed
+        self._lines = lines
+        return prefix, len(lines) - suffix
+
+    def tokens(self) -> List[Token]:
+        return [
+            Token(value, lineno, col)
+            for lineno, (tokens, _error) in enumerate(self._results, 1)
+            for value, col in tokens
+        ]
+
+    def line_tokens(self, index: int) -> Tuple[Tuple[str, int], ...]:
+        return self._results[index][0]
+
+    def errors(self) -> List[StrategySyntaxError]:
+        return [
+            StrategySyntaxError(error[1], lineno, error[0])
+            for lineno, (_tokens, error) in enumerate(self._results, 1)
+            if error is not None
+        ]
+
+    def args(self) -> List[str]:
+        errors = self.errors()
+        if errors:
+            raise errors[0]
+        return [token.value for token in self.tokens()]
@@ -0,0 +1,147 @@
+import ipaddress
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from port_set import MAX_PORT, PortSet
+
+# WinDivert компилирует фильтр не более чем в 256 инструкций, одна инструкция — одно сравнение.
+# Берём запас на служебные проверки (impostor, loopback, протоколы).
+MAX_COMPARISONS = 200
+MAX_FILTER_LENGTH = 8000
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class FilterTooComplex(ValueError):
+    pass
+
+
+def read_cidrs(path: Path) -> List[Network]:
+    networks = []
+    for raw in Path(path).read_text(encoding="utf-8").splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(line, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def _address_ranges(networks: Iterable[Network], version: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    # None на краю диапазона — граница совпадает с минимальным/максимальным адресом и сравнение не нужно
+    nets = [n for n in networks if n.version == version]
+    ranges = []
+    for net in ipaddress.collapse_addresses(nets):
+        lo, hi = int(net.network_address), int(net.broadcast_address)
+        if ranges and lo <= ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], hi))
+        else:
+            ranges.append((lo, hi))
+    addr = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    top = (1 << (32 if version == 4 else 128)) - 1
+    return [
+        (str(addr(lo)) if lo > 0 else None, str(addr(hi)) if hi < top else None)
+        for lo, hi in ranges
+    ]
+
+
+class _Builder:
+    def __init__(self):
+        self.comparisons = 0
+
+    def cmp(self, expr: str) -> str:
+        self.comparisons += 1
+        return expr
+
+    def ports(self, field: str, ports: PortSet) -> str:
+        terms = []
+        for lo, hi in ports:
+            if lo == hi:
+                terms.append(self.cmp(f"{field} == {lo}"))
+            elif hi == MAX_PORT:
+                terms.append(self.cmp(f"{field} >= {lo}"))
+            else:
+                terms.append(f"({self.cmp(f'{field} >= {lo}')} and {self.cmp(f'{field} <= {hi}')})")
+        return "(" + " or ".join(terms) + ")"
+
+    def not_in(self, field: str, ranges: List[Tuple[Optional[str], Optional[str]]]) -> str:
+        terms = []
+        for lo, hi in ranges:
+            if lo is None and hi is None:
+                return "false"
+            if lo is None:
+                terms.append(self.cmp(f"{field} > {hi}"))
+            elif hi is None:
+                terms.append(self.cmp(f"{field} < {lo}"))
+            elif lo == hi:
+                terms.append(self.cmp(f"{field} != {lo}"))
+            else:
+                terms.append(f"({self.cmp(f'{field} < {lo}')} or {self.cmp(f'{field} > {hi}')})")
+        return " and ".join(terms) if terms else "true"
+
+    def handshake(self) -> str:
+        return (f"(({self.cmp('tcp.Syn')} and {self.cmp('tcp.Ack')}) or "
+                f"{self.cmp('tcp.Rst')} or {self.cmp('tcp.Fin')})")
+
+    def direction(self, side: str, ports: Dict[str, PortSet], v4: list, v6: list) -> str:
+        if side == "Dst":
+            protos = [
+                f"({proto} and {self.ports(f'{proto}.{side}Port', proto_ports)})"
+                for proto, proto_ports in ports.items() if proto_ports
+            ]
+        elif ports.get("tcp"):
+            # Как и фильтр winws из --wf-tcp/--wf-udp: входящие только SYN+ACK, RST и FIN по tcp,
+            # полезная нагрузка и входящий udp в пользовательский режим не попадают
+            protos = [f"(tcp and {self.handshake()} and {self.ports('tcp.SrcPort', ports['tcp'])})"]
+        else:
+            return ""
+        # Поле чужого семейства адресов в WinDivert даёт false, поэтому семейства проверяем раздельно
+        addr = (f"((ip and {self.not_in(f'ip.{side}Addr', v4)}) or "
+                f"(ipv6 and {self.not_in(f'ipv6.{side}Addr', v6)}))")
+        return f"({' or '.join(protos)}) and {addr}"
+
+
+def build_filter(ports: Dict[str, PortSet], excludes: Iterable[Network]) -> str:
+    """Собирает выражение для --wf-raw: порты профилей минус исключённые подсети.
+
+    Исходящие пакеты проверяются по адресу и порту назначения, входящие — по источнику;
+    из входящих перехватываются только tcp-пакеты SYN+ACK, RST и FIN.
+    """
+    if not any(ports.values()):
+        raise FilterTooComplex("Нет портов для перехвата")
+    excludes = list(excludes)
+    v4 = _address_ranges(excludes, 4)
+    v6 = _address_ranges(excludes, 6)
+
+    builder = _Builder()
+    outbound = builder.direction("Dst", ports, v4, v6)
+    inbound = builder.direction("Src", ports, v4, v6)
+    if inbound:
+        expr = f"!impostor and !loopback and ((outbound and {outbound}) or (inbound and {inbound}))"
+    else:
+        expr = f"!impostor and !loopback and outbound and {outbound}"
+
+    if builder.comparisons > MAX_COMPARISONS:
+        raise FilterTooComplex(f"Слишком много сравнений в фильтре: {builder.comparisons}")
+    if len(expr) > MAX_FILTER_LENGTH:
+        raise FilterTooComplex(f"Слишком длинный фильтр: {len(expr)} символов")
+    return expr
+
+
+def build_params(ports: Dict[str, PortSet], exclude_file: Optional[Path]) -> List[str]:
+    """--wf-raw с исключениями, либо обычные --wf-tcp/--wf-udp, если фильтр не собрать."""
+    plain = [f"--wf-{proto}={ports[proto]}" for proto in ("tcp", "udp") if ports.get(proto)]
+    if exclude_file is None:
+        return plain
+    try:
+        excludes = read_cidrs(exclude_file)
+    except OSError:
+        return plain
+    if not excludes:
+        return plain
+    try:
+        return [f"--wf-raw={build_filter(ports, excludes)}"]
+    except FilterTooComplex:
+        return plain